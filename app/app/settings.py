@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core', #core is an application in app, settings.py describes the settings for app => therefore install core
     'rest_framework',
     'rest_framework.authtoken',
@@ -46,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.HealthCheckMiddleware',
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,7 +58,14 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'app.urls'
+# app/asgi.py enables ASYNC_READS, serving recipe and tag reads from async
+# views; WSGI servers keep the sync views.
+ASYNC_READS = os.environ.get('ASYNC_READS') == '1'
+
+ROOT_URLCONF = 'app.urls_async' if ASYNC_READS else 'app.urls'
+
+# Threads running the ORM work of async reads.
+ASYNC_READ_THREADS = int(os.environ.get('ASYNC_READ_THREADS', 8))
 
 TEMPLATES = [
     {
@@ -79,16 +89,141 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections come from a per-process pool (core.backends.postgresql) and
+# go back to it at the end of each request. Set DB_POOL=0 to connect per
+# request, or to keep one connection per thread with DB_CONN_MAX_AGE.
+
 DATABASES = {
     'default': {
-        'ENGINE':'django.db.backends.postgresql',
+        'ENGINE':'core.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'POOL': {
+            'ENABLED': os.environ.get('DB_POOL', '1') == '1',
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 20)),
+            # Seconds to wait for a free connection.
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+            # Seconds before a connection is replaced.
+            'MAX_LIFETIME': float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)),
+            # Seconds unused before a connection above MIN_SIZE is closed.
+            'MAX_IDLE': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+            # Seconds unused before a connection is checked on checkout.
+            'HEALTH_CHECK_INTERVAL': float(
+                os.environ.get('DB_POOL_HEALTH_CHECK_INTERVAL', 30)
+            ),
+        },
     }
 }
 
+# Read replicas of the primary, as comma separated hosts sharing its name
+# and credentials. Safe requests on the recipe, tag and user views read from
+# one of them (see core.routers).
+DATABASE_REPLICAS = []
+_replica_hosts = os.environ.get('DB_REPLICA_HOSTS', '')
+for _index, _host in enumerate(filter(None, _replica_hosts.split(',')), 1):
+    DATABASES[f'replica_{_index}'] = dict(
+        DATABASES['default'],
+        HOST=_host.strip(),
+        TEST={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(f'replica_{_index}')
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Seconds a user reads from the primary after writing, to cover replica lag.
+REPLICA_PIN_SECONDS = float(os.environ.get('DB_REPLICA_PIN_SECONDS', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Swap the 'recipe' backend (e.g. for Redis or Memcached) to share cached
+# responses between workers; local memory evicts least recently used keys.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'recipe': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recipe-responses',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth-tokens',
+        'TIMEOUT': 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+RECIPE_CACHE_ALIAS = 'recipe'
+
+AUTH_TOKEN_CACHE_ALIAS = 'auth'
+
+# Maximum number of recipes accepted by one bulk create/update request.
+RECIPE_BULK_MAX_ITEMS = int(os.environ.get('RECIPE_BULK_MAX_ITEMS', 1000))
+
+
+# Metrics
+# With METRICS_DIR set (e.g. a tmpfs shared by gunicorn workers), each
+# worker writes its totals there and /api/metrics sums them.
+
+METRICS_DIR = os.environ.get('METRICS_DIR')
+
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+
+# Addresses allowed to scrape /api/metrics without a staff login.
+METRICS_ALLOWED_IPS = [
+    ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip
+]
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+# PASSWORD_HASHER ('argon2', 'bcrypt' or 'pbkdf2') hashes new passwords;
+# the others still verify older hashes, which are rehashed on the next
+# successful login. Costs can be tuned with the bench_auth command.
+
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'argon2')
+
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+
+# In KiB. The defaults follow the OWASP minimum for Argon2id (19 MiB, two
+# passes, one lane), several times cheaper than PBKDF2 at 260000 rounds.
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 19456)
+)
+
+PASSWORD_ARGON2_PARALLELISM = int(
+    os.environ.get('PASSWORD_ARGON2_PARALLELISM', 1)
+)
+
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12))
+
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 260000)
+)
+
+_PASSWORD_HASHERS = {
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    'bcrypt': 'core.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+}
+
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items()
+    if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -128,6 +263,30 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+MEDIA_URL = '/static/media/'
+
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', '/vol/web/media')
+
+# Recipe images
+# Uploads stream to a temporary file and are rejected over
+# RECIPE_IMAGE_MAX_BYTES. Their resized variants are rendered by a pool of
+# RECIPE_IMAGE_WORKERS processes per web worker; uploads get a 503 while
+# RECIPE_IMAGE_MAX_PENDING renders are queued or running.
+
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.environ.get('RECIPE_IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+)
+
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 40000000)
+)
+
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+
+RECIPE_IMAGE_MAX_PENDING = int(
+    os.environ.get('RECIPE_IMAGE_MAX_PENDING', 64)
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -135,6 +294,33 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+# JSON implementation of the APIs: 'orjson', or 'stdlib' for DRF's own.
+API_JSON = os.environ.get('API_JSON', 'orjson')
+
+_API_JSON = {
+    'orjson': (
+        'core.renderers.FastJSONRenderer',
+        'core.parsers.FastJSONParser',
+    ),
+    'stdlib': (
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.parsers.JSONParser',
+    ),
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS':'drf_spectacular.openapi.AutoSchema',
+    # MessagePack is negotiated with Accept and Content-Type:
+    # application/msgpack.
+    'DEFAULT_RENDERER_CLASSES': [
+        _API_JSON[API_JSON][0],
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'core.renderers.MessagePackRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        _API_JSON[API_JSON][1],
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'core.parsers.MessagePackParser',
+    ],
 }
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""
+URL configuration for ASGI servers.
+
+The same routes as app.urls, with the recipe and tag reads served by the
+async views in recipe.async_views.
+"""
+from django.urls import include, path
+
+from app.urls import urlpatterns as sync_urlpatterns
+from recipe.async_views import async_reads
+from recipe.urls import app_name, router
+
+
+urlpatterns = [
+    path('api/recipe/', include((async_reads(router.urls), app_name)))
+    if getattr(pattern, 'app_name', None) == app_name
+    else pattern
+    for pattern in sync_urlpatterns
+]
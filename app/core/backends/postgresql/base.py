@@ -0,0 +1,76 @@
+"""
+PostgreSQL backend drawing connections from a per-process pool.
+
+Enabled by the POOL options of a database (see settings.DATABASES). With
+CONN_MAX_AGE=0, Django closes the connection at the end of each request,
+which returns it to the pool instead.
+"""
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base, creation
+
+from core.backends.postgresql.pool import close_pools, get_pool
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Close pooled connections before dropping a test database."""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL database wrapper with pooled connections."""
+    creation_class = DatabaseCreation
+
+    def _pool(self, conn_params):
+        """Return the pool for conn_params, or None if pooling is off."""
+        options = self.settings_dict.get('POOL') or {}
+        if not options.get('ENABLED') or self.alias == NO_DB_ALIAS:
+            return None
+
+        return get_pool(self.alias, conn_params, {
+            'min_size': options.get('MIN_SIZE', 2),
+            'max_size': options.get('MAX_SIZE', 20),
+            'timeout': options.get('TIMEOUT', 5.0),
+            'max_lifetime': options.get('MAX_LIFETIME', 1800.0),
+            'max_idle': options.get('MAX_IDLE', 300.0),
+            'health_check_interval': options.get(
+                'HEALTH_CHECK_INTERVAL', 30.0,
+            ),
+        })
+
+    def get_new_connection(self, conn_params):
+        pool = self._pool(conn_params)
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        def connect():
+            return super(DatabaseWrapper, self).get_new_connection(
+                conn_params,
+            )
+
+        connection = pool.getconn(connect)
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level',
+            connection.isolation_level,
+        )
+        return connection
+
+    def warm_pool(self):
+        """Open the pool's minimum connections, if pooling is on."""
+        pool = self._pool(self.get_connection_params())
+        if pool is not None:
+            pool.warm(
+                lambda: super(DatabaseWrapper, self).get_new_connection(
+                    self.get_connection_params(),
+                ),
+            )
+
+    def _close(self):
+        pool = self._pool(self.get_connection_params())
+        if pool is None or self.connection is None:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
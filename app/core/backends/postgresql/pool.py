@@ -0,0 +1,220 @@
+"""
+A thread-safe pool of psycopg2 connections.
+"""
+import collections
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """No connection became available before the checkout timeout."""
+
+
+# Counters reported per pool, in order. See ConnectionPool.stats().
+STATS = (
+    'in_use', 'idle', 'waiting', 'max_size',
+    'checkouts', 'waits', 'wait_seconds', 'timeouts', 'recycled',
+)
+
+
+class ConnectionPool:
+    """Keep between min_size and max_size connections open for reuse.
+
+    Checkouts wait up to timeout seconds for a free connection. Connections
+    are replaced once older than max_lifetime, closed after max_idle
+    seconds unused (down to min_size), and checked with a query when idle
+    for longer than health_check_interval.
+    """
+
+    def __init__(self, min_size=2, max_size=20, timeout=5.0,
+                 max_lifetime=1800.0, max_idle=300.0,
+                 health_check_interval=30.0):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+        self._cond = threading.Condition()
+        # (connection, returned at), most recently returned last.
+        self._idle = collections.deque()
+        self._opened_at = {}
+        self._size = 0
+        self._waiting = 0
+        self._counters = dict.fromkeys(STATS[4:], 0)
+
+    def getconn(self, connect):
+        """Return a pooled connection, opening one with connect() if needed.
+
+        Raise PoolTimeout if the pool stays exhausted for timeout seconds.
+        """
+        with self._cond:
+            self._counters['checkouts'] += 1
+            if not self._idle and self._size >= self.max_size:
+                self._wait()
+            if self._idle:
+                conn, returned_at = self._idle.pop()
+            else:
+                conn = None
+                self._size += 1
+
+        if conn is None:
+            return self._open(connect)
+        if self._usable(conn, returned_at):
+            return conn
+        with self._cond:
+            self._counters['recycled'] += 1
+        self._close(conn, release=False)
+        return self._open(connect)
+
+    def _wait(self):
+        """Wait, holding the lock, for a connection to be returned."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        self._counters['waits'] += 1
+        self._waiting += 1
+        try:
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    raise PoolTimeout(
+                        f'No database connection available within '
+                        f'{self.timeout}s ({self.max_size} in use).'
+                    )
+                self._cond.wait(remaining)
+        finally:
+            self._waiting -= 1
+            self._counters['wait_seconds'] += time.monotonic() - start
+
+    def _open(self, connect):
+        """Open a connection in a slot already counted in the size."""
+        try:
+            conn = connect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        self._opened_at[conn] = time.monotonic()
+        return conn
+
+    def putconn(self, conn):
+        """Return a connection to the pool."""
+        if not conn.closed:
+            status = conn.info.transaction_status
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass
+        if conn.closed or (
+            conn.info.transaction_status
+            != extensions.TRANSACTION_STATUS_IDLE
+        ):
+            self._close(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        self._reap()
+
+    def warm(self, connect):
+        """Open connections until min_size are open."""
+        with self._cond:
+            missing = max(self.min_size - self._size, 0)
+            self._size += missing
+        for _ in range(missing):
+            conn = self._open(connect)
+            with self._cond:
+                self._idle.appendleft((conn, time.monotonic()))
+                self._cond.notify()
+
+    def close(self):
+        """Close every idle connection."""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self._close(conn)
+
+    def stats(self):
+        """Return the counters named in STATS."""
+        with self._cond:
+            return {
+                'in_use': self._size - len(self._idle),
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'max_size': self.max_size,
+                **self._counters,
+            }
+
+    def _usable(self, conn, returned_at):
+        now = time.monotonic()
+        if conn.closed or now - self._opened_at[conn] > self.max_lifetime:
+            return False
+        if now - returned_at > self.health_check_interval:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _reap(self):
+        """Close connections idle for longer than max_idle."""
+        expired = []
+        with self._cond:
+            limit = time.monotonic() - self.max_idle
+            while (
+                self._idle
+                and self._idle[0][1] < limit
+                and self._size - len(expired) > self.min_size
+            ):
+                expired.append(self._idle.popleft()[0])
+        for conn in expired:
+            self._close(conn)
+
+    def _close(self, conn, release=True):
+        """Close conn, freeing its slot unless release is False."""
+        self._opened_at.pop(conn, None)
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        if release:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+
+
+# Pools by alias and connection parameters, shared by the threads of the
+# process.
+pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, conn_params, options):
+    """Return the pool for alias and conn_params, creating it if needed."""
+    key = (alias, tuple(sorted(conn_params.items())))
+    with _pools_lock:
+        pool = pools.get(key)
+        if pool is None:
+            pool = pools[key] = ConnectionPool(**options)
+
+    return pool
+
+
+def close_pools(dbname):
+    """Close the idle connections of every pool for database dbname."""
+    with _pools_lock:
+        matching = [
+            pool for (_, params), pool in pools.items()
+            if dict(params).get('database') == dbname
+        ]
+    for pool in matching:
+        pool.close()
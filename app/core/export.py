@@ -0,0 +1,103 @@
+"""
+Streaming export of a user's recipes.
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import prefetch_related_objects
+
+from core.models import Recipe
+
+
+EXPORT_FIELDS = [
+    'id',
+    'title',
+    'description',
+    'time_minutes',
+    'price',
+    'link',
+    'tags',
+    'ingredients',
+]
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def iter_recipes(user, chunk_size=1000):
+    """Yield a dict per recipe of user, including tag/ingredient names.
+
+    Recipes are read through a server-side cursor and their relations are
+    prefetched one chunk at a time, so memory use does not depend on the
+    number of recipes.
+    """
+    recipes = (
+        Recipe.objects.filter(user=user)
+        .defer('search_vector', 'updated_at')
+        .order_by('id')
+        .iterator(chunk_size=chunk_size)
+    )
+    chunk = []
+    for recipe in recipes:
+        chunk.append(recipe)
+        if len(chunk) == chunk_size:
+            yield from _export_chunk(chunk)
+            chunk = []
+    yield from _export_chunk(chunk)
+
+
+def _export_chunk(chunk):
+    prefetch_related_objects(chunk, 'tags', 'ingredients')
+    for recipe in chunk:
+        yield {
+            'id': recipe.id,
+            'title': recipe.title,
+            'description': recipe.description,
+            'time_minutes': recipe.time_minutes,
+            'price': recipe.price,
+            'link': recipe.link,
+            'tags': [tag.name for tag in recipe.tags.all()],
+            'ingredients': [
+                ingredient.name for ingredient in recipe.ingredients.all()
+            ],
+        }
+
+
+def ndjson_lines(rows):
+    """Yield one JSON document per row."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+class _Echo:
+    """File-like object returning what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    """Yield a CSV header and one line per row.
+
+    Tag and ingredient names are joined with '|'.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row['tags'] = '|'.join(row['tags'])
+        row['ingredients'] = '|'.join(row['ingredients'])
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def export_lines(user, export_format='ndjson', chunk_size=1000):
+    """Yield the lines of a user's export in the given format."""
+    if export_format not in CONTENT_TYPES:
+        raise ValueError(f'Unknown export format: {export_format}')
+    rows = iter_recipes(user, chunk_size=chunk_size)
+    if export_format == 'csv':
+        return csv_lines(rows)
+
+    return ndjson_lines(rows)
@@ -0,0 +1,99 @@
+"""
+Readiness checks behind /readyz.
+
+Probes are unauthenticated, so failures are reported as short labels and
+their details only logged.
+"""
+import logging
+
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+logger = logging.getLogger(__name__)
+
+# Aliases whose migrations were found applied. Migrations are not rolled
+# back under a running process, so each alias is only checked until then.
+_migrated = set()
+
+
+def check_databases():
+    """Return an error for each database alias that cannot be queried.
+
+    Pooled connections are opened up to their minimum on the way.
+    """
+    errors = {}
+    for alias in connections:
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if hasattr(connection, 'warm_pool'):
+                connection.warm_pool()
+        except DatabaseError:
+            logger.warning('Database %s is not ready', alias, exc_info=True)
+            errors[alias] = 'unavailable'
+
+    return errors
+
+
+def check_migrations():
+    """Return an error for each database alias with unapplied migrations."""
+    errors = {}
+    for alias in connections:
+        if alias in _migrated:
+            continue
+        try:
+            executor = MigrationExecutor(connections[alias])
+            plan = executor.migration_plan(
+                executor.loader.graph.leaf_nodes(),
+            )
+        except DatabaseError:
+            logger.warning(
+                'Migrations of database %s could not be checked',
+                alias,
+                exc_info=True,
+            )
+            errors[alias] = 'unavailable'
+            continue
+        if plan:
+            errors[alias] = f'{len(plan)} unapplied migrations'
+        else:
+            _migrated.add(alias)
+
+    return errors
+
+
+def check_caches_reachable():
+    """Return an error for each cache alias that cannot be read.
+
+    Only shows the cache answers, not that it holds any entries.
+    """
+    errors = {}
+    for alias in caches:
+        try:
+            caches[alias].get('readyz')
+        except Exception:
+            logger.warning('Cache %s is unreachable', alias, exc_info=True)
+            errors[alias] = 'unreachable'
+
+    return errors
+
+
+CHECKS = {
+    'database': check_databases,
+    'migrations': check_migrations,
+    'caches_reachable': check_caches_reachable,
+}
+
+
+def readiness():
+    """Return (ready, {check: 'ok' or its errors})."""
+    results = {}
+    for name, check in CHECKS.items():
+        errors = check()
+        results[name] = errors or 'ok'
+
+    ready = all(result == 'ok' for result in results.values())
+    return ready, results
@@ -0,0 +1,479 @@
+"""
+Django command to benchmark the recipe and user APIs on a seeded dataset.
+"""
+import io
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from decimal import Decimal
+
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import (
+    Ingredient,
+    Recipe,
+    Tag,
+)
+from recipe.cache import get_cache
+
+
+BENCH_DOMAIN = 'bench.invalid'
+BENCH_PASSWORD = 'benchpass123'
+
+
+def seed(users, recipes, tags, ingredients, per_recipe=3):
+    """Create users x recipes x tags/ingredients with bulk inserts.
+
+    Return the created users. Every recipe is linked to per_recipe of its
+    user's tags and ingredients.
+    """
+    User = get_user_model()
+    password = make_password(BENCH_PASSWORD)
+    created = User.objects.bulk_create([
+        User(email=f'user{i}@{BENCH_DOMAIN}', name=f'User {i}',
+             password=password)
+        for i in range(users)
+    ])
+    Token.objects.bulk_create([
+        Token(user=user, key=Token.generate_key()) for user in created
+    ])
+    RecipeTag = Recipe.tags.through
+    RecipeIngredient = Recipe.ingredients.through
+    for user in created:
+        user_tags = Tag.objects.bulk_create([
+            Tag(user=user, name=f'Tag {i}') for i in range(tags)
+        ])
+        user_ingredients = Ingredient.objects.bulk_create([
+            Ingredient(user=user, name=f'Ingredient {i}')
+            for i in range(ingredients)
+        ])
+        user_recipes = Recipe.objects.bulk_create(
+            [
+                Recipe(
+                    user=user,
+                    title=f'Recipe {i}',
+                    description=f'Benchmark recipe number {i}.',
+                    time_minutes=5 + i % 120,
+                    price=Decimal(i % 10000) / 100,
+                )
+                for i in range(recipes)
+            ],
+            batch_size=1000,
+        )
+        RecipeTag.objects.bulk_create(
+            [
+                RecipeTag(recipe_id=recipe.id, tag_id=tag.id)
+                for i, recipe in enumerate(user_recipes)
+                for tag in _pick(user_tags, i, per_recipe)
+            ],
+            batch_size=5000,
+        )
+        Tag.objects.filter(user=user).recount()
+        RecipeIngredient.objects.bulk_create(
+            [
+                RecipeIngredient(
+                    recipe_id=recipe.id,
+                    ingredient_id=ingredient.id,
+                )
+                for i, recipe in enumerate(user_recipes)
+                for ingredient in _pick(user_ingredients, i, per_recipe)
+            ],
+            batch_size=5000,
+        )
+
+    return created
+
+
+def _pick(objs, start, count):
+    """Return count distinct objs starting at start, wrapping around."""
+    if not objs:
+        return []
+    count = min(count, len(objs))
+    return [objs[(start + j) % len(objs)] for j in range(count)]
+
+
+def clear_seed():
+    """Delete every benchmark user and their data, uploads included."""
+    users = get_user_model().objects.filter(
+        email__endswith=f'@{BENCH_DOMAIN}',
+    )
+    storage = Recipe._meta.get_field('image').storage
+    recipes = Recipe.objects.filter(user__in=users).exclude(
+        image__isnull=True,
+    ).exclude(image='')
+    for recipe in recipes.only('image', 'image_variants'):
+        for name in [recipe.image.name, *recipe.image_variants.values()]:
+            storage.delete(name)
+    users.delete()
+
+
+def bench_image():
+    """Return a small JPEG upload."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64)).save(buffer, format='JPEG')
+
+    return SimpleUploadedFile('bench.jpg', buffer.getvalue(), 'image/jpeg')
+
+
+def has_files(payload):
+    """Return True if payload must be sent as multipart/form-data."""
+    return isinstance(payload, dict) and any(
+        isinstance(value, File) for value in payload.values()
+    )
+
+
+def percentile(samples, pct):
+    """Return the pct percentile of samples."""
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def scenarios(user):
+    """Return (name, method, path, payload) factories for every endpoint.
+
+    Each factory is called with the iteration number so writes never
+    collide.
+    """
+    recipe_ids = list(
+        Recipe.objects.filter(user=user).values_list('id', flat=True)[:100]
+    )
+    tag_ids = list(Tag.objects.filter(user=user).values_list('id', flat=True))
+    ingredient_ids = list(
+        Ingredient.objects.filter(user=user).values_list('id', flat=True)
+    )
+    recipe_id = recipe_ids[0]
+
+    def recipe_payload(n):
+        return {
+            'title': f'Bench recipe {n}',
+            'time_minutes': 10,
+            'price': '4.50',
+            'tags': [{'name': 'Tag 0'}, {'name': f'Bench tag {n}'}],
+        }
+
+    def created_recipe(n):
+        recipe = Recipe.objects.create(
+            user=user,
+            title=f'Delete me {n}',
+            time_minutes=1,
+            price=Decimal('1.00'),
+        )
+        return reverse('recipe:recipe-detail', args=[recipe.id])
+
+    def created_tag(n):
+        tag = Tag.objects.create(user=user, name=f'Delete me {n}')
+        return reverse('recipe:tag-detail', args=[tag.id])
+
+    def created_ingredient(n):
+        ingredient = Ingredient.objects.create(
+            user=user,
+            name=f'Delete me {n}',
+        )
+        return reverse('recipe:ingredient-detail', args=[ingredient.id])
+
+    return [
+        ('recipe:api-root GET', 'get',
+         lambda n: reverse('recipe:api-root'), None),
+        ('recipe:recipe-list GET', 'get',
+         lambda n: reverse('recipe:recipe-list'), None),
+        ('recipe:recipe-list GET search', 'get',
+         lambda n: reverse('recipe:recipe-list') + '?search=recipe', None),
+        ('recipe:recipe-list GET tags', 'get',
+         lambda n: reverse('recipe:recipe-list') + '?tags=' + ','.join(
+             str(pk) for pk in tag_ids[:2]), None),
+        ('recipe:recipe-list POST', 'post',
+         lambda n: reverse('recipe:recipe-list'), recipe_payload),
+        ('recipe:recipe-detail GET', 'get',
+         lambda n: reverse('recipe:recipe-detail',
+                           args=[recipe_ids[n % len(recipe_ids)]]), None),
+        ('recipe:recipe-detail PATCH', 'patch',
+         lambda n: reverse('recipe:recipe-detail', args=[recipe_id]),
+         lambda n: {'title': f'Patched {n}'}),
+        ('recipe:recipe-detail PUT', 'put',
+         lambda n: reverse('recipe:recipe-detail', args=[recipe_id]),
+         recipe_payload),
+        ('recipe:recipe-detail DELETE', 'delete', created_recipe, None),
+        ('recipe:recipe-upload-image POST', 'post',
+         lambda n: reverse('recipe:recipe-upload-image', args=[recipe_id]),
+         lambda n: {'image': bench_image()}),
+        ('recipe:recipe-bulk POST', 'post',
+         lambda n: reverse('recipe:recipe-bulk'),
+         lambda n: [recipe_payload(f'{n}-{i}') for i in range(10)]),
+        ('recipe:recipe-export GET', 'get',
+         lambda n: reverse('recipe:recipe-export'), None),
+        ('recipe:tag-list GET', 'get',
+         lambda n: reverse('recipe:tag-list'), None),
+        ('recipe:tag-list GET counts', 'get',
+         lambda n: reverse('recipe:tag-list')
+         + '?with_counts=1&assigned_only=1', None),
+        ('recipe:tag-autocomplete GET', 'get',
+         lambda n: reverse('recipe:tag-autocomplete') + '?q=ta', None),
+        ('recipe:ingredient-autocomplete GET', 'get',
+         lambda n: reverse('recipe:ingredient-autocomplete')
+         + '?q=ingredent 1', None),
+        ('recipe:tag-detail PATCH', 'patch',
+         lambda n: reverse('recipe:tag-detail', args=[tag_ids[0]]),
+         lambda n: {'name': f'Tag 0 {n}'}),
+        ('recipe:tag-detail DELETE', 'delete', created_tag, None),
+        ('recipe:ingredient-list GET', 'get',
+         lambda n: reverse('recipe:ingredient-list'), None),
+        ('recipe:ingredient-detail PATCH', 'patch',
+         lambda n: reverse('recipe:ingredient-detail',
+                           args=[ingredient_ids[0]]),
+         lambda n: {'name': f'Ingredient 0 {n}'}),
+        ('recipe:ingredient-detail DELETE', 'delete', created_ingredient,
+         None),
+        ('user:create POST', 'post',
+         lambda n: reverse('user:create'),
+         lambda n: {'email': f'new{n}-{time.time_ns()}@{BENCH_DOMAIN}',
+                    'password': BENCH_PASSWORD, 'name': 'New'}),
+        ('user:token POST', 'post',
+         lambda n: reverse('user:token'),
+         lambda n: {'email': user.email, 'password': BENCH_PASSWORD}),
+        ('user:me GET', 'get', lambda n: reverse('user:me'), None),
+        ('user:me PATCH', 'patch',
+         lambda n: reverse('user:me'), lambda n: {'name': f'User {n}'}),
+        ('user:me PUT', 'put',
+         lambda n: reverse('user:me'),
+         lambda n: {'email': user.email, 'password': BENCH_PASSWORD,
+                    'name': f'User {n}'}),
+    ]
+
+
+class TestClientDriver:
+    """Send requests in-process through the DRF test client."""
+    counts_queries = True
+
+    def __init__(self, token):
+        self.client = APIClient(HTTP_HOST=request_host())
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def request(self, method, path, payload):
+        """Return (status, bytes, queries) for one request."""
+        data_format = 'multipart' if has_files(payload) else 'json'
+        with CaptureQueriesContext(connection) as queries:
+            res = getattr(self.client, method)(
+                path,
+                payload,
+                format=data_format,
+            )
+            if res.streaming:
+                size = sum(len(chunk) for chunk in res.streaming_content)
+            else:
+                size = len(res.content)
+
+        return res.status_code, size, len(queries)
+
+
+class LiveServerDriver:
+    """Send requests over HTTP to a running server."""
+    counts_queries = False
+
+    def __init__(self, token, base_url):
+        self.token = token
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, payload):
+        """Return (status, bytes, None) for one request."""
+        if has_files(payload):
+            data = encode_multipart(BOUNDARY, payload)
+            content_type = MULTIPART_CONTENT
+        else:
+            data = None if payload is None else json.dumps(payload).encode()
+            content_type = 'application/json'
+        req = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            method=method.upper(),
+            headers={
+                'Authorization': f'Token {self.token}',
+                'Content-Type': content_type,
+            },
+        )
+        try:
+            with urllib.request.urlopen(req) as res:
+                return res.status, len(res.read()), None
+        except urllib.error.HTTPError as exc:
+            return exc.code, len(exc.read()), None
+
+
+def request_host():
+    """Return a host name the in-process requests are allowed to use."""
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+
+    return 'localhost'
+
+
+def compare(results, baseline, threshold):
+    """Return regressions of results against baseline.
+
+    An endpoint regresses when its p95 latency grows by more than
+    threshold (a fraction) or it issues more queries per request.
+    """
+    regressions = []
+    for name, current in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None:
+            continue
+        limit = previous['p95_ms'] * (1 + threshold)
+        if current['p95_ms'] > limit:
+            regressions.append(
+                f"{name}: p95 {current['p95_ms']:.2f}ms > {limit:.2f}ms"
+            )
+        if (
+            current['queries'] is not None
+            and previous['queries'] is not None
+            and current['queries'] > previous['queries']
+        ):
+            regressions.append(
+                f"{name}: {current['queries']} queries > "
+                f"{previous['queries']}"
+            )
+
+    return regressions
+
+
+class Command(BaseCommand):
+    """Django command to benchmark every recipe and user endpoint."""
+    help = (
+        'Seed a benchmark dataset, drive every recipe and user endpoint '
+        'and report latency percentiles, queries and bytes per request.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--tags', type=int, default=20)
+        parser.add_argument('--ingredients', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Measured requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--cold', action='store_true',
+                            help='Clear the response cache before requests.')
+        parser.add_argument('--base-url',
+                            help='Benchmark a running server instead of '
+                                 'the in-process test client.')
+        parser.add_argument('--output', help='Write results as JSON here.')
+        parser.add_argument('--baseline',
+                            help='JSON results of an earlier run to compare.')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed fractional p95 regression.')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the seeded data afterwards.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        clear_seed()
+        started = time.monotonic()
+        users = seed(
+            options['users'],
+            max(options['recipes'], 1),
+            max(options['tags'], 1),
+            max(options['ingredients'], 1),
+        )
+        self.stdout.write(
+            f'Seeded {len(users)} users x {options["recipes"]} recipes in '
+            f'{time.monotonic() - started:.1f}s'
+        )
+        try:
+            results = self._run(users[0], options)
+        finally:
+            if not options['keep']:
+                clear_seed()
+
+        self._report(results)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                regressions = compare(
+                    results,
+                    json.load(f),
+                    options['threshold'],
+                )
+            if regressions:
+                raise CommandError(
+                    'Performance regressions:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('No regressions'))
+
+    def _run(self, user, options):
+        token = Token.objects.get(user=user).key
+        if options['base_url']:
+            driver = LiveServerDriver(token, options['base_url'])
+        else:
+            driver = TestClientDriver(token)
+
+        endpoints = {}
+        for name, method, path, payload in scenarios(user):
+            timings, queries, sizes = [], [], []
+            total = options['warmup'] + options['requests']
+            for n in range(total):
+                if options['cold']:
+                    get_cache().clear()
+                url = path(n)
+                data = payload(n) if payload else None
+                begin = time.perf_counter()
+                status, size, num_queries = driver.request(method, url, data)
+                elapsed = (time.perf_counter() - begin) * 1000
+                if status >= 400:
+                    raise CommandError(f'{name} returned {status}')
+                if n >= options['warmup']:
+                    timings.append(elapsed)
+                    queries.append(num_queries)
+                    sizes.append(size)
+            endpoints[name] = {
+                'requests': len(timings),
+                'p50_ms': percentile(timings, 50),
+                'p95_ms': percentile(timings, 95),
+                'p99_ms': percentile(timings, 99),
+                'queries': (
+                    statistics.mean(queries) if driver.counts_queries
+                    else None
+                ),
+                'bytes': statistics.mean(sizes),
+            }
+
+        return {
+            'dataset': {
+                'users': options['users'],
+                'recipes': options['recipes'],
+                'tags': options['tags'],
+                'ingredients': options['ingredients'],
+                'cold': options['cold'],
+            },
+            'endpoints': endpoints,
+        }
+
+    def _report(self, results):
+        self.stdout.write(
+            f"{'endpoint':<36}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'queries':>9}{'bytes':>10}"
+        )
+        for name, row in results['endpoints'].items():
+            queries = row['queries']
+            queries = '-' if queries is None else f'{queries:.1f}'
+            self.stdout.write(
+                f"{name:<36}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+                f"{row['p99_ms']:>9.2f}{queries:>9}{row['bytes']:>10.0f}"
+            )
@@ -0,0 +1,172 @@
+"""
+Django command to compare the WSGI and ASGI read paths with slow clients.
+"""
+import asyncio
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.management.commands.bench_api import (
+    clear_seed,
+    request_host,
+    seed,
+)
+
+
+def wsgi_environ(path, token):
+    """Return a WSGI environ for an authenticated GET of path."""
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': request_host(),
+        'SERVER_PORT': '80',
+        'HTTP_HOST': request_host(),
+        'HTTP_AUTHORIZATION': f'Token {token}',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.url_scheme': 'http',
+        'wsgi.errors': io.StringIO(),
+    }
+
+
+def asgi_scope(path, token):
+    """Return an ASGI scope for an authenticated GET of path."""
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': b'',
+        'headers': [
+            (b'host', request_host().encode()),
+            (b'authorization', f'Token {token}'.encode()),
+        ],
+        'server': ('127.0.0.1', 80),
+        'client': ('127.0.0.1', 50000),
+    }
+
+
+class Command(BaseCommand):
+    """Django command to benchmark concurrent reads from slow clients."""
+    help = (
+        'Serve the recipe list to concurrent slow clients through the WSGI '
+        'handler with a fixed number of threads and through the ASGI '
+        'handler with async reads, reporting throughput and latency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100)
+        parser.add_argument('--clients', type=int, default=64,
+                            help='Concurrent clients.')
+        parser.add_argument('--requests', type=int, default=256,
+                            help='Requests in total.')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='WSGI worker threads.')
+        parser.add_argument('--client-kbps', type=float, default=256,
+                            help='Download speed of each client in KiB/s.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        clear_seed()
+        try:
+            user, = seed(1, options['recipes'], 5, 0)
+            token = Token.objects.get(user=user).key
+            path = reverse('recipe:recipe-list')
+            bandwidth = options['client_kbps'] * 1024
+            results = [
+                ('wsgi', self._wsgi(path, token, bandwidth, options)),
+                ('asgi', self._asgi(path, token, bandwidth, options)),
+            ]
+        finally:
+            clear_seed()
+
+        self.stdout.write(
+            f"{'server':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        )
+        for name, (rate, latencies) in results:
+            p50, p95 = (
+                statistics.quantiles(latencies, n=100)[pct - 1]
+                for pct in (50, 95)
+            )
+            self.stdout.write(
+                f'{name:<8}{rate:>10.1f}{p50:>10.1f}{p95:>10.1f}'
+            )
+
+    def _wsgi(self, path, token, bandwidth, options):
+        """Return (requests/s, latencies) for the WSGI handler.
+
+        Each thread stays busy until its slow client has read the body.
+        """
+        handler = WSGIHandler()
+
+        def start_response(status, headers, exc_info=None):
+            if not status.startswith('200'):
+                raise CommandError(f'WSGI request returned {status}')
+
+        def request(queued):
+            body = handler(wsgi_environ(path, token), start_response)
+            try:
+                for chunk in body:
+                    time.sleep(len(chunk) / bandwidth)
+            finally:
+                body.close()
+            return (time.perf_counter() - queued) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['threads']) as pool:
+            latencies = list(pool.map(
+                request,
+                [time.perf_counter()] * options['requests'],
+            ))
+
+        return options['requests'] / (time.perf_counter() - start), latencies
+
+    def _asgi(self, path, token, bandwidth, options):
+        """Return (requests/s, latencies) for the ASGI handler.
+
+        A slow client only delays the coroutine sending its body.
+        """
+        with override_settings(ROOT_URLCONF='app.urls_async'):
+            handler = ASGIHandler()
+            start = time.perf_counter()
+            latencies = asyncio.run(
+                self._asgi_requests(handler, path, token, bandwidth, options)
+            )
+
+        return options['requests'] / (time.perf_counter() - start), latencies
+
+    async def _asgi_requests(self, handler, path, token, bandwidth, options):
+        clients = asyncio.Semaphore(options['clients'])
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                if message['status'] != 200:
+                    raise CommandError(
+                        f"ASGI request returned {message['status']}"
+                    )
+            else:
+                await asyncio.sleep(len(message.get('body', b'')) / bandwidth)
+
+        async def request():
+            queued = time.perf_counter()
+            async with clients:
+                await handler(asgi_scope(path, token), receive, send)
+            return (time.perf_counter() - queued) * 1000
+
+        return await asyncio.gather(
+            *(request() for _ in range(options['requests']))
+        )
@@ -0,0 +1,127 @@
+"""
+Django command to measure signup and login throughput per password hasher.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.management.commands.bench_api import (
+    BENCH_DOMAIN,
+    BENCH_PASSWORD,
+    clear_seed,
+    request_host,
+)
+
+
+# Parameters accepted per hasher, mapped to the settings they override.
+HASHER_PARAMS = {
+    'argon2': {
+        'time_cost': 'PASSWORD_ARGON2_TIME_COST',
+        'memory_cost': 'PASSWORD_ARGON2_MEMORY_COST',
+        'parallelism': 'PASSWORD_ARGON2_PARALLELISM',
+    },
+    'bcrypt': {
+        'rounds': 'PASSWORD_BCRYPT_ROUNDS',
+    },
+    'pbkdf2': {
+        'iterations': 'PASSWORD_PBKDF2_ITERATIONS',
+    },
+}
+
+HASHER_CLASSES = {
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    'bcrypt': 'core.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+}
+
+
+def parse_hasher(spec):
+    """Return (name, settings overrides) for 'name[:param=value,...]'."""
+    name, _, params = spec.partition(':')
+    if name not in HASHER_PARAMS:
+        raise CommandError(f'Unknown hasher {name!r}.')
+
+    overrides = {}
+    for param in filter(None, params.split(',')):
+        key, _, value = param.partition('=')
+        if key not in HASHER_PARAMS[name]:
+            raise CommandError(f'Unknown {name} parameter {key!r}.')
+        try:
+            overrides[HASHER_PARAMS[name][key]] = int(value)
+        except ValueError:
+            raise CommandError(f'Expected an integer for {key}.')
+
+    return name, overrides
+
+
+def hashers_preferring(name):
+    """Return PASSWORD_HASHERS with the hasher for name first."""
+    preferred = HASHER_CLASSES[name]
+    return [preferred] + [
+        hasher for hasher in settings.PASSWORD_HASHERS if hasher != preferred
+    ]
+
+
+class Command(BaseCommand):
+    """Django command to benchmark signup and login per hasher."""
+    help = (
+        'Time CreateUserView and CreateTokenView with each password hasher, '
+        'reporting requests per second on one core. Hashers are given as '
+        'name[:param=value,...], e.g. argon2:time_cost=3,memory_cost=65536.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'hashers',
+            nargs='*',
+            default=['pbkdf2', 'argon2', 'bcrypt'],
+        )
+        parser.add_argument('--requests', type=int, default=20)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        specs = [parse_hasher(spec) for spec in options['hashers']]
+        self.stdout.write(
+            f"{'hasher':<48}{'signup/s':>10}{'login/s':>10}"
+        )
+        try:
+            for spec, (name, overrides) in zip(options['hashers'], specs):
+                with override_settings(
+                    PASSWORD_HASHERS=hashers_preferring(name),
+                    **overrides,
+                ):
+                    signup, login = self._measure(name, options['requests'])
+                self.stdout.write(f'{spec:<48}{signup:>10.1f}{login:>10.1f}')
+        finally:
+            clear_seed()
+
+    def _measure(self, name, requests):
+        """Return (signups, logins) per second for the active hasher."""
+        client = APIClient(HTTP_HOST=request_host())
+        emails = [
+            f'{name}-{i}-{time.time_ns()}@{BENCH_DOMAIN}'
+            for i in range(requests)
+        ]
+
+        def run(url, email):
+            res = client.post(
+                url,
+                {'email': email, 'password': BENCH_PASSWORD, 'name': 'Bench'},
+                format='json',
+            )
+            if res.status_code >= 400:
+                raise CommandError(f'{url} returned {res.status_code}')
+
+        rates = []
+        for url in (reverse('user:create'), reverse('user:token')):
+            start = time.perf_counter()
+            for email in emails:
+                run(url, email)
+            rates.append(requests / (time.perf_counter() - start))
+
+        return tuple(rates)
@@ -0,0 +1,80 @@
+"""
+Django command to compare the recipe list serialization paths.
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.renderers import JSONRenderer
+
+from core.management.commands.bench_api import clear_seed, seed
+from core.models import Recipe
+from recipe.serializers import (
+    RecipeSerializer,
+    recipe_list_data,
+    recipe_list_values,
+    tags_prefetch,
+)
+
+
+def serializer_path(queryset):
+    """Render queryset through RecipeSerializer."""
+    queryset = queryset.prefetch_related(tags_prefetch())
+    return JSONRenderer().render(RecipeSerializer(queryset, many=True).data)
+
+
+def values_path(queryset):
+    """Render queryset through the values() rows."""
+    rows = list(recipe_list_values(queryset))
+    return JSONRenderer().render(recipe_list_data(rows))
+
+
+class Command(BaseCommand):
+    """Django command to benchmark recipe list serialization."""
+    help = (
+        'Time RecipeSerializer against the values() list path for a user '
+        'with each number of recipes, checking both render the same bytes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='1000,10000',
+            help='Comma separated recipe counts.',
+        )
+        parser.add_argument('--tags', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        try:
+            for size in sizes:
+                clear_seed()
+                user, = seed(1, size, options['tags'], 0)
+                self._compare(size, user, options['repeat'])
+        finally:
+            clear_seed()
+
+    def _compare(self, size, user, repeat):
+        queryset = Recipe.objects.filter(user=user).order_by('-id')
+        timings = {}
+        for name, path in (
+            ('serializer', serializer_path),
+            ('values', values_path),
+        ):
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                output = path(queryset)
+                samples.append((time.perf_counter() - start) * 1000)
+            timings[name] = (statistics.median(samples), output)
+
+        (slow, expected), (fast, output) = timings.values()
+        if output != expected:
+            raise CommandError(f'Output differs at {size} recipes')
+        self.stdout.write(
+            f'{size} recipes: serializer {slow:.1f}ms, values {fast:.1f}ms '
+            f'({slow / fast:.1f}x)'
+        )
@@ -0,0 +1,94 @@
+"""
+Django command to compare the API renderers.
+"""
+import io
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.management.commands.bench_api import clear_seed, seed
+from core.models import Recipe
+from core.parsers import FastJSONParser, MessagePackParser
+from core.renderers import FastJSONRenderer, MessagePackRenderer
+from recipe.serializers import (
+    RecipeSerializer,
+    recipe_list_data,
+    recipe_list_values,
+)
+
+
+# (name, renderer, parser), the first being the baseline.
+FORMATS = [
+    ('json', JSONRenderer, JSONParser),
+    ('orjson', FastJSONRenderer, FastJSONParser),
+    ('msgpack', MessagePackRenderer, MessagePackParser),
+]
+
+
+def _median_ms(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(samples), result
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the API renderers."""
+    help = (
+        'Compare bytes, encode and decode time of the JSON, orjson and '
+        'MessagePack renderers on recipe list data of each size, checking '
+        'every format decodes to the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='100,1000',
+            help='Comma separated recipe counts.',
+        )
+        parser.add_argument('--tags', type=int, default=20)
+        parser.add_argument('--ingredients', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        try:
+            for size in sizes:
+                clear_seed()
+                user, = seed(1, size, options['tags'], options['ingredients'])
+                queryset = Recipe.objects.filter(user=user).order_by('-id')
+                # Every field, ingredients included.
+                fields = RecipeSerializer.Meta.fields
+                data = recipe_list_data(
+                    list(recipe_list_values(queryset, fields)), fields,
+                )
+                self._compare(size, data, options['repeat'])
+        finally:
+            clear_seed()
+
+    def _compare(self, size, data, repeat):
+        expected = None
+        baseline = None
+        for name, renderer_class, parser_class in FORMATS:
+            renderer, parser = renderer_class(), parser_class()
+            encode, output = _median_ms(lambda: renderer.render(data), repeat)
+            decode, decoded = _median_ms(
+                lambda: parser.parse(io.BytesIO(output)), repeat,
+            )
+            if expected is None:
+                expected, baseline = decoded, len(output)
+            elif decoded != expected:
+                raise CommandError(f'{name} data differs at {size} recipes')
+            self.stdout.write(
+                f'{size} recipes {name}: {len(output)} bytes '
+                f'({len(output) / baseline:.2f}x), encode {encode:.2f}ms, '
+                f'decode {decode:.2f}ms'
+            )
@@ -0,0 +1,48 @@
+"""
+Django command to export a user's recipes as NDJSON or CSV.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export import (
+    CONTENT_TYPES,
+    export_lines,
+)
+
+
+class Command(BaseCommand):
+    """Django command to stream a user's recipes to a file or stdout."""
+    help = "Export a user's recipes with their tags and ingredients."
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the user to export.')
+        parser.add_argument(
+            '--format',
+            dest='export_format',
+            choices=sorted(CONTENT_TYPES),
+            default='ndjson',
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write to. Defaults to stdout.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['email']} does not exist.")
+
+        lines = export_lines(
+            user,
+            options['export_format'],
+            chunk_size=options['chunk_size'],
+        )
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
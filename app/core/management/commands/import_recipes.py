@@ -0,0 +1,305 @@
+"""
+Django command to bulk import recipes for a user with PostgreSQL COPY.
+"""
+import csv
+import io
+import itertools
+import json
+import os
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import ImportCheckpoint
+from recipe.cache import bump_version
+
+
+# Range of the integer time_minutes column.
+MIN_INTEGER = -2 ** 31
+MAX_INTEGER = 2 ** 31 - 1
+
+# Names are deduplicated per batch in memory, so each distinct tag or
+# ingredient name is staged once and recipes refer to it by number.
+STAGING_TABLES = """
+CREATE TEMP TABLE IF NOT EXISTS import_recipe (
+    record bigint PRIMARY KEY,
+    id bigint,
+    title varchar(255) NOT NULL,
+    description text NOT NULL,
+    time_minutes integer NOT NULL,
+    price numeric(5, 2) NOT NULL,
+    link varchar(255) NOT NULL
+);
+CREATE TEMP TABLE IF NOT EXISTS import_tag (
+    num integer PRIMARY KEY,
+    name varchar(255) NOT NULL
+);
+CREATE TEMP TABLE IF NOT EXISTS import_ingredient (
+    num integer PRIMARY KEY,
+    name varchar(255) NOT NULL
+);
+CREATE TEMP TABLE IF NOT EXISTS import_recipe_tag (
+    record bigint NOT NULL,
+    num integer NOT NULL
+);
+CREATE TEMP TABLE IF NOT EXISTS import_recipe_ingredient (
+    record bigint NOT NULL,
+    num integer NOT NULL
+);
+TRUNCATE import_recipe, import_tag, import_ingredient,
+    import_recipe_tag, import_recipe_ingredient;
+"""
+
+# Ids are drawn from the recipe sequence up front so the through rows can
+# be joined on the staging record number.
+MERGE_SQL = """
+UPDATE import_recipe
+SET id = nextval(pg_get_serial_sequence('core_recipe', 'id'));
+
+INSERT INTO core_recipe
+    (id, user_id, title, description, time_minutes, price, link, updated_at,
+     image_variants)
+SELECT id, %(user_id)s, title, description, time_minutes, price, link, now(),
+    '{}'
+FROM import_recipe;
+
+INSERT INTO core_tag (user_id, name, recipe_count, updated_at)
+SELECT %(user_id)s, name, 0, now() FROM import_tag
+ON CONFLICT (user_id, name) DO NOTHING;
+
+INSERT INTO core_ingredient (user_id, name)
+SELECT %(user_id)s, s.name FROM import_ingredient s
+WHERE NOT EXISTS (
+    SELECT 1 FROM core_ingredient i
+    WHERE i.user_id = %(user_id)s AND i.name = s.name
+);
+
+INSERT INTO core_recipe_tags (recipe_id, tag_id)
+SELECT r.id, t.id
+FROM import_recipe_tag rt
+JOIN import_recipe r ON r.record = rt.record
+JOIN import_tag s ON s.num = rt.num
+JOIN core_tag t ON t.user_id = %(user_id)s AND t.name = s.name
+ON CONFLICT DO NOTHING;
+
+UPDATE core_tag t
+SET recipe_count = (
+    SELECT count(*) FROM core_recipe_tags rt WHERE rt.tag_id = t.id
+), updated_at = now()
+WHERE t.user_id = %(user_id)s AND t.name IN (SELECT name FROM import_tag);
+
+INSERT INTO core_recipe_ingredients (recipe_id, ingredient_id)
+SELECT r.id, i.id
+FROM import_recipe_ingredient ri
+JOIN import_recipe r ON r.record = ri.record
+JOIN import_ingredient s ON s.num = ri.num
+JOIN core_ingredient i ON i.user_id = %(user_id)s AND i.name = s.name
+ON CONFLICT DO NOTHING;
+"""
+
+
+def read_records(lines, input_format):
+    """Yield a dict per input record, as written by export_recipes."""
+    if input_format == 'csv':
+        for row in csv.DictReader(lines):
+            for field in ('tags', 'ingredients'):
+                value = row.get(field) or ''
+                row[field] = value.split('|') if value else []
+            yield row
+    else:
+        for line in lines:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+
+
+def clean_record(record):
+    """Return a validated staging row for record, or None if invalid."""
+    try:
+        if record['title'] is None:
+            return None
+        title = _text(record['title']).strip()
+        time_minutes = int(record['time_minutes'])
+        price = Decimal(str(record['price'])).quantize(Decimal('0.01'))
+    except (KeyError, TypeError, ValueError, OverflowError,
+            InvalidOperation):
+        return None
+    if not price.is_finite() or abs(price) >= 1000:
+        return None
+    if not title or len(title) > 255:
+        return None
+    if not MIN_INTEGER <= time_minutes <= MAX_INTEGER:
+        return None
+
+    return {
+        'title': title,
+        'description': _text(record.get('description') or ''),
+        'time_minutes': time_minutes,
+        'price': price,
+        'link': _text(record.get('link') or '')[:255],
+        'tags': _names(record.get('tags')),
+        'ingredients': _names(record.get('ingredients')),
+    }
+
+
+def _text(value):
+    """Return value as text PostgreSQL accepts, without NUL characters."""
+    return str(value).replace('\x00', '')
+
+
+def _names(values):
+    """Return the distinct, non-empty names in values."""
+    names = (
+        _text(value).strip()[:255]
+        for value in values or []
+        if value is not None
+    )
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def _copy(cursor, table, columns, rows):
+    """Load rows into a staging table with COPY."""
+    buffer = io.StringIO()
+    csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f'COPY {table} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)',
+        buffer,
+    )
+
+
+class Command(BaseCommand):
+    """Django command to import recipes from NDJSON or CSV files."""
+    help = (
+        'Import recipes with their tags and ingredients for a user. '
+        'Progress is committed per batch, so an interrupted import resumes '
+        'where it stopped when run again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the owning user.')
+        parser.add_argument('path', help='NDJSON or CSV file to import.')
+        parser.add_argument(
+            '--format',
+            dest='input_format',
+            choices=['ndjson', 'csv'],
+            help='Input format. Defaults to the file extension.',
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore any saved progress and import from the start.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['email']} does not exist.")
+        path = os.path.abspath(options['path'])
+        input_format = options['input_format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson'
+        )
+        batch_size = options['batch_size']
+
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            user=user,
+            source=path,
+        )
+        if options['restart']:
+            checkpoint.records = 0
+        elif checkpoint.records:
+            self.stdout.write(f'Resuming after {checkpoint.records} records')
+
+        imported = skipped = 0
+        started = time.monotonic()
+        with open(path, newline='') as lines:
+            records = itertools.islice(
+                read_records(lines, input_format),
+                checkpoint.records,
+                None,
+            )
+            while True:
+                batch = list(itertools.islice(records, batch_size))
+                if not batch:
+                    break
+                rows = [clean_record(record) for record in batch]
+                with transaction.atomic():
+                    self._load_batch(user, checkpoint.records, rows)
+                    checkpoint.records += len(batch)
+                    checkpoint.save()
+                loaded = sum(row is not None for row in rows)
+                imported += loaded
+                skipped += len(rows) - loaded
+                rate = imported / max(time.monotonic() - started, 1e-9)
+                self.stdout.write(
+                    f'Imported {imported} recipes ({rate:.0f} rows/s)'
+                )
+
+        # Set-based SQL bypasses the model signals.
+        bump_version(user.pk)
+        if skipped:
+            self.stdout.write(
+                self.style.WARNING(f'Skipped {skipped} invalid records')
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Import complete: {imported} recipes'
+        ))
+
+    def _load_batch(self, user, first_record, rows):
+        """Stage a batch with COPY and merge it with set-based SQL."""
+        recipes, recipe_tags, recipe_ingredients = [], [], []
+        tags, ingredients = {}, {}
+        for record, row in enumerate(rows, start=first_record):
+            if row is None:
+                continue
+            recipes.append([
+                record,
+                row['title'],
+                row['description'],
+                row['time_minutes'],
+                row['price'],
+                row['link'],
+            ])
+            recipe_tags += [
+                [record, tags.setdefault(name, len(tags))]
+                for name in row['tags']
+            ]
+            recipe_ingredients += [
+                [record, ingredients.setdefault(name, len(ingredients))]
+                for name in row['ingredients']
+            ]
+        if not recipes:
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(STAGING_TABLES)
+            _copy(
+                cursor,
+                'import_recipe',
+                ['record', 'title', 'description', 'time_minutes', 'price',
+                 'link'],
+                recipes,
+            )
+            _copy(cursor, 'import_tag', ['name', 'num'], tags.items())
+            _copy(
+                cursor,
+                'import_ingredient',
+                ['name', 'num'],
+                ingredients.items(),
+            )
+            _copy(cursor, 'import_recipe_tag', ['record', 'num'], recipe_tags)
+            _copy(
+                cursor,
+                'import_recipe_ingredient',
+                ['record', 'num'],
+                recipe_ingredients,
+            )
+            cursor.execute(MERGE_SQL, {'user_id': user.pk})
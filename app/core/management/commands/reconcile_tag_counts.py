@@ -0,0 +1,50 @@
+"""
+Django command to repair drifted tag recipe counts.
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from core.models import Tag
+from recipe.cache import bump_version
+
+
+class Command(BaseCommand):
+    """Django command to recount Tag.recipe_count where it drifted."""
+    help = (
+        'Compare each tag\'s recipe_count with its through-table rows and '
+        'recount the tags that drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted tags without fixing them.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        drifted = list(
+            Tag.objects.actual_recipe_count().exclude(
+                recipe_count=F('actual_recipe_count'),
+            ).values_list('pk', 'user_id')
+        )
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Tag counts are in step'))
+            return
+        if options['dry_run']:
+            self.stdout.write(f'{len(drifted)} tags drifted')
+            return
+
+        batch_size = options['batch_size']
+        for start in range(0, len(drifted), batch_size):
+            batch = drifted[start:start + batch_size]
+            Tag.objects.filter(pk__in=[pk for pk, _ in batch]).recount()
+        # Updates bypass the model signals.
+        for user_id in {user_id for _, user_id in drifted}:
+            bump_version(user_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted {len(drifted)} tags'
+        ))
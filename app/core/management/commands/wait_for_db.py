@@ -1,26 +1,58 @@
 """
 Django command to wait for the database to be available.
 """
+import random
 import time
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
+from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
     """Django command to wait for database."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            action='append',
+            dest='databases',
+            help='Database alias to wait for. Defaults to all of them.',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60,
+            help='Seconds to wait before failing.',
+        )
+        parser.add_argument('--initial-delay', type=float, default=0.05)
+        parser.add_argument('--max-delay', type=float, default=1.0)
+
     def handle(self, *args, **options):
         """Entrypoint for command."""
+        databases = options['databases'] or list(connections)
+        deadline = time.monotonic() + options['timeout']
+        delay = options['initial_delay']
         self.stdout.write('Waiting for database')
-        db_up = False
-        while db_up is False:
+        while True:
             try:
-                self.check(databases=['default'])
-                db_up = True
+                self.check(databases=databases)
+                break
             except (Psycopg2OpError, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second ..')
-                time.sleep(1)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f"Database unavailable after {options['timeout']}s"
+                    )
+                # Full jitter keeps restarting containers from polling in
+                # lockstep.
+                pause = min(random.uniform(0, delay), remaining)
+                self.stdout.write(
+                    f'Database unavailable, waiting {pause:.2f} seconds ..'
+                )
+                time.sleep(pause)
+                delay = min(delay * 2, options['max_delay'])
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
@@ -0,0 +1,294 @@
+"""
+Per-view request metrics rendered in the Prometheus text format.
+
+Each thread records into its own shard, so recording takes no locks.
+With METRICS_DIR set, every process periodically writes its totals there
+and a scrape sums the files of all workers. Files of exited workers still
+count towards counters, but not towards gauges.
+"""
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from core.backends.postgresql.pool import STATS as POOL_STATS, pools
+from core.stats import registry as cache_stats
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Offsets into a shard row; latency bucket counts follow.
+COUNT, DURATION, QUERIES, QUERY_TIME, SIZE, BUCKETS = range(6)
+
+# POOL_STATS before this offset are gauges; the rest are counters.
+POOL_COUNTERS = POOL_STATS.index('checkouts')
+
+
+class Registry:
+    """Request counters sharded per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._flushed = 0.0
+        self._flush_lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            # Taken once per thread, never while recording.
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def observe(self, view, method, duration, queries, query_time, size):
+        """Record one request."""
+        shard = self._shard()
+        row = shard.get((view, method))
+        if row is None:
+            row = shard[view, method] = [0] * (BUCKETS + len(LATENCY_BUCKETS))
+        row[COUNT] += 1
+        row[DURATION] += duration
+        row[QUERIES] += queries
+        row[QUERY_TIME] += query_time
+        row[SIZE] += size
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, duration)
+        if bucket < len(LATENCY_BUCKETS):
+            row[BUCKETS + bucket] += 1
+
+        if settings.METRICS_DIR:
+            self._flush_if_due()
+
+    def _flush_if_due(self):
+        """Flush once METRICS_FLUSH_INTERVAL has passed.
+
+        Skipped while another thread flushes, which covers this request.
+        """
+        interval = settings.METRICS_FLUSH_INTERVAL
+        if time.monotonic() - self._flushed < interval:
+            return
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            if now - self._flushed >= interval:
+                self._flushed = now
+                self._write()
+        finally:
+            self._flush_lock.release()
+
+    def snapshot(self):
+        """Return this process's totals as a JSON-serializable dict."""
+        views = {}
+        for shard in list(self._shards):
+            for key, row in list(shard.items()):
+                _add(views, '\t'.join(key), row)
+
+        database_pools = {}
+        for (alias, _), pool in list(pools.items()):
+            stats = pool.stats()
+            _add(database_pools, alias, [stats[key] for key in POOL_STATS])
+
+        return {
+            'views': views,
+            'caches': {
+                name: [stats.hits, stats.misses]
+                for name, stats in cache_stats.items()
+            },
+            'pools': database_pools,
+        }
+
+    def flush(self):
+        """Write this process's totals to METRICS_DIR."""
+        with self._flush_lock:
+            self._write()
+
+    def _write(self):
+        """Write the totals, logging rather than raising on failure.
+
+        Called with _flush_lock held, so the temporary file is not shared.
+        """
+        path = os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json')
+        tmp = f'{path}.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp, path)
+        except OSError:
+            logger.exception('Writing metrics to %s failed', path)
+
+    def collect(self):
+        """Return the totals of every worker, or of this process."""
+        if not settings.METRICS_DIR:
+            return self.snapshot()
+
+        self.flush()
+        totals = {'views': {}, 'caches': {}, 'pools': {}}
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            try:
+                pid = int(os.path.basename(path)[:-len('.json')])
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = _is_alive(pid)
+            for key, row in snapshot['views'].items():
+                _add(totals['views'], key, row)
+            for name, row in snapshot['caches'].items():
+                _add(totals['caches'], name, row)
+            for alias, row in snapshot.get('pools', {}).items():
+                if not alive:
+                    row = [0] * POOL_COUNTERS + row[POOL_COUNTERS:]
+                _add(totals['pools'], alias, row)
+
+        return totals
+
+    def reset(self):
+        """Drop every recorded request in this process."""
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
+
+
+def _is_alive(pid):
+    """Return True if process pid is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+
+def _add(totals, key, row):
+    """Sum row into totals[key]."""
+    current = totals.get(key)
+    if current is None:
+        totals[key] = list(row)
+    else:
+        for i, value in enumerate(row):
+            current[i] += value
+
+
+def _labels(**labels):
+    """Return labels formatted for the Prometheus text format."""
+    pairs = []
+    for name, value in labels.items():
+        value = (
+            str(value)
+            .replace('\\', r'\\')
+            .replace('"', r'\"')
+            .replace('\n', r'\n')
+        )
+        pairs.append(f'{name}="{value}"')
+
+    return '{' + ','.join(pairs) + '}'
+
+
+def render(totals):
+    """Return totals in the Prometheus text exposition format."""
+    views = sorted(
+        (tuple(key.split('\t')), row) for key, row in totals['views'].items()
+    )
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    family('app_http_requests_total', 'counter', 'Requests handled per view.')
+    for (view, method), row in views:
+        labels = _labels(view=view, method=method)
+        lines.append(f'app_http_requests_total{labels} {row[COUNT]}')
+
+    family(
+        'app_http_request_duration_seconds',
+        'histogram',
+        'Request latency per view.',
+    )
+    for (view, method), row in views:
+        cumulative = 0
+        for le, count in zip(LATENCY_BUCKETS, row[BUCKETS:]):
+            cumulative += count
+            labels = _labels(view=view, method=method, le=le)
+            lines.append(
+                f'app_http_request_duration_seconds_bucket{labels} '
+                f'{cumulative}'
+            )
+        labels = _labels(view=view, method=method, le='+Inf')
+        lines.append(
+            f'app_http_request_duration_seconds_bucket{labels} {row[COUNT]}'
+        )
+        labels = _labels(view=view, method=method)
+        lines.append(
+            f'app_http_request_duration_seconds_sum{labels} {row[DURATION]}'
+        )
+        lines.append(
+            f'app_http_request_duration_seconds_count{labels} {row[COUNT]}'
+        )
+
+    for name, index, kind, help_text in (
+        ('app_db_queries_total', QUERIES, 'counter',
+         'SQL queries executed per view.'),
+        ('app_db_query_duration_seconds_total', QUERY_TIME, 'counter',
+         'Time spent in SQL queries per view.'),
+        ('app_http_response_size_bytes_total', SIZE, 'counter',
+         'Response bytes sent per view.'),
+    ):
+        family(name, kind, help_text)
+        for (view, method), row in views:
+            labels = _labels(view=view, method=method)
+            lines.append(f'{name}{labels} {row[index]}')
+
+    caches = sorted(totals['caches'].items())
+    family('app_cache_hits_total', 'counter', 'Cache lookups served.')
+    for name, (hits, _) in caches:
+        lines.append(f'app_cache_hits_total{_labels(cache=name)} {hits}')
+    family('app_cache_misses_total', 'counter', 'Cache lookups missed.')
+    for name, (_, misses) in caches:
+        lines.append(f'app_cache_misses_total{_labels(cache=name)} {misses}')
+
+    database_pools = sorted(totals['pools'].items())
+    for stat, name, kind, help_text in (
+        ('in_use', 'app_db_pool_in_use_connections', 'gauge',
+         'Pooled connections checked out.'),
+        ('idle', 'app_db_pool_idle_connections', 'gauge',
+         'Pooled connections ready for checkout.'),
+        ('waiting', 'app_db_pool_waiting_checkouts', 'gauge',
+         'Checkouts waiting for a free connection.'),
+        ('max_size', 'app_db_pool_max_connections', 'gauge',
+         'Maximum pooled connections.'),
+        ('checkouts', 'app_db_pool_checkouts_total', 'counter',
+         'Connection checkouts.'),
+        ('waits', 'app_db_pool_waits_total', 'counter',
+         'Checkouts that found the pool exhausted.'),
+        ('wait_seconds', 'app_db_pool_wait_seconds_total', 'counter',
+         'Time spent waiting for a free connection.'),
+        ('timeouts', 'app_db_pool_timeouts_total', 'counter',
+         'Checkouts that timed out.'),
+        ('recycled', 'app_db_pool_recycled_total', 'counter',
+         'Connections replaced for age or failed health checks.'),
+    ):
+        family(name, kind, help_text)
+        index = POOL_STATS.index(stat)
+        for alias, row in database_pools:
+            lines.append(f'{name}{_labels(alias=alias)} {row[index]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+metrics = Registry()
@@ -0,0 +1,159 @@
+"""
+Middleware for the app.
+"""
+import asyncio
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+
+from django.db import connections
+from django.http import HttpResponse, JsonResponse
+
+from core import health
+from core.metrics import metrics
+
+
+class QueryCounter:
+    """Database execute wrapper counting queries and their duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+def count_queries(queries):
+    """Return a context installing queries on every connection.
+
+    Connections are per thread, so code running the ORM in another thread
+    must install the counter there.
+    """
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(queries))
+
+    return stack
+
+
+class MetricsMiddleware:
+    """Record latency, queries and response size per resolved view.
+
+    Under ASGI the queries are counted by the async views, which run the
+    ORM in worker threads, through request.query_counter.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function, as Django's
+            # MiddlewareMixin does.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        request.query_counter = QueryCounter()
+        start = time.perf_counter()
+        with count_queries(request.query_counter):
+            response = self.get_response(request)
+
+        return self._record(request, response, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        request.query_counter = QueryCounter()
+        start = time.perf_counter()
+        response = await self.get_response(request)
+
+        return self._record(request, response, time.perf_counter() - start)
+
+    def _record(self, request, response, duration):
+        """Record the request, once sent if the response is streamed."""
+        match = request.resolver_match
+        view = match.view_name if match else '<unresolved>'
+        queries = request.query_counter
+        if response.streaming:
+            response.streaming_content = self._count_streamed(
+                response.streaming_content,
+                view,
+                request.method,
+                duration,
+                queries,
+            )
+        else:
+            metrics.observe(
+                view,
+                request.method,
+                duration,
+                queries.count,
+                queries.duration,
+                len(response.content),
+            )
+
+        return response
+
+    def _count_streamed(self, chunks, view, method, duration, queries):
+        """Yield chunks and record the response once fully sent."""
+        size = 0
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        finally:
+            metrics.observe(
+                view,
+                method,
+                duration,
+                queries.count,
+                queries.duration,
+                size,
+            )
+
+
+class HealthCheckMiddleware:
+    """Answer /healthz and /readyz before any other middleware.
+
+    Probes skip sessions, authentication, host validation and URL
+    resolution. /healthz only shows the process is serving; /readyz also
+    checks the databases and migrations, and that the caches answer.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if request.path == '/healthz':
+            return self.liveness()
+        if request.path == '/readyz':
+            return self.readiness()
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path == '/healthz':
+            return self.liveness()
+        if request.path == '/readyz':
+            return await sync_to_async(self.readiness)()
+        return await self.get_response(request)
+
+    def liveness(self):
+        return HttpResponse('ok', content_type='text/plain')
+
+    def readiness(self):
+        ready, results = health.readiness()
+        return JsonResponse(results, status=200 if ready else 503)
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:42
+
+from django.db import migrations, models
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    """Point recipes at the oldest of each duplicate tag and drop the rest."""
+    Tag = apps.get_model('core', 'Tag')
+    RecipeTag = apps.get_model('core', 'Recipe').tags.through
+    duplicates = (
+        Tag.objects.values('user_id', 'name')
+        .annotate(keep_id=models.Min('id'), num=models.Count('id'))
+        .filter(num__gt=1)
+    )
+    for dup in duplicates:
+        extra_ids = list(
+            Tag.objects.filter(user_id=dup['user_id'], name=dup['name'])
+            .exclude(id=dup['keep_id'])
+            .values_list('id', flat=True)
+        )
+        recipe_ids = set(
+            RecipeTag.objects.filter(tag_id__in=extra_ids)
+            .values_list('recipe_id', flat=True)
+        )
+        RecipeTag.objects.bulk_create(
+            [RecipeTag(recipe_id=rid, tag_id=dup['keep_id'])
+             for rid in recipe_ids],
+            ignore_conflicts=True,
+        )
+        Tag.objects.filter(id__in=extra_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_auto_20230214_0334'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_tags, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_tag_name_per_user'),
+        ),
+    ]
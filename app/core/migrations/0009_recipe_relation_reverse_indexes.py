@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:55
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Index the recipe through tables by (target, recipe).
+
+    Django only creates the (recipe_id, target_id) unique index and one
+    index per column, so filtering recipes by tag or ingredient could not
+    be answered from an index alone. Auto-created through tables cannot
+    declare Meta.indexes, hence the raw SQL.
+    """
+
+    dependencies = [
+        ('core', '0008_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_tags_tag_recipe_idx '
+            'ON core_recipe_tags (tag_id, recipe_id);',
+            'DROP INDEX core_recipe_tags_tag_recipe_idx;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_ingredients_ingredient_recipe_idx '
+            'ON core_recipe_ingredients (ingredient_id, recipe_id);',
+            'DROP INDEX core_recipe_ingredients_ingredient_recipe_idx;',
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:19
+
+from django.db import migrations, models
+
+
+COUNT_RECIPES = """
+UPDATE core_tag t
+SET recipe_count = c.count
+FROM (
+    SELECT tag_id, count(*) AS count FROM core_recipe_tags GROUP BY tag_id
+) c
+WHERE c.tag_id = t.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunSQL(COUNT_RECIPES, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(condition=models.Q(('recipe_count__gt', 0)), fields=['user', 'name'], name='tag_assigned_name_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:23
+
+from django.db import migrations, models
+
+
+TABLES = ['core_tag', 'core_ingredient']
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Index names for trigram matching, if the extensions are available.
+
+    btree_gin lets the GIN index lead with user_id, so matches are found
+    within one user's names. Databases without the contrib extensions keep
+    working with containment matching (see recipe.autocomplete).
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT count(*) FROM pg_available_extensions '
+            "WHERE name IN ('pg_trgm', 'btree_gin')"
+        )
+        if cursor.fetchone()[0] < 2:
+            return
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm;')
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gin;')
+    for table in TABLES:
+        schema_editor.execute(
+            f'CREATE INDEX {table}_name_trgm_idx '
+            f'ON {table} USING gin (user_id, name gin_trgm_ops);'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    for table in TABLES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_name_trgm_idx;')
+
+
+class Migration(migrations.Migration):
+    """Index tag and ingredient names for autocomplete.
+
+    Expression and operator class indexes cannot be declared in
+    Meta.indexes on Django 3.2, hence the raw SQL.
+    """
+
+    dependencies = [
+        ('core', '0011_tag_recipe_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'name'], name='ingredient_user_name_idx'),
+        ),
+        # Short prefixes, matched as UPPER(name::text) LIKE UPPER('ab%') and
+        # read in index order; the "C" collation allows both.
+        migrations.RunSQL(
+            'CREATE INDEX core_tag_name_prefix_idx '
+            'ON core_tag (user_id, upper(name) COLLATE "C", name);',
+            'DROP INDEX core_tag_name_prefix_idx;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_ingredient_name_prefix_idx '
+            'ON core_ingredient (user_id, upper(name) COLLATE "C", name);',
+            'DROP INDEX core_ingredient_name_prefix_idx;',
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_cacheversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='core.user')),
+                ('version', models.BigIntegerField()),
+            ],
+        ),
+    ]
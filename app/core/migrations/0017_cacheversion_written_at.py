@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_authversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cacheversion',
+            name='written_at',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
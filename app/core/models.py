@@ -1,8 +1,16 @@
 """
 Database models.
 """
+import os
+import uuid
+
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -45,6 +53,13 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+def recipe_image_file_path(instance, filename):
+    """Generate file path for new recipe image."""
+    ext = os.path.splitext(filename)[1].lower()
+
+    return os.path.join('uploads', 'recipe', f'{uuid.uuid4()}{ext}')
+
+
 class Recipe(models.Model):
     """Recipe object."""
     user = models.ForeignKey(
@@ -61,10 +76,72 @@ class Recipe(models.Model):
     # Create Ingredients API, Step 2, add ingredient object to core/models.py
     # add Ingredients
     ingredients = models.ManyToManyField('Ingredient')
+    # Also touched when the recipe's tags or ingredients change.
+    updated_at = models.DateTimeField(auto_now=True)
+    # Weighted title (A) and description (B) lexemes, maintained by a
+    # database trigger so bulk inserts and imports stay searchable.
+    search_vector = SearchVectorField(null=True, editable=False)
+    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    # Storage names of the resized images, by variant, once rendered.
+    image_variants = models.JSONField(default=dict, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's recipes by -id.
+            models.Index(fields=['user', 'id'], name='recipe_user_id_idx'),
+            # ?ordering=price and ?ordering=time_minutes, in either
+            # direction, with their range filters.
+            models.Index(
+                fields=['user', 'price', 'id'],
+                name='recipe_user_price_idx',
+            ),
+            models.Index(
+                fields=['user', 'time_minutes', 'id'],
+                name='recipe_user_time_idx',
+            ),
+            # Count/Max(updated_at) validators for conditional requests.
+            models.Index(
+                fields=['user', 'updated_at'],
+                name='recipe_user_updated_idx',
+            ),
+            GinIndex(fields=['search_vector'], name='recipe_search_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+
+class TagQuerySet(models.QuerySet):
+    """Queries maintaining Tag.recipe_count."""
+
+    def actual_recipe_count(self):
+        """Annotate tags with recipe_count counted from the through table."""
+        counts = Tag.recipe_set.through.objects.filter(
+            tag_id=OuterRef('pk'),
+        ).order_by().values('tag_id').annotate(count=Count('*'))
+
+        return self.annotate(actual_recipe_count=Coalesce(
+            Subquery(counts.values('count')),
+            0,
+        ))
+
+    def change_recipe_count(self, delta):
+        """Add delta to the recipe_count of the tags."""
+        return self.update(
+            recipe_count=F('recipe_count') + delta,
+            updated_at=timezone.now(),
+        )
+
+    def recount(self):
+        """Set recipe_count of the tags from the through table."""
+        return self.update(
+            recipe_count=self.actual_recipe_count().filter(
+                pk=OuterRef('pk'),
+            ).values('actual_recipe_count'),
+            updated_at=timezone.now(),
+        )
+
+
 # Create Tag API, Step 2: Create a tag object in core.models
 class Tag(models.Model):
     """Tag for filtering recipes."""
@@ -74,6 +151,29 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
         # if user is deleleted, tags will be deleted.
     )
+    # Number of recipes using the tag, kept up to date by the recipe
+    # signals and the bulk writers; repaired by reconcile_tag_counts.
+    recipe_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TagQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Also the index behind keyset pagination of tags by name.
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_tag_name_per_user',
+            ),
+        ]
+        indexes = [
+            # Pages of ?assigned_only=1 without skipping unused tags.
+            models.Index(
+                fields=['user', 'name'],
+                condition=Q(recipe_count__gt=0),
+                name='tag_assigned_name_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -110,6 +210,15 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of ingredients by name.
+            models.Index(
+                fields=['user', 'name'],
+                name='ingredient_user_name_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -121,4 +230,56 @@ class Ingredient(models.Model):
 #   core/migrations/0004_auto_20230214_0334.py
 #     - Create model Ingredient
 #     - Add field ingredients to recipe
-# Then go to core/admin.py to add admin.site.register(models.Ingredient)
\ No newline at end of file
+# Then go to core/admin.py to add admin.site.register(models.Ingredient)
+
+
+class ImportCheckpoint(models.Model):
+    """Progress of a bulk recipe import, used to resume after a failure."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    source = models.CharField(max_length=1024)
+    # Number of input records already committed (or skipped as invalid).
+    records = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'source'],
+                name='unique_import_source_per_user',
+            ),
+        ]
+
+    def __str__(self):
+        return self.source
+
+
+class CacheVersion(models.Model):
+    """Version of a user's cached API responses (see recipe.cache).
+
+    Kept in the database so every worker sees a bump at once. written_at
+    pins the user's reads to the primary (see core.routers).
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    version = models.BigIntegerField()
+    written_at = models.DateTimeField(null=True)
+
+
+class AuthVersion(models.Model):
+    """Version of a user's cached token lookups (see user.authentication).
+
+    Bumped when the user or their token changes, so a cached lookup is
+    revoked in every worker at once.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    version = models.BigIntegerField()
@@ -0,0 +1,56 @@
+"""
+Renderers for the APIs.
+"""
+from decimal import Decimal
+
+import msgpack
+import orjson
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+
+_encoder = encoders.JSONEncoder()
+
+
+def msgpack_default(obj):
+    """Encode what MessagePack cannot, keeping decimals exact as strings."""
+    if isinstance(obj, Decimal):
+        return str(obj)
+
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Render JSON with orjson, matching JSONRenderer's compact output.
+
+    Indented output, which orjson cannot produce with arbitrary widths, is
+    left to JSONRenderer.
+    """
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_encoder.default, option=self.options)
+        # Escaped by JSONRenderer as they are invalid in JavaScript strings.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029',
+        )
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Render MessagePack for Accept: application/msgpack."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return msgpack.packb(data, default=msgpack_default, use_bin_type=True)
@@ -0,0 +1,142 @@
+"""
+Database routing between the primary and its read replicas.
+
+Views using ReplicaReadMixin serve safe requests from one of
+settings.DATABASE_REPLICAS. Everything else reads and writes the primary.
+A user who writes through such a view is pinned to the primary for
+settings.REPLICA_PIN_SECONDS, so they always read their own changes.
+
+The pin is the user's CacheVersion.written_at on the primary, so it holds
+for every client of the user and whichever worker serves them. It is read
+in one query with the user's response cache version, which that request
+then caches under: a replica read never predates the writes its version
+counts.
+"""
+import random
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import (
+    BooleanField,
+    Case,
+    DateTimeField,
+    ExpressionWrapper,
+    Value,
+    When,
+)
+from django.db.models.functions import Now
+
+from rest_framework.permissions import SAFE_METHODS
+
+from core.models import CacheVersion
+
+
+# Replica alias serving reads for the current request, if any.
+_replica = ContextVar('replica', default=None)
+
+# (user id, CacheVersion.version) read with the request's pin, if any.
+_snapshot = ContextVar('replica_snapshot', default=None)
+
+
+def _versions():
+    return CacheVersion.objects.using(DEFAULT_DB_ALIAS)
+
+
+def pin(user):
+    """Make user read from the primary for the next few seconds."""
+    _versions().filter(user_id=user.pk).update(written_at=Now())
+
+
+def is_pinned(user):
+    """Return True if user wrote to the primary within the pin."""
+    if not user.is_authenticated:
+        return False
+    since = ExpressionWrapper(
+        Now() - Value(timedelta(seconds=settings.REPLICA_PIN_SECONDS)),
+        output_field=DateTimeField(),
+    )
+    row = _versions().filter(user_id=user.pk).values_list(
+        'version',
+        Case(
+            When(written_at__gt=since, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    )[:1]
+    if not row:
+        return False
+    version, pinned = row[0]
+    _snapshot.set((user.pk, version))
+
+    return pinned
+
+
+def snapshot_version(user_id):
+    """Return the version read with this request's pin, or None."""
+    snapshot = _snapshot.get()
+    if snapshot is None or snapshot[0] != user_id:
+        return None
+
+    return snapshot[1]
+
+
+class ReplicaRouter:
+    """Route reads to the request's replica and writes to the primary."""
+
+    def _aliases(self):
+        return [DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS]
+
+    def db_for_read(self, model, **hints):
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        # Also covers instances loaded from a replica.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = self._aliases()
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+
+        return None
+
+
+class ReplicaReadMixin:
+    """Serve safe requests from a read replica.
+
+    Authentication still reads from the primary, so new tokens work at
+    once. Successful unsafe requests pin the user to the primary.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _replica.set(None)
+        snapshot = _snapshot.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _snapshot.reset(snapshot)
+            _replica.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            replicas
+            and request.method in SAFE_METHODS
+            and not is_pinned(request.user)
+        ):
+            _replica.set(random.choice(replicas))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Pin the user to the primary after a successful write."""
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and request.user.is_authenticated
+            and response.status_code < 400
+        ):
+            pin(request.user)
+
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,40 @@
+"""
+Process-local counters shared by the app caches.
+"""
+import threading
+
+
+# Every CacheStats by name, so metrics can report them without importing
+# the apps that own them.
+registry = {}
+
+
+class CacheStats:
+    """Hit and miss counters for a cache."""
+
+    def __init__(self, name):
+        self.name = name
+        registry[name] = self
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        """Count a cache lookup."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self):
+        """Reset the counters to zero."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_ratio(self):
+        """Return the fraction of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
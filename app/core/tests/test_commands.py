@@ -2,13 +2,32 @@
 Test custom Django management commands.
 """
 
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+
+from core.management.commands.import_recipes import (
+    Command as ImportCommand,
+)
+from core.models import ImportCheckpoint, Ingredient, Recipe, Tag
+from recipe import urls as recipe_urls
+from user import urls as user_urls
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -31,3 +50,503 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+    @patch('time.sleep')
+    def test_wait_for_db_backoff(self, patched_sleep, patched_check):
+        """Test retries back off exponentially up to the max delay."""
+        patched_check.side_effect = [OperationalError] * 6 + [True]
+
+        with patch('random.uniform', side_effect=lambda low, high: high):
+            call_command('wait_for_db', '--initial-delay=0.1',
+                         '--max-delay=0.5', stdout=StringIO())
+
+        delays = [c.args[0] for c in patched_sleep.call_args_list]
+        self.assertEqual(delays, [0.1, 0.2, 0.4, 0.5, 0.5, 0.5])
+
+    def test_wait_for_db_deadline(self, patched_check):
+        """Test waiting fails once the timeout has passed."""
+        patched_check.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', '--timeout=0', stdout=StringIO())
+
+    def test_wait_for_db_selected_alias(self, patched_check):
+        """Test --database limits the aliases checked."""
+        patched_check.return_value = True
+
+        call_command('wait_for_db', '--database=default', stdout=StringIO())
+
+        patched_check.assert_called_once_with(databases=['default'])
+
+
+class ExportRecipesCommandTests(TestCase):
+    """Test the export_recipes command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Pad Thai',
+            time_minutes=20,
+            price=Decimal('4.50'),
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Thai'))
+
+    def test_export_to_stdout(self):
+        """Test recipes are written to stdout as NDJSON."""
+        out = StringIO()
+        call_command('export_recipes', 'user@example.com', stdout=out)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Pad Thai')
+        self.assertEqual(rows[0]['tags'], ['Thai'])
+
+    def test_export_csv_to_file(self):
+        """Test recipes are written to a CSV file."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'recipes.csv')
+            call_command(
+                'export_recipes',
+                'user@example.com',
+                '--format=csv',
+                f'--output={path}',
+            )
+            with open(path) as f:
+                lines = f.read().splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('id,title'))
+
+    def test_export_unknown_user(self):
+        """Test exporting an unknown user fails."""
+        with self.assertRaises(CommandError):
+            call_command('export_recipes', 'nobody@example.com')
+
+
+def write_ndjson(directory, rows, name='recipes.ndjson'):
+    """Write rows as NDJSON into directory and return the path."""
+    path = os.path.join(directory, name)
+    with open(path, 'w') as f:
+        for row in rows:
+            f.write((row if isinstance(row, str) else json.dumps(row)) + '\n')
+    return path
+
+
+def import_row(i, tags=(), ingredients=()):
+    """Return an import record for a sample recipe."""
+    return {
+        'title': f'Recipe {i}',
+        'description': f'Description {i}',
+        'time_minutes': 10,
+        'price': '4.50',
+        'link': '',
+        'tags': list(tags),
+        'ingredients': list(ingredients),
+    }
+
+
+class ImportRecipesCommandTests(TestCase):
+    """Test the import_recipes command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_import_ndjson(self):
+        """Test recipes, tags and ingredients are imported and linked."""
+        Tag.objects.create(user=self.user, name='Thai')
+        path = write_ndjson(self.tmp.name, [
+            import_row(0, ['Thai', 'Dinner'], ['Rice', 'Tofu']),
+            import_row(1, ['Thai'], ['Rice', 'Rice']),
+            import_row(2),
+        ])
+        out = StringIO()
+
+        call_command(
+            'import_recipes', 'user@example.com', path,
+            '--batch-size=2', stdout=out,
+        )
+
+        recipes = Recipe.objects.filter(user=self.user).order_by('id')
+        self.assertEqual(
+            [r.title for r in recipes],
+            ['Recipe 0', 'Recipe 1', 'Recipe 2'],
+        )
+        self.assertEqual(recipes[0].price, Decimal('4.50'))
+        self.assertCountEqual(
+            [t.name for t in recipes[0].tags.all()],
+            ['Thai', 'Dinner'],
+        )
+        self.assertEqual([i.name for i in recipes[1].ingredients.all()],
+                         ['Rice'])
+        self.assertEqual(
+            dict(Tag.objects.filter(user=self.user).values_list(
+                'name', 'recipe_count',
+            )),
+            {'Thai': 2, 'Dinner': 1},
+        )
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(),
+            2,
+        )
+        self.assertIn('rows/s', out.getvalue())
+
+    def test_import_is_searchable(self):
+        """Test imported recipes get a search vector."""
+        path = write_ndjson(self.tmp.name, [import_row(0)])
+
+        call_command('import_recipes', 'user@example.com', path,
+                     stdout=StringIO())
+
+        self.assertTrue(
+            Recipe.objects.filter(search_vector='description').exists()
+        )
+
+    def test_import_skips_invalid_records(self):
+        """Test invalid records are skipped and reported."""
+        invalid = import_row(1)
+        invalid['price'] = 'free'
+        path = write_ndjson(
+            self.tmp.name,
+            [import_row(0), invalid, 'not json', import_row(3)],
+        )
+        out = StringIO()
+
+        call_command('import_recipes', 'user@example.com', path, stdout=out)
+
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+        self.assertIn('Skipped 2 invalid records', out.getvalue())
+
+    def test_import_skips_out_of_range_time(self):
+        """Test times too large for the column are skipped, not fatal."""
+        too_long = import_row(1)
+        too_long['time_minutes'] = 2 ** 31
+        too_short = import_row(2)
+        too_short['time_minutes'] = -2 ** 31 - 1
+        path = write_ndjson(
+            self.tmp.name,
+            [import_row(0), too_long, too_short, import_row(3)],
+        )
+        out = StringIO()
+
+        call_command('import_recipes', 'user@example.com', path, stdout=out)
+
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+        self.assertIn('Skipped 2 invalid records', out.getvalue())
+
+    def test_import_skips_unusable_values(self):
+        """Test non-finite prices and null titles are skipped."""
+        rows = []
+        for field, value in [
+            ('price', 'NaN'),
+            ('price', 'sNaN'),
+            ('price', 'Infinity'),
+            ('title', None),
+            ('time_minutes', 'inf'),
+        ]:
+            row = import_row(len(rows) + 1)
+            row[field] = value
+            rows.append(row)
+        path = write_ndjson(self.tmp.name, [import_row(0)] + rows)
+        out = StringIO()
+
+        call_command('import_recipes', 'user@example.com', path, stdout=out)
+
+        self.assertEqual(
+            list(Recipe.objects.filter(user=self.user).values_list(
+                'title', flat=True,
+            )),
+            ['Recipe 0'],
+        )
+        self.assertIn('Skipped 5 invalid records', out.getvalue())
+
+    def test_import_strips_nul_characters(self):
+        """Test NUL characters, which PostgreSQL rejects, are removed."""
+        row = import_row(0, ['Th\x00ai', None], ['Ri\x00ce'])
+        row['title'] = 'Pad\x00 Thai'
+        row['description'] = 'Stir\x00 fried'
+        path = write_ndjson(self.tmp.name, [row])
+
+        call_command('import_recipes', 'user@example.com', path,
+                     stdout=StringIO())
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.title, 'Pad Thai')
+        self.assertEqual(recipe.description, 'Stir fried')
+        self.assertEqual([t.name for t in recipe.tags.all()], ['Thai'])
+        self.assertEqual(
+            [i.name for i in recipe.ingredients.all()],
+            ['Rice'],
+        )
+
+    def test_import_resumes_after_failure(self):
+        """Test a failed import resumes after the last committed batch."""
+        path = write_ndjson(
+            self.tmp.name,
+            [import_row(i, [f'Tag {i}']) for i in range(5)],
+        )
+        original = ImportCommand._load_batch
+
+        def fail_on_second_batch(command, user, first_record, rows):
+            if first_record >= 2:
+                raise RuntimeError('Connection lost')
+            return original(command, user, first_record, rows)
+
+        with patch.object(ImportCommand, '_load_batch', autospec=True,
+                          side_effect=fail_on_second_batch):
+            with self.assertRaises(RuntimeError):
+                call_command('import_recipes', 'user@example.com', path,
+                             '--batch-size=2', stdout=StringIO())
+
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+        checkpoint = ImportCheckpoint.objects.get(user=self.user)
+        self.assertEqual(checkpoint.records, 2)
+
+        call_command('import_recipes', 'user@example.com', path,
+                     '--batch-size=2', stdout=StringIO())
+
+        self.assertEqual(
+            sorted(Recipe.objects.values_list('title', flat=True)),
+            [f'Recipe {i}' for i in range(5)],
+        )
+
+    def test_export_import_round_trip(self):
+        """Test a CSV export can be imported for another user."""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Pad Thai',
+            time_minutes=20,
+            price=Decimal('4.50'),
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Thai'))
+        path = os.path.join(self.tmp.name, 'recipes.csv')
+        call_command('export_recipes', 'user@example.com',
+                     '--format=csv', f'--output={path}')
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+
+        call_command('import_recipes', 'other@example.com', path,
+                     stdout=StringIO())
+
+        imported = Recipe.objects.get(user=other)
+        self.assertEqual(imported.title, 'Pad Thai')
+        self.assertEqual([t.name for t in imported.tags.all()], ['Thai'])
+
+
+class ReconcileTagCountsCommandTests(TestCase):
+    """Test the reconcile_tag_counts command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.tag = Tag.objects.create(user=self.user, name='Thai')
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Pad Thai',
+            time_minutes=20,
+            price=Decimal('5.00'),
+        )
+        recipe.tags.add(self.tag)
+        Tag.objects.filter(pk=self.tag.pk).update(recipe_count=7)
+
+    def test_reconcile_fixes_drift(self):
+        """Test drifted counts are recounted from the through table."""
+        out = StringIO()
+
+        call_command('reconcile_tag_counts', stdout=out)
+
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 1)
+        self.assertIn('Recounted 1 tags', out.getvalue())
+
+    def test_reconcile_dry_run(self):
+        """Test --dry-run only reports drifted tags."""
+        out = StringIO()
+
+        call_command('reconcile_tag_counts', '--dry-run', stdout=out)
+
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 7)
+        self.assertIn('1 tags drifted', out.getvalue())
+
+
+class BenchApiCommandTests(TestCase):
+    """Test the bench_api command."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.output = os.path.join(self.tmp.name, 'bench.json')
+        settings = override_settings(MEDIA_ROOT=self.tmp.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # Variants are rendered in test_image_upload.
+        for name in ('reserve', 'render'):
+            patcher = patch(f'recipe.images.{name}')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def bench(self, *args):
+        call_command(
+            'bench_api',
+            '--users=1',
+            '--recipes=5',
+            '--tags=3',
+            '--ingredients=3',
+            '--requests=2',
+            '--warmup=0',
+            f'--output={self.output}',
+            *args,
+            stdout=StringIO(),
+        )
+        with open(self.output) as f:
+            return json.load(f)
+
+    def test_bench_reports_every_endpoint(self):
+        """Test latency, queries and bytes are reported per endpoint."""
+        results = self.bench()
+
+        self.assertEqual(results['dataset']['recipes'], 5)
+        self.assertIn('recipe:recipe-list GET', results['endpoints'])
+        self.assertIn('user:me PATCH', results['endpoints'])
+        for row in results['endpoints'].values():
+            self.assertEqual(row['requests'], 2)
+            self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+            self.assertIsNotNone(row['queries'])
+        self.assertGreater(
+            results['endpoints']['recipe:recipe-list GET']['bytes'],
+            0,
+        )
+
+    def test_bench_covers_every_route(self):
+        """Test every recipe and user URL is benchmarked."""
+        def url_names(patterns):
+            for pattern in patterns:
+                if hasattr(pattern, 'url_patterns'):
+                    yield from url_names(pattern.url_patterns)
+                else:
+                    yield pattern.name
+
+        results = self.bench()
+
+        benched = {name.split()[0] for name in results['endpoints']}
+        for urls in (recipe_urls, user_urls):
+            for name in url_names(urls.urlpatterns):
+                self.assertIn(f'{urls.app_name}:{name}', benched)
+        for name in [
+            'recipe:recipe-detail PUT',
+            'recipe:recipe-upload-image POST',
+            'recipe:tag-detail DELETE',
+            'recipe:ingredient-list GET',
+            'recipe:ingredient-detail PATCH',
+            'recipe:ingredient-detail DELETE',
+        ]:
+            self.assertIn(name, results['endpoints'])
+
+    def test_bench_removes_seeded_data(self):
+        """Test seeded users are deleted unless --keep is given."""
+        self.bench()
+
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bench_fails_on_regression(self):
+        """Test a run slower than the baseline raises CommandError."""
+        baseline = os.path.join(self.tmp.name, 'baseline.json')
+        with open(baseline, 'w') as f:
+            json.dump({'endpoints': {
+                'recipe:recipe-list GET': {'p95_ms': 0.0, 'queries': 0},
+            }}, f)
+
+        with self.assertRaises(CommandError) as cm:
+            self.bench(f'--baseline={baseline}')
+
+        self.assertIn('recipe:recipe-list GET', str(cm.exception))
+
+
+class BenchRecipeListCommandTests(TestCase):
+    """Test the bench_recipe_list command."""
+
+    def test_bench_recipe_list(self):
+        """Test both paths are timed for each size and data is removed."""
+        out = StringIO()
+
+        call_command('bench_recipe_list', '--sizes=3,5', '--tags=2',
+                     '--repeat=1', stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('3 recipes: serializer'))
+        self.assertTrue(lines[1].startswith('5 recipes: serializer'))
+        self.assertFalse(Recipe.objects.exists())
+
+
+class BenchRenderersCommandTests(TestCase):
+    """Test the bench_renderers command."""
+
+    def test_bench_renderers(self):
+        """Test every format is measured for each size and data is removed."""
+        out = StringIO()
+
+        call_command('bench_renderers', '--sizes=3', '--tags=2',
+                     '--ingredients=2', '--repeat=1', stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(
+            [line.split(':')[0] for line in lines],
+            ['3 recipes json', '3 recipes orjson', '3 recipes msgpack'],
+        )
+        self.assertFalse(Recipe.objects.exists())
+
+
+class BenchAuthCommandTests(TestCase):
+    """Test the bench_auth command."""
+
+    def test_bench_auth(self):
+        """Test signup and login rates are reported per hasher spec."""
+        out = StringIO()
+
+        call_command('bench_auth', 'bcrypt:rounds=4',
+                     'argon2:time_cost=1,memory_cost=8', '--requests=2',
+                     stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[1].startswith('bcrypt:rounds=4'))
+        self.assertTrue(lines[2].startswith('argon2:time_cost=1'))
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_bench_auth_unknown_parameter(self):
+        """Test unknown hasher parameters are rejected."""
+        with self.assertRaises(CommandError):
+            call_command('bench_auth', 'bcrypt:iterations=4',
+                         stdout=StringIO())
+
+
+# The ASGI reads run in other threads, which cannot see a TestCase's
+# transaction.
+class BenchAsyncCommandTests(TransactionTestCase):
+    """Test the bench_async command."""
+
+    def test_bench_async(self):
+        """Test both servers are reported and the data is removed."""
+        out = StringIO()
+
+        call_command('bench_async', '--recipes=3', '--requests=4',
+                     '--clients=2', '--threads=2', '--client-kbps=10000',
+                     stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[1].startswith('wsgi'))
+        self.assertTrue(lines[2].startswith('asgi'))
+        self.assertFalse(Recipe.objects.exists())
@@ -0,0 +1,74 @@
+"""
+Tests for the health check endpoints.
+"""
+from unittest.mock import patch
+
+from django.conf import settings
+from django.db import OperationalError
+from django.test import TestCase
+
+
+class HealthCheckTests(TestCase):
+    """Test /healthz and /readyz."""
+
+    def test_healthz(self):
+        """Test liveness answers without authentication."""
+        res = self.client.get('/healthz')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, b'ok')
+        self.assertNotIn('Vary', res)
+        self.assertFalse(res.cookies)
+
+    def test_healthz_ignores_host(self):
+        """Test probes are answered for any Host header."""
+        res = self.client.get('/healthz', HTTP_HOST='10.0.0.7:8000')
+
+        self.assertEqual(res.status_code, 200)
+
+    def test_readyz(self):
+        """Test readiness passes with the database, migrations and caches."""
+        res = self.client.get('/readyz')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {
+            'database': 'ok',
+            'migrations': 'ok',
+            'caches_reachable': 'ok',
+        })
+
+    def test_readyz_database_down(self):
+        """Test readiness fails when a database cannot be queried."""
+        errors = {'default': 'connection refused'}
+        with patch.dict(
+            'core.health.CHECKS',
+            database=lambda: errors,
+        ):
+            res = self.client.get('/readyz')
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json()['database'], errors)
+
+    def test_readyz_hides_error_details(self):
+        """Test failures are reported as labels, with details only logged."""
+        secret = 'password authentication failed for user "app"'
+        with patch(
+            'django.db.backends.utils.CursorWrapper.execute',
+            side_effect=OperationalError(secret),
+        ), patch(
+            'core.health.MigrationExecutor',
+            side_effect=OperationalError(secret),
+        ), patch('core.health._migrated', set()), patch(
+            'django.core.cache.backends.locmem.LocMemCache.get',
+            side_effect=ConnectionError(secret),
+        ), self.assertLogs('core.health', 'WARNING') as logs:
+            res = self.client.get('/readyz')
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json(), {
+            'database': {'default': 'unavailable'},
+            'migrations': {'default': 'unavailable'},
+            'caches_reachable': dict.fromkeys(settings.CACHES, 'unreachable'),
+        })
+        self.assertNotIn(secret, res.content.decode())
+        self.assertIn(secret, '\n'.join(logs.output))
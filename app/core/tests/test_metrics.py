@@ -0,0 +1,236 @@
+"""
+Tests for the request metrics.
+"""
+import os
+import subprocess
+import tempfile
+import threading
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.backends.postgresql.pool import STATS as POOL_STATS
+from core.metrics import POOL_COUNTERS, Registry, metrics, render
+from core.models import Recipe
+
+
+METRICS_URL = reverse('metrics')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def sample(text, name, **labels):
+    """Return the value of the sample name{labels} in text."""
+    prefix = name + '{' + ','.join(
+        f'{key}="{value}"' for key, value in labels.items()
+    ) + '} '
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+
+    return None
+
+
+class MetricsApiTests(TestCase):
+    """Test the metrics middleware and endpoint."""
+
+    def setUp(self):
+        metrics.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.staff = get_user_model().objects.create_user(
+            email='staff@example.com',
+            password='testpass123',
+            is_staff=True,
+        )
+
+    def scrape(self):
+        self.client.force_authenticate(self.staff)
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.content.decode()
+
+    def test_metrics_requires_staff(self):
+        """Test non-staff users cannot read the metrics."""
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_metrics_allowed_for_internal_ip(self):
+        """Test internal addresses can scrape without logging in."""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+
+    def test_requests_recorded_per_view(self):
+        """Test count, queries, size and latency are recorded per view."""
+        Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=5,
+            price=Decimal('5.50'),
+        )
+        self.client.force_authenticate(self.user)
+        sizes = [len(self.client.get(RECIPES_URL).content) for _ in range(2)]
+
+        text = self.scrape()
+
+        labels = {'view': 'recipe:recipe-list', 'method': 'GET'}
+        self.assertEqual(sample(text, 'app_http_requests_total', **labels), 2)
+        self.assertEqual(
+            sample(text, 'app_http_response_size_bytes_total', **labels),
+            sum(sizes),
+        )
+        self.assertGreater(sample(text, 'app_db_queries_total', **labels), 0)
+        self.assertEqual(
+            sample(
+                text,
+                'app_http_request_duration_seconds_bucket',
+                **labels,
+                le='+Inf',
+            ),
+            2,
+        )
+        self.assertIsNotNone(
+            sample(text, 'app_cache_hits_total', cache='recipe'),
+        )
+
+    def test_pool_stats_exposed(self):
+        """Test database pool saturation is reported."""
+        text = self.scrape()
+
+        self.assertGreater(
+            sample(text, 'app_db_pool_max_connections', alias='default'),
+            0,
+        )
+        self.assertGreaterEqual(
+            sample(text, 'app_db_pool_in_use_connections', alias='default'),
+            1,
+        )
+
+    def test_streamed_response_size_recorded(self):
+        """Test streamed responses are recorded once consumed."""
+        self.client.force_authenticate(self.user)
+        res = self.client.get(reverse('recipe:recipe-export'))
+        size = len(b''.join(res.streaming_content))
+
+        text = self.scrape()
+
+        self.assertEqual(
+            sample(
+                text,
+                'app_http_response_size_bytes_total',
+                view='recipe:recipe-export',
+                method='GET',
+            ),
+            size,
+        )
+
+
+class RegistryTests(TestCase):
+    """Test aggregating metrics across processes."""
+
+    def test_collect_sums_worker_files(self):
+        """Test totals written by other workers are summed on scrape."""
+        with tempfile.TemporaryDirectory() as tmp:
+            with override_settings(METRICS_DIR=tmp):
+                worker = Registry()
+                worker.observe('user:me', 'GET', 0.02, 1, 0.001, 40)
+                worker.flush()
+                # Stand in for a file written by another process.
+                for name in os.listdir(tmp):
+                    os.rename(
+                        os.path.join(tmp, name),
+                        os.path.join(tmp, f'{os.getppid()}.json'),
+                    )
+                scraper = Registry()
+                scraper.observe('user:me', 'GET', 2.0, 2, 0.002, 60)
+
+                text = render(scraper.collect())
+
+        labels = {'view': 'user:me', 'method': 'GET'}
+        self.assertEqual(sample(text, 'app_http_requests_total', **labels), 2)
+        self.assertEqual(sample(text, 'app_db_queries_total', **labels), 3)
+        self.assertEqual(
+            sample(
+                text,
+                'app_http_request_duration_seconds_bucket',
+                **labels,
+                le=0.025,
+            ),
+            1,
+        )
+
+    def test_collect_drops_gauges_of_exited_workers(self):
+        """Test exited workers keep adding counters but not gauges."""
+        with tempfile.TemporaryDirectory() as tmp:
+            with override_settings(METRICS_DIR=tmp):
+                scraper = Registry()
+                live = scraper.collect()['pools']['default']
+                path = os.path.join(tmp, f'{os.getpid()}.json')
+                exited = subprocess.Popen(['true'])
+                exited.wait()
+                os.rename(path, os.path.join(tmp, f'{exited.pid}.json'))
+
+                totals = scraper.collect()['pools']['default']
+
+        gauges = POOL_STATS[:POOL_COUNTERS]
+        self.assertIn('in_use', gauges)
+        for i, stat in enumerate(POOL_STATS):
+            expected = live[i] if stat in gauges else 2 * live[i]
+            self.assertEqual(totals[i], expected, stat)
+
+    def test_concurrent_flushes(self):
+        """Test threads flushing at once neither fail nor corrupt files."""
+        errors = []
+
+        def record(registry):
+            try:
+                for _ in range(50):
+                    registry.observe('user:me', 'GET', 0.01, 1, 0.001, 40)
+                    registry.collect()
+            except Exception as exc:
+                errors.append(exc)
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(
+            METRICS_DIR=tmp,
+            METRICS_FLUSH_INTERVAL=0,
+        ), self.assertNoLogs('core.metrics'):
+            registry = Registry()
+            threads = [
+                threading.Thread(target=record, args=(registry,))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            text = render(registry.collect())
+
+        self.assertEqual(errors, [])
+        labels = {'view': 'user:me', 'method': 'GET'}
+        self.assertEqual(
+            sample(text, 'app_http_requests_total', **labels),
+            400,
+        )
+
+    def test_flush_failure_logged(self):
+        """Test a failed flush is logged instead of failing the request."""
+        missing = os.path.join(tempfile.gettempdir(), 'missing-metrics-dir')
+        with override_settings(
+            METRICS_DIR=missing,
+            METRICS_FLUSH_INTERVAL=0,
+        ), self.assertLogs('core.metrics', 'ERROR'):
+            Registry().observe('user:me', 'GET', 0.01, 1, 0.001, 40)
@@ -3,6 +3,7 @@ Tests for models.
 """
 from decimal import Decimal
 
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -81,6 +82,16 @@ class ModelTests(TestCase):
         self.assertEqual(str(tag), tag.name)
         # then since it's TDD unit test, go ahead to add tag in core.model
 
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name."""
+        user = create_user()
+        other_user = create_user(email='other@example.com')
+        models.Tag.objects.create(user=user, name='Tag1')
+        models.Tag.objects.create(user=other_user, name='Tag1')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='Tag1')
+
 # Create Ingredients API, Step 1
     def test_create_ingredient(self):
         """Test creating an ingredient is successful."""
@@ -0,0 +1,124 @@
+"""
+Tests for the pooled PostgreSQL backend.
+"""
+import threading
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from core.backends.postgresql.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    """Stand-in for a psycopg2 connection."""
+
+    class info:
+        transaction_status = 0
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def cursor(self):
+        raise AssertionError('Unexpected health check.')
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test the connection pool."""
+
+    def test_connections_reused(self):
+        """Test returned connections are handed out again."""
+        pool = ConnectionPool(max_size=2)
+
+        conn = pool.getconn(FakeConnection)
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(FakeConnection), conn)
+        self.assertEqual(pool.stats()['checkouts'], 2)
+
+    def test_checkout_times_out_when_exhausted(self):
+        """Test checkouts wait up to the timeout for a free connection."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.getconn(FakeConnection)
+
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(FakeConnection)
+
+        stats = pool.stats()
+        self.assertEqual(stats['in_use'], 1)
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+
+    def test_waiting_checkout_gets_returned_connection(self):
+        """Test a waiting checkout is woken when a connection returns."""
+        pool = ConnectionPool(max_size=1, timeout=5)
+        conn = pool.getconn(FakeConnection)
+        timer = threading.Timer(0.05, pool.putconn, [conn])
+        timer.start()
+
+        self.assertIs(pool.getconn(FakeConnection), conn)
+        timer.join()
+
+    def test_old_connections_recycled(self):
+        """Test connections past max_lifetime are replaced."""
+        pool = ConnectionPool(max_lifetime=0)
+        conn = pool.getconn(FakeConnection)
+        pool.putconn(conn)
+
+        replacement = pool.getconn(FakeConnection)
+
+        self.assertIsNot(replacement, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['recycled'], 1)
+        self.assertEqual(pool.stats()['in_use'], 1)
+
+    def test_idle_connections_reaped_to_min_size(self):
+        """Test idle connections above min_size are closed."""
+        pool = ConnectionPool(min_size=1, max_idle=0)
+        conns = [pool.getconn(FakeConnection) for _ in range(3)]
+
+        for conn in conns:
+            pool.putconn(conn)
+
+        self.assertEqual(pool.stats()['idle'], 1)
+        self.assertEqual(sum(conn.closed for conn in conns), 2)
+
+    def test_failed_connect_frees_slot(self):
+        """Test a failed connect does not use up the pool."""
+        pool = ConnectionPool(max_size=1, timeout=0)
+
+        with self.assertRaises(OSError):
+            pool.getconn(lambda: (_ for _ in ()).throw(OSError()))
+
+        self.assertIsInstance(pool.getconn(FakeConnection), FakeConnection)
+
+
+class PooledBackendTests(TransactionTestCase):
+    """Test the database backend draws connections from the pool."""
+
+    def backend_pid(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            return cursor.fetchone()[0]
+
+    def test_connection_reused_after_close(self):
+        """Test closing the connection returns it to the pool."""
+        pid = self.backend_pid()
+
+        connection.close()
+
+        self.assertEqual(self.backend_pid(), pid)
+
+    def test_connection_closed_without_pool(self):
+        """Test DB_POOL=0 keeps connecting per request."""
+        pool = dict(connection.settings_dict['POOL'], ENABLED=False)
+        with patch.dict(connection.settings_dict, POOL=pool):
+            connection.close()
+            pid = self.backend_pid()
+            connection.close()
+
+            self.assertNotEqual(self.backend_pid(), pid)
+            connection.close()
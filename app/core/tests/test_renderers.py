@@ -0,0 +1,147 @@
+"""
+Tests for the MessagePack and orjson renderers and parsers.
+"""
+import io
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import msgpack
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.parsers import FastJSONParser, MessagePackParser
+from core.renderers import FastJSONRenderer, MessagePackRenderer
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+ME_URL = reverse('user:me')
+TOKEN_URL = reverse('user:token')
+
+MSGPACK = 'application/msgpack'
+
+
+class RendererTests(SimpleTestCase):
+    """Test the renderers and parsers directly."""
+
+    data = {
+        'price': Decimal('5.50'),
+        'created': datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        'title': 'Caf\xe9 \u2028\u2029',
+        1: [None, True, 1.5],
+    }
+
+    def test_fast_json_matches_json_renderer(self):
+        """Test orjson output is byte for byte JSONRenderer's."""
+        self.assertEqual(
+            FastJSONRenderer().render(self.data),
+            JSONRenderer().render(self.data),
+        )
+
+    def test_fast_json_indent(self):
+        """Test indented output is left to JSONRenderer."""
+        media_type = 'application/json; indent=4'
+
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, media_type),
+            JSONRenderer().render(self.data, media_type),
+        )
+
+    def test_msgpack_keeps_decimals_exact(self):
+        """Test decimals are encoded as their exact string."""
+        output = MessagePackRenderer().render({'price': Decimal('0.10')})
+
+        self.assertEqual(msgpack.unpackb(output), {'price': '0.10'})
+
+    def test_parse_errors(self):
+        """Test malformed bodies raise ParseError."""
+        for parser, body in (
+            (FastJSONParser(), b'{"title":'),
+            (MessagePackParser(), b'\xc1'),
+            (MessagePackParser(), msgpack.packb({'a': 1}) + b'\x01'),
+        ):
+            with self.assertRaises(ParseError):
+                parser.parse(io.BytesIO(body))
+
+
+class MessagePackApiTests(TestCase):
+    """Test MessagePack content negotiation on the APIs."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_recipes(self):
+        """Test recipes are rendered for Accept: application/msgpack."""
+        Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=5,
+            price=Decimal('5.50'),
+        )
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], MSGPACK)
+        data = msgpack.unpackb(res.content)
+        self.assertEqual(data['results'][0]['price'], '5.50')
+        self.assertEqual(data['results'][0]['title'], 'Sample recipe')
+
+    def test_create_recipe(self):
+        """Test creating a recipe from a MessagePack body."""
+        payload = {
+            'title': 'Sample recipe',
+            'time_minutes': 5,
+            'price': '12.34',
+            'tags': [{'name': 'Thai'}],
+        }
+
+        res = self.client.post(
+            RECIPES_URL,
+            msgpack.packb(payload),
+            content_type=MSGPACK,
+            HTTP_ACCEPT=MSGPACK,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.price, Decimal('12.34'))
+        self.assertEqual(msgpack.unpackb(res.content)['price'], '12.34')
+
+    def test_invalid_body(self):
+        """Test a malformed MessagePack body returns 400."""
+        res = self.client.post(RECIPES_URL, b'\xc1', content_type=MSGPACK)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_endpoints(self):
+        """Test the user profile and token endpoints speak MessagePack."""
+        res = self.client.get(ME_URL, HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual(msgpack.unpackb(res.content)['name'], 'Test Name')
+
+        res = APIClient().post(
+            TOKEN_URL,
+            msgpack.packb({
+                'email': 'user@example.com',
+                'password': 'testpass123',
+            }),
+            content_type=MSGPACK,
+            HTTP_ACCEPT=MSGPACK,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('token', msgpack.unpackb(res.content))
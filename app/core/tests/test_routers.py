@@ -0,0 +1,212 @@
+"""
+Tests for routing reads to replicas.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from core import routers
+from core.routers import ReplicaRouter
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Test the router outside of requests."""
+
+    def test_reads_use_primary_outside_views(self):
+        """Test reads go to the primary without a replica chosen."""
+        self.assertIsNone(ReplicaRouter().db_for_read(Recipe))
+
+    def test_writes_use_primary(self):
+        """Test objects loaded from a replica are saved to the primary."""
+        tag = Tag(name='Vegan')
+        tag._state.db = 'replica'
+
+        self.assertEqual(
+            ReplicaRouter().db_for_write(Tag, instance=tag),
+            'default',
+        )
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaReadTests(TransactionTestCase):
+    """Test requests against a separate replica database.
+
+    The replica is not replicated, so rows created only there (or only on
+    the primary) show which database served a request.
+    """
+    # Resolved in setUpClass, once the replica alias exists.
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        default = connections.databases['default']
+        connections.databases['replica'] = dict(
+            default,
+            TEST=dict(default['TEST'], NAME='test_replica_router'),
+        )
+        with override_settings(DATABASE_REPLICAS=['replica']):
+            creation = connections['replica'].creation
+            cls.replica_name = creation.create_test_db(
+                verbosity=0,
+                autoclobber=True,
+                serialize=False,
+            )
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].creation.destroy_test_db(
+            cls.replica_name,
+            verbosity=0,
+        )
+        del connections['replica']
+        del connections.databases['replica']
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.user.save(using='replica')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_reads_replica(self):
+        """Test recipe and tag lists are served from the replica."""
+        Recipe.objects.using('replica').create(
+            user=self.user,
+            title='Replica recipe',
+            time_minutes=5,
+            price=Decimal('1.00'),
+        )
+        Tag.objects.create(user=self.user, name='Primary tag')
+
+        recipes = self.client.get(RECIPES_URL)
+        tags = self.client.get(TAGS_URL)
+
+        self.assertEqual(recipes.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['title'] for recipe in recipes.data['results']],
+            ['Replica recipe'],
+        )
+        self.assertEqual(tags.data['results'], [])
+
+    def test_reads_after_write_use_primary(self):
+        """Test a user reads their own writes right after making them."""
+        payload = {
+            'title': 'New recipe',
+            'time_minutes': 10,
+            'price': Decimal('2.50'),
+        }
+        res = self.client.post(RECIPES_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(
+            [recipe['title'] for recipe in res.data['results']],
+            ['New recipe'],
+        )
+        self.assertFalse(Recipe.objects.using('replica').exists())
+
+    def test_pin_shared_by_workers(self):
+        """Test the pin holds without any worker's cache."""
+        self.client.post(RECIPES_URL, {
+            'title': 'New recipe',
+            'time_minutes': 10,
+            'price': Decimal('2.50'),
+        })
+        cache.clear()
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self):
+        """Test reads return to the replica once the pin expires."""
+        payload = {
+            'title': 'New recipe',
+            'time_minutes': 10,
+            'price': Decimal('2.50'),
+        }
+        self.client.post(RECIPES_URL, payload)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_pin_is_per_user(self):
+        """Test a write only pins the user who made it."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        other.save(using='replica')
+        self.client.post(RECIPES_URL, {
+            'title': 'New recipe',
+            'time_minutes': 10,
+            'price': Decimal('2.50'),
+        })
+        Tag.objects.create(user=other, name='Primary tag')
+        client = APIClient()
+        client.force_authenticate(other)
+
+        res = client.get(TAGS_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_pin_covers_every_client(self):
+        """Test a write pins the user's other clients, cookies or not."""
+        self.client.post(RECIPES_URL, {
+            'title': 'New recipe',
+            'time_minutes': 10,
+            'price': Decimal('2.50'),
+        })
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_replica_read_cached_under_its_version(self):
+        """Test a write racing a replica read cannot hide itself."""
+        is_pinned = routers.is_pinned
+
+        def write_meanwhile(user):
+            pinned = is_pinned(user)
+            Recipe.objects.create(
+                user=self.user,
+                title='New recipe',
+                time_minutes=10,
+                price=Decimal('2.50'),
+            )
+            routers.pin(user)
+            return pinned
+
+        with patch('core.routers.is_pinned', write_meanwhile):
+            res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.data['results'], [])
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(
+            [recipe['title'] for recipe in res.data['results']],
+            ['New recipe'],
+        )
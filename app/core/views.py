@@ -0,0 +1,55 @@
+"""
+Views for the core app.
+"""
+from drf_spectacular.utils import extend_schema
+
+from django.conf import settings
+
+from rest_framework import permissions
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.metrics import metrics, render
+from user.authentication import CachedTokenAuthentication
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Render pre-formatted Prometheus text."""
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, str):
+            # Error details such as a permission denial.
+            data = f"{data.get('detail', data)}\n"
+        return data.encode(self.charset)
+
+
+class IsStaffOrInternal(permissions.BasePermission):
+    """Allow staff users and requests from METRICS_ALLOWED_IPS."""
+
+    def has_permission(self, request, view):
+        if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+            return True
+        return bool(request.user and request.user.is_staff)
+
+
+@extend_schema(exclude=True)
+class MetricsView(APIView):
+    """Expose per-view request metrics for Prometheus."""
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SessionAuthentication,
+    ]
+    permission_classes = [IsStaffOrInternal]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request):
+        """Return the metrics of every worker."""
+        return Response(
+            render(metrics.collect()),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
@@ -0,0 +1,95 @@
+"""
+Async views for the recipe APIs, served under ASGI (see app/urls_async.py).
+
+Reads run the DRF views, ORM work and rendering included, in a bounded
+thread pool. The event loop then writes the rendered body to the client in
+chunks, so a slow client holds a coroutine rather than a worker thread.
+Writes keep running the sync views.
+"""
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+from rest_framework.permissions import SAFE_METHODS
+
+from core.middleware import QueryCounter, count_queries
+
+
+# Actions served from the thread pool.
+READ_ACTIONS = {'list', 'retrieve'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the pool running async reads, ASYNC_READ_THREADS wide."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_READ_THREADS,
+                thread_name_prefix='async-read',
+            )
+
+    return _executor
+
+
+def _run_view(view, request, *args, **kwargs):
+    """Run a sync view and render its response, in a worker thread."""
+    queries = getattr(request, 'query_counter', None) or QueryCounter()
+    close_old_connections()
+    try:
+        with count_queries(queries):
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+    finally:
+        close_old_connections()
+
+    return response
+
+
+def async_read_view(view):
+    """Return an async version of a DRF viewset view.
+
+    Safe methods run in the read pool; other methods run the sync view in
+    the thread Django uses for sync code.
+    """
+    read = sync_to_async(
+        _run_view,
+        thread_sensitive=False,
+        executor=get_executor(),
+    )
+    write = sync_to_async(_run_view)
+
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await read(view, request, *args, **kwargs)
+        return await write(view, request, *args, **kwargs)
+
+    return async_view
+
+
+def async_reads(patterns):
+    """Return router patterns with list and retrieve routes made async."""
+    result = []
+    for pattern in patterns:
+        actions = getattr(pattern.callback, 'actions', {})
+        if READ_ACTIONS & set(actions.values()):
+            pattern = URLPattern(
+                pattern.pattern,
+                async_read_view(pattern.callback),
+                pattern.default_args,
+                pattern.name,
+            )
+        result.append(pattern)
+
+    return result
@@ -0,0 +1,128 @@
+"""
+As-you-type name suggestions for tags and ingredients.
+
+Terms of three or more characters match names containing the term or
+similar to it (pg_trgm), ranked by prefix match and then similarity, and
+are served by the (user_id, name gin_trgm_ops) GIN indexes. Containment
+is tested with name ILIKE '%term%' rather than icontains, whose
+UPPER(name::text) LIKE does not match the indexed column. Shorter terms
+are prefix matches read in order from the (user_id, upper(name) COLLATE
+"C", name) btree indexes, since trigrams cannot narrow them down. Without
+pg_trgm installed, longer terms fall back to containment matches.
+"""
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import (
+    BooleanField,
+    Case,
+    CharField,
+    Lookup,
+    Q,
+    Value,
+    When,
+)
+from django.db.models.functions import Collate, Upper
+
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+
+# Shortest term trigram matching can narrow down.
+MIN_TRIGRAM_LENGTH = 3
+
+DEFAULT_LIMIT = 10
+
+MAX_LIMIT = 50
+
+# Case-insensitive name order matching the prefix indexes.
+NAME_ORDER = [Collate(Upper('name'), 'C'), 'name']
+
+
+@CharField.register_lookup
+class TrigramContains(Lookup):
+    """Case-insensitive containment as name ILIKE '%term%'."""
+
+    lookup_name = 'trigram_contains'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        params = lhs_params + [
+            '%{}%'.format(connection.ops.prep_for_like_query(param))
+            for param in rhs_params
+        ]
+
+        return f'{lhs} ILIKE {rhs}', params
+
+
+# Whether pg_trgm is installed, per database alias.
+_trigram = {}
+
+
+def has_trigram(alias):
+    """Return True if the pg_trgm extension is installed on alias."""
+    if alias not in _trigram:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+            )
+            _trigram[alias] = cursor.fetchone() is not None
+
+    return _trigram[alias]
+
+
+def suggest(queryset, term, limit=DEFAULT_LIMIT):
+    """Return up to limit objects of queryset whose name matches term."""
+    queryset = queryset.order_by()
+    if len(term) < MIN_TRIGRAM_LENGTH:
+        return queryset.filter(name__istartswith=term).order_by(
+            *NAME_ORDER,
+        )[:limit]
+
+    prefix = Case(
+        When(name__istartswith=term, then=Value(True)),
+        default=Value(False),
+        output_field=BooleanField(),
+    )
+    if not has_trigram(queryset.db):
+        return queryset.filter(name__trigram_contains=term).annotate(
+            prefix=prefix,
+        ).order_by('-prefix', *NAME_ORDER)[:limit]
+
+    return queryset.filter(
+        Q(name__trigram_contains=term) | Q(name__trigram_similar=term),
+    ).annotate(
+        prefix=prefix,
+        similarity=TrigramSimilarity('name', term),
+    ).order_by('-prefix', '-similarity', 'name')[:limit]
+
+
+class AutocompleteMixin:
+    """Add an autocomplete action over the view's queryset.
+
+    GET <list url>/autocomplete/?q=<term>&limit=<n> returns the best
+    matches, unpaginated.
+    """
+
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def autocomplete(self, request):
+        """Suggest names matching ?q=, best matches first."""
+        term = request.query_params.get('q', '').strip()
+        if '\x00' in term:
+            raise ValidationError({'q': ['Null characters are not allowed.']})
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            raise ValidationError({'limit': ['Expected an integer.']})
+        if not 0 < limit <= MAX_LIMIT:
+            raise ValidationError(
+                {'limit': [f'Expected a number from 1 to {MAX_LIMIT}.']}
+            )
+        if not term:
+            return Response([])
+
+        objs = suggest(self.get_queryset(), term, limit)
+        serializer = self.get_serializer(objs, many=True)
+
+        return Response(serializer.data)
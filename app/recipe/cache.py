@@ -0,0 +1,248 @@
+"""
+Per-user versioned response cache for recipe APIs.
+
+Cached responses are keyed by the user's current data version, so bumping
+the version on any write makes every older entry unreachable; stale entries
+are then aged out by the backend's LRU eviction. Versions live in the
+database (core.models.CacheVersion) rather than the cache, so a write seen
+by one worker invalidates the entries of every worker, even with a
+process-local cache backend.
+"""
+import contextlib
+import hashlib
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import (
+    Count,
+    F,
+    Max,
+)
+from django.utils.cache import get_conditional_response
+from django.utils.http import (
+    http_date,
+    quote_etag,
+)
+
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from core.models import CacheVersion
+from core.routers import snapshot_version
+from core.stats import CacheStats
+
+
+stats = CacheStats('recipe')
+
+
+def get_cache():
+    """Return the cache backend configured for recipe responses."""
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+# User ids bumped inside deferred_bumps(), or None outside of it.
+_deferred = ContextVar('deferred_bumps', default=None)
+
+
+def _versions():
+    # Always the primary, which every write bumps.
+    return CacheVersion.objects.using(DEFAULT_DB_ALIAS)
+
+
+def create_version(user_id):
+    """Create the version row of a new user."""
+    # Seeded from the clock so a re-created version (e.g. after the
+    # database is reset) never matches entries cached earlier.
+    _versions().bulk_create(
+        [CacheVersion(user_id=user_id, version=time.time_ns())],
+        ignore_conflicts=True,
+    )
+
+
+def get_version(user_id):
+    """Return the current data version for a user.
+
+    That is the version read along with the request's replica pin, if
+    any, so a replica read is never cached under a later version.
+    """
+    version = snapshot_version(user_id)
+    if version is not None:
+        return version
+    versions = _versions().filter(user_id=user_id)
+    version = versions.values_list('version', flat=True)[:1]
+    if not version:
+        create_version(user_id)
+        version = versions.values_list('version', flat=True)[:1]
+
+    return version[0]
+
+
+def bump_version(user_id):
+    """Invalidate every cached response for a user.
+
+    Without a version row nothing can have been cached for the user.
+    """
+    deferred = _deferred.get()
+    if deferred is not None:
+        deferred.add(user_id)
+        return
+
+    _versions().filter(user_id=user_id).update(version=F('version') + 1)
+
+
+@contextlib.contextmanager
+def deferred_bumps():
+    """Bump each version once on exit, however many writes bump it."""
+    token = _deferred.set(set())
+    try:
+        yield
+    finally:
+        user_ids = _deferred.get()
+        _deferred.reset(token)
+        if user_ids:
+            _versions().filter(user_id__in=user_ids).update(
+                version=F('version') + 1,
+            )
+
+
+class CachedResponseMixin:
+    """Serve safe requests from the per-user versioned cache.
+
+    Views wrap their read handlers with `cached_response`. Views that
+    implement `get_validators` also get strong ETag and Last-Modified
+    headers, 304 answers to conditional GETs and 412 answers to failed
+    If-Match preconditions, all decided without serializing anything.
+    Any successful unsafe request made through the view bumps the user's
+    version.
+    """
+
+    def get_validators(self, request):
+        """Return (etag, last_modified) for the requested resource.
+
+        Return None when the resource does not exist or the view does not
+        support conditional requests.
+        """
+        return None
+
+    def _response_cache_key(self, request):
+        user_id = request.user.pk
+        # Each representation has its own entry, as its validators differ.
+        digest = hashlib.md5('{}:{}'.format(
+            request.build_absolute_uri(),
+            request.accepted_media_type,
+        ).encode()).hexdigest()
+        return 'recipe:response:{}:{}:{}:{}:{}'.format(
+            user_id,
+            get_version(user_id),
+            type(self).__name__,
+            self.action,
+            digest,
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Return the cached response for request or call handler."""
+        cache = get_cache()
+        key = self._response_cache_key(request)
+        entry = cache.get(key)
+        stats.record(entry is not None)
+        if entry is not None:
+            data, validators = entry
+        else:
+            validators = self.get_validators(request)
+
+        if validators is not None:
+            not_modified = get_conditional_response(
+                request,
+                etag=validators[0],
+                last_modified=validators[1],
+            )
+            if not_modified is not None:
+                return _set_validator_headers(not_modified, validators)
+
+        if entry is not None:
+            response = Response(data)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cache.set(key, (response.data, validators))
+
+        return _set_validator_headers(response, validators)
+
+    def precondition_response(self, handler, request, *args, **kwargs):
+        """Call handler unless an If-Match precondition fails."""
+        if (
+            'HTTP_IF_MATCH' in request.META
+            or 'HTTP_IF_UNMODIFIED_SINCE' in request.META
+        ):
+            validators = self.get_validators(request)
+            if validators is not None:
+                failed = get_conditional_response(
+                    request,
+                    etag=validators[0],
+                    last_modified=validators[1],
+                )
+                if failed is not None:
+                    return failed
+
+        return handler(request, *args, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        """Bump versions once per unsafe request."""
+        if request.method in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+
+        with deferred_bumps():
+            return super().dispatch(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Bump the user's version after a successful write."""
+        if (
+            request.method not in SAFE_METHODS
+            and request.user.is_authenticated
+            and response.status_code < 400
+        ):
+            bump_version(request.user.pk)
+
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def _set_validator_headers(response, validators):
+    if validators is not None:
+        etag, last_modified = validators
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+
+    return response
+
+
+def aggregate_validators(request, queryset, allow_empty=True):
+    """Return (etag, last_modified) for the objects in queryset.
+
+    One aggregate query over updated_at; the ETag also covers the URL and
+    negotiated media type so each representation gets its own tag.
+    Return None for an empty queryset unless allow_empty is set.
+    """
+    result = queryset.order_by().aggregate(
+        count=Count('pk'),
+        last_modified=Max('updated_at'),
+    )
+    if not result['count'] and not allow_empty:
+        return None
+
+    last_modified = result['last_modified']
+    digest = hashlib.md5('{}:{}:{}:{}'.format(
+        result['count'],
+        last_modified.isoformat() if last_modified else '',
+        request.build_absolute_uri(),
+        getattr(request, 'accepted_media_type', ''),
+    ).encode()).hexdigest()
+    # HTTP dates have one-second resolution.
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    return quote_etag(digest), timestamp
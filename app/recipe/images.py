@@ -0,0 +1,230 @@
+"""
+Recipe image uploads.
+
+Uploads stream to a temporary file in 64 KiB chunks, within
+RECIPE_IMAGE_MAX_BYTES, and are moved into storage rather than read into
+memory. Resizing is CPU bound, so the variants are rendered by a pool of
+RECIPE_IMAGE_WORKERS processes after the request returns, and
+Recipe.image_variants is filled in once they are saved. A pool broken by
+a dying worker is discarded, and replaced on the next upload.
+"""
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.uploadhandler import (
+    FileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+from django.db import connection, transaction
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.models import Recipe
+from recipe.cache import bump_version
+from recipe.thumbnails import render_variants
+
+
+logger = logging.getLogger(__name__)
+
+# Variant names and the (width, height) each is fitted within.
+VARIANTS = {
+    'thumbnail': (200, 200),
+    'medium': (800, 800),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Renders queued or running, bounded by RECIPE_IMAGE_MAX_PENDING.
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+class ImageTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Image too large.'
+    default_code = 'image_too_large'
+
+
+class ImageQueueFull(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many images are being processed, try again later.'
+    default_code = 'image_queue_full'
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """Reject uploads over RECIPE_IMAGE_MAX_BYTES.
+
+    The Content-Length is checked before reading the body, and each file
+    again as its chunks arrive.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        self.max_bytes = settings.RECIPE_IMAGE_MAX_BYTES
+        if content_length > self.max_bytes:
+            self._too_large()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_bytes:
+            self._too_large()
+
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+    def _too_large(self):
+        raise ImageTooLarge(
+            f'Ensure the upload is at most {self.max_bytes} bytes.'
+        )
+
+
+def upload_handlers(request):
+    """Return the upload handlers streaming an image to a temporary file."""
+    return [
+        LimitedUploadHandler(request),
+        TemporaryFileUploadHandler(request),
+    ]
+
+
+def get_executor():
+    """Return the pool rendering variants, RECIPE_IMAGE_WORKERS wide.
+
+    Workers are spawned rather than forked, so they share no database
+    connections or threads with the web worker.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+
+    return _executor
+
+
+def discard_executor(executor):
+    """Stop using executor, so the next get_executor() starts a new pool."""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+
+def variant_names(name):
+    """Return {variant: storage name} for the image stored as name."""
+    root = os.path.splitext(name)[0]
+
+    return {variant: f'{root}_{variant}.jpg' for variant in VARIANTS}
+
+
+def reserve():
+    """Reserve a render slot, or raise ImageQueueFull when none is free."""
+    global _pending
+    with _pending_lock:
+        if _pending >= settings.RECIPE_IMAGE_MAX_PENDING:
+            raise ImageQueueFull()
+        _pending += 1
+
+
+def release():
+    """Release a render slot."""
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+
+def render(recipe):
+    """Render the variants of recipe.image in the pool.
+
+    The caller holds a reserved slot, released once rendering completes or
+    by the caller if this raises. Return the future; recipe.image_variants
+    is saved once it completes.
+    """
+    storage = recipe.image.storage
+    names = variant_names(recipe.image.name)
+    args = (
+        render_variants,
+        storage.path(recipe.image.name),
+        {storage.path(names[variant]): VARIANTS[variant]
+         for variant in VARIANTS},
+    )
+    executor = get_executor()
+    try:
+        future = executor.submit(*args)
+    except BrokenProcessPool:
+        discard_executor(executor)
+        executor = get_executor()
+        future = executor.submit(*args)
+    future.add_done_callback(functools.partial(
+        _variants_rendered,
+        executor,
+        recipe.pk,
+        recipe.user_id,
+        recipe.image.name,
+        names,
+    ))
+
+    return future
+
+
+def render_on_commit(recipe):
+    """Render the variants of recipe.image once its name is committed.
+
+    Rendering sooner could finish first and find the old name saved. If
+    the pool then cannot take the image, the slot is released and the
+    image kept without variants.
+    """
+    def submit():
+        try:
+            render(recipe)
+        except Exception:
+            release()
+            logger.exception(
+                'Queueing variants of %s failed',
+                recipe.image.name,
+            )
+
+    transaction.on_commit(submit)
+
+
+def _variants_rendered(executor, recipe_id, user_id, name, names, future):
+    """Save rendered variant names, unless the image was replaced."""
+    release()
+    if isinstance(future.exception(), BrokenProcessPool):
+        discard_executor(executor)
+    if future.exception() is not None:
+        logger.error(
+            'Rendering variants of %s failed',
+            name,
+            exc_info=future.exception(),
+        )
+        return
+
+    try:
+        updated = Recipe.objects.filter(pk=recipe_id, image=name).update(
+            image_variants=names,
+            updated_at=timezone.now(),
+        )
+        if updated:
+            bump_version(user_id)
+        else:
+            storage = Recipe._meta.get_field('image').storage
+            for variant_name in names.values():
+                storage.delete(variant_name)
+    except Exception:
+        logger.exception('Saving variants of %s failed', name)
+    finally:
+        # Called in the pool's thread, outside any request.
+        connection.close()
@@ -0,0 +1,44 @@
+"""
+Pagination classes for recipe APIs.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """Keyset pagination over a user's objects with opaque cursors.
+
+    The ordering must be unique within a user and backed by an index
+    leading with user_id, so each page is an index range scan no matter
+    how deep the client has paged.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class RecipeCursorPagination(UserCursorPagination):
+    """Paginate recipes in the order the view sorted them.
+
+    Recipes default to newest first, backed by the (user, id) index. Other
+    orderings (see RecipeViewSet) end in id and have their own indexes.
+    """
+    ordering = '-id'
+
+    def get_ordering(self, request, queryset, view):
+        if queryset.query.order_by:
+            return tuple(queryset.query.order_by)
+
+        return super().get_ordering(request, queryset, view)
+
+
+class TagCursorPagination(UserCursorPagination):
+    """Paginate tags by name, backed by the (user, name) unique index."""
+    ordering = '-name'
+
+
+class IngredientCursorPagination(UserCursorPagination):
+    """Paginate ingredients by name, backed by the (user, name) index.
+
+    Names are not unique, so ties are broken by id.
+    """
+    ordering = ('-name', '-id')
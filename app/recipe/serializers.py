@@ -1,14 +1,49 @@
 """
 Serializers for recipe APIs
 """
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
 from rest_framework import serializers
 
 # from core.models import Recipe
 from core.models import (
+    Ingredient,
     Recipe,
     Tag,
 )
 
+from recipe.cache import bump_version
+
+
+def resolve_tags(user, names):
+    """Return {name: tag} for names, creating missing tags in bulk."""
+    names = set(names)
+    if not names:
+        return {}
+
+    tags = {
+        tag.name: tag
+        for tag in Tag.objects.filter(user=user, name__in=names)
+    }
+    missing = names - tags.keys()
+    if missing:
+        # Tags created concurrently by another request are skipped by
+        # the (user, name) constraint and picked up by the re-select.
+        Tag.objects.bulk_create(
+            [Tag(user=user, name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        tags.update(
+            (tag.name, tag)
+            for tag in Tag.objects.filter(user=user, name__in=missing)
+        )
+
+    return tags
+
+
 # Create Tag API, Step 6: Create TagSerializer in recipe/serializers.py (Implement tag listing API)
 class TagSerializer(serializers.ModelSerializer):
     """Serializer for tags."""
@@ -18,20 +53,150 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
         read_only_fields = ['id']
 
+    def validate_name(self, value):
+        """Reject a name the user already has another tag with.
+
+        Nested in a recipe, tags are looked up by name, so only tags
+        written directly are checked.
+        """
+        if self.parent is not None:
+            return value
+        tags = Tag.objects.filter(
+            user=self.context['request'].user,
+            name=value,
+        )
+        if self.instance is not None:
+            tags = tags.exclude(pk=self.instance.pk)
+        if tags.exists():
+            raise serializers.ValidationError(
+                'You already have a tag with this name.'
+            )
+
+        return value
+
 # open recipe/views.py
 
 
+class IngredientSerializer(serializers.ModelSerializer):
+    """Serializer for ingredients."""
+
+    class Meta:
+        model = Ingredient
+        fields = ['id', 'name']
+        read_only_fields = ['id']
+
+
+class TagUsageSerializer(TagSerializer):
+    """Serializer for tags with the number of recipes using them."""
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['recipe_count']
+        read_only_fields = TagSerializer.Meta.read_only_fields + [
+            'recipe_count',
+        ]
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Create and update many recipes with bulk statements."""
+
+    def _set_tags(self, recipes, tags_per_recipe, old_tag_ids=()):
+        """Add tags to recipes with one through-table insert.
+
+        Bulk inserts bypass m2m_changed, so the recipe_count of the added
+        tags and of old_tag_ids (the tags just removed) is recounted.
+        """
+        auth_user = self.context['request'].user
+        tag_objs = resolve_tags(
+            auth_user,
+            [tag['name'] for tags in tags_per_recipe for tag in tags],
+        )
+        RecipeTag = Recipe.tags.through
+        RecipeTag.objects.bulk_create(
+            [
+                RecipeTag(recipe_id=recipe.id, tag_id=tag_objs[name].id)
+                for recipe, tags in zip(recipes, tags_per_recipe)
+                for name in {tag['name'] for tag in tags}
+            ],
+            ignore_conflicts=True,
+        )
+        tag_ids = {tag.id for tag in tag_objs.values()}.union(old_tag_ids)
+        if tag_ids:
+            Tag.objects.filter(pk__in=tag_ids).recount()
+
+    def create(self, validated_data):
+        """Create recipes with one insert per table."""
+        tags_per_recipe = [item.pop('tags', []) for item in validated_data]
+        recipes = Recipe.objects.bulk_create(
+            [Recipe(**item) for item in validated_data],
+        )
+        self._set_tags(recipes, tags_per_recipe)
+        # Bulk statements bypass the model signals.
+        bump_version(self.context['request'].user.pk)
+
+        return recipes
+
+    def update(self, instances, validated_data):
+        """Update recipes with one statement per table."""
+        now = timezone.now()
+        fields = {'updated_at'}
+        retagged = []
+        for recipe, item in zip(instances, validated_data):
+            tags = item.pop('tags', None)
+            if tags is not None:
+                retagged.append((recipe, tags))
+            for attr, value in item.items():
+                setattr(recipe, attr, value)
+                fields.add(attr)
+            recipe.updated_at = now
+
+        Recipe.objects.bulk_update(instances, fields)
+        if retagged:
+            recipes, tags_per_recipe = zip(*retagged)
+            old_tags = Recipe.tags.through.objects.filter(recipe__in=recipes)
+            old_tag_ids = set(old_tags.values_list('tag_id', flat=True))
+            old_tags.delete()
+            self._set_tags(recipes, tags_per_recipe, old_tag_ids)
+        bump_version(self.context['request'].user.pk)
+
+        return instances
+
+
 class RecipeSerializer(serializers.ModelSerializer):
-    """Serializer for recipes."""
+    """Serializer for recipes.
+
+    Pass fields (see select_fields) to output only some of them.
+    """
     # Create Tag API, Step 13: Implement create tag feature
     # Use nested serializer, session 100
     tags = TagSerializer(many=True, required=False)
+    ingredients = IngredientSerializer(many=True, read_only=True)
 
     class Meta:
         model = Recipe
         # fields = ['id', 'title', 'time_minutes', 'price', 'link']
-        fields = ['id', 'title', 'time_minutes', 'price', 'link', 'tags']
+        fields = [
+            'id', 'title', 'time_minutes', 'price', 'link', 'tags',
+            'ingredients',
+        ]
         read_only_fields = ['id']
+        list_serializer_class = RecipeListSerializer
+        # Relations, loaded only when output.
+        expandable_fields = ['tags', 'ingredients']
+        # Output only when requested with ?expand= or ?fields=.
+        expand_only_fields = ['ingredients']
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.selected_fields = fields
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.selected_fields is not None:
+            selected = self.selected_fields
+        else:
+            selected = default_fields(type(self))
+
+        return {name: fields[name] for name in selected}
 
     # Create Recipe API Step 14: Change create() method in recipe/serializers.py to support update feature
     # after this step, run "docker compose up" to run server,
@@ -46,12 +211,10 @@ class RecipeSerializer(serializers.ModelSerializer):
     def _get_or_create_tags(self, tags, recipe):
         """Handle getting or creating tags as needed."""
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            recipe.tags.add(tag_obj)
+        tag_objs = resolve_tags(auth_user, [tag['name'] for tag in tags])
+        if tag_objs:
+            # A single bulk insert into the through table.
+            recipe.tags.add(*tag_objs.values())
 
     def create(self, validated_data):
         """Create a recipe."""
@@ -95,15 +258,212 @@ class RecipeSerializer(serializers.ModelSerializer):
     #     return recipe
     # # For Step 13, Run test and pass
 
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """URLs of the rendered image variants, by variant name."""
+
+    def to_representation(self, value):
+        storage = Recipe._meta.get_field('image').storage
+        request = self.context.get('request')
+        urls = {}
+        for variant, name in value.items():
+            url = storage.url(name)
+            urls[variant] = (
+                request.build_absolute_uri(url) if request is not None
+                else url
+            )
+
+        return urls
+
+
 class RecipeDetailSerializer(RecipeSerializer):
     """Serializer for recipe detail view."""
+    image = serializers.ImageField(read_only=True)
+    # Empty until the variants of the current image are rendered.
+    image_variants = ImageVariantsField()
 
 # RecipeDetailSerializer is an extension of RecipeSerialier therefore use it as the base class
 # Add extra fields
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ['description']
+        fields = RecipeSerializer.Meta.fields + [
+            'description', 'image', 'image_variants',
+        ]
         # just add one field 'description'
 
+
+class RecipeImageSerializer(serializers.ModelSerializer):
+    """Serializer for uploading images to recipes."""
+    image_variants = ImageVariantsField()
+
+    class Meta:
+        model = Recipe
+        fields = ['id', 'image', 'image_variants']
+        read_only_fields = ['id']
+        extra_kwargs = {'image': {'required': True}}
+
+    def validate_image(self, value):
+        """Reject images too large to decode safely."""
+        width, height = value.image.size
+        max_pixels = settings.RECIPE_IMAGE_MAX_PIXELS
+        if width * height > max_pixels:
+            raise serializers.ValidationError(
+                f'Ensure the image has at most {max_pixels} pixels.'
+            )
+
+        return value
+
+    def update(self, instance, validated_data):
+        """Replace the image, deleting the old one and its variants."""
+        old_names = []
+        if instance.image:
+            old_names = [
+                instance.image.name,
+                *instance.image_variants.values(),
+            ]
+        instance.image_variants = {}
+        instance = super().update(instance, validated_data)
+        storage = instance.image.storage
+
+        def delete_old_files():
+            for name in old_names:
+                storage.delete(name)
+
+        # A rolled back replacement still needs the old files.
+        transaction.on_commit(delete_old_files)
+
+        return instance
+
+
+def default_fields(serializer_class):
+    """Return the fields serializer_class outputs when none are selected."""
+    meta = serializer_class.Meta
+    expand_only = getattr(meta, 'expand_only_fields', [])
+
+    return [name for name in meta.fields if name not in expand_only]
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def select_fields(serializer_class, fields=None, expand=None):
+    """Return the fields to output for ?fields= and ?expand= values.
+
+    fields lists the fields to output, in place of the defaults; expand
+    adds relations to them. Fields keep the serializer's order. Return None
+    when neither is given; fields naming nothing, like ",", is invalid.
+    """
+    if not fields and not expand:
+        return None
+
+    meta = serializer_class.Meta
+    names = _names(fields) if fields else default_fields(serializer_class)
+    if not names:
+        raise serializers.ValidationError(
+            {'fields': ['Select at least one field.']}
+        )
+    unknown = set(names) - set(meta.fields)
+    if unknown:
+        raise serializers.ValidationError(
+            {'fields': [f'Unknown fields: {", ".join(sorted(unknown))}.']}
+        )
+    relations = _names(expand) if expand else []
+    unknown = set(relations) - set(meta.expandable_fields)
+    if unknown:
+        raise serializers.ValidationError(
+            {'expand': [f'Unknown relations: {", ".join(sorted(unknown))}.']}
+        )
+    selected = set(names).union(relations)
+
+    return [name for name in meta.fields if name in selected]
+
+
+def tags_prefetch():
+    """Return the tags prefetch of the recipe read paths, in id order."""
+    return Prefetch('tags', queryset=Tag.objects.order_by('id'))
+
+
+def ingredients_prefetch():
+    """Return the ingredients prefetch of the recipe read paths."""
+    return Prefetch('ingredients', queryset=Ingredient.objects.order_by('id'))
+
+
+# Prefetches of the expandable recipe relations.
+RELATION_PREFETCHES = {
+    'tags': tags_prefetch,
+    'ingredients': ingredients_prefetch,
+}
+
+# RecipeSerializer fields, in output order, read straight from values().
+RECIPE_LIST_FIELDS = ['id', 'title', 'time_minutes', 'price', 'link']
+
+
+def recipe_list_values(queryset, fields=None):
+    """Return queryset as the values() rows recipe_list_data expects.
+
+    Only the columns among fields are read, plus the id and the ordering
+    columns cursor pagination reads its positions from.
+    """
+    ordering = {name.lstrip('-') for name in queryset.query.order_by}
+    selected = set(fields or RECIPE_LIST_FIELDS).union(ordering)
+    columns = ['id'] + [
+        name for name in RECIPE_LIST_FIELDS
+        if name in selected and name != 'id'
+    ]
+    # Annotations are kept for cursor pagination, which reads its
+    # ordering fields from each row.
+    return queryset.prefetch_related(None).values(
+        *columns,
+        *queryset.query.annotations,
+    )
+
+
+def _related_names(rows, relation):
+    """Return {recipe_id: [{'id', 'name'}]} for a relation, in one query."""
+    field = getattr(Recipe, relation).field
+    target = field.m2m_reverse_field_name()
+    related = {}
+    pairs = field.remote_field.through.objects.filter(
+        recipe_id__in=[row['id'] for row in rows],
+    ).order_by(f'{target}_id').values_list(
+        'recipe_id',
+        f'{target}_id',
+        f'{target}__name',
+    )
+    for recipe_id, pk, name in pairs:
+        related.setdefault(recipe_id, []).append({'id': pk, 'name': name})
+
+    return related
+
+
+def recipe_list_data(rows, fields=None):
+    """Return the RecipeSerializer(many=True) output for values() rows.
+
+    Plain dicts are built directly instead of dispatching to_representation
+    per field, with each selected relation of all rows loaded in one query.
+    """
+    if not rows:
+        return []
+
+    fields = fields or default_fields(RecipeSerializer)
+    related = {
+        name: _related_names(rows, name)
+        for name in fields
+        if name in RecipeSerializer.Meta.expandable_fields
+    }
+    data = []
+    for row in rows:
+        # Relations are placeholders here, so keys keep the field order.
+        item = {name: row.get(name) for name in fields}
+        for name, by_recipe in related.items():
+            item[name] = by_recipe.get(row['id'], [])
+        if 'price' in item:
+            # The column already has the serializer's decimal places.
+            item['price'] = f"{row['price']:f}"
+        data.append(item)
+
+    return data
+
 # # Session 100, move this up then reference it in RecipeSerializer, nested serializer
 # # Create Tag API, Step 6: Create TagSerializer in recipe/serializers.py (Implement tag listing API)
 # class TagSerializer(serializers.ModelSerializer):
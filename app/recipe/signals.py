@@ -0,0 +1,96 @@
+"""
+Signal handlers for the recipe app.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import (
+    Ingredient,
+    Recipe,
+    Tag,
+)
+
+from recipe.cache import bump_version, create_version
+
+
+def touch_recipes(**filters):
+    """Mark recipes as modified so their validators change."""
+    Recipe.objects.filter(**filters).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=get_user_model())
+def create_cache_version(sender, instance, created, **kwargs):
+    """Create the cache version of a new user, so reads need one query."""
+    if created:
+        create_version(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_on_write(sender, instance, **kwargs):
+    """Invalidate cached responses of the object's owner."""
+    bump_version(instance.user_id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def touch_on_related_write(sender, instance, created=False, **kwargs):
+    """Touch the recipes showing a renamed or deleted tag/ingredient."""
+    if not created:
+        touch_recipes(**{sender._meta.model_name + 's': instance})
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_on_m2m_changed(sender, instance, action, reverse, pk_set,
+                              **kwargs):
+    """Invalidate cached responses when recipe relations change."""
+    if not reverse:
+        if action.startswith('post_'):
+            touch_recipes(pk=instance.pk)
+    elif action in ('post_add', 'post_remove'):
+        touch_recipes(pk__in=pk_set)
+    elif action == 'pre_clear':
+        touch_recipes(**{instance._meta.model_name + 's': instance})
+
+    if action.startswith('post_'):
+        bump_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def count_tag_recipes(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep Tag.recipe_count in step with the recipes using each tag.
+
+    Added ids are only those not linked yet, but removed ids may include
+    unlinked ones, so removals recount their tags instead.
+    """
+    if not reverse:
+        if action == 'post_add':
+            Tag.objects.filter(pk__in=pk_set).change_recipe_count(1)
+        elif action == 'post_remove':
+            Tag.objects.filter(pk__in=pk_set).recount()
+        elif action == 'pre_clear':
+            Tag.objects.filter(recipe=instance).change_recipe_count(-1)
+    elif action == 'post_add':
+        Tag.objects.filter(pk=instance.pk).change_recipe_count(len(pk_set))
+    elif action in ('post_remove', 'post_clear'):
+        Tag.objects.filter(pk=instance.pk).recount()
+
+
+@receiver(pre_delete, sender=Recipe)
+def uncount_deleted_recipe(sender, instance, **kwargs):
+    """Decrement the recipe_count of a deleted recipe's tags."""
+    Tag.objects.filter(recipe=instance).change_recipe_count(-1)
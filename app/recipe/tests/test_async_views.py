@@ -0,0 +1,105 @@
+"""
+Tests for the async recipe and tag read views.
+"""
+import json
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.metrics import metrics
+from core.models import Recipe, Tag
+
+
+# The async views run the ORM in other threads, which cannot see the
+# transaction of a TestCase.
+@override_settings(ROOT_URLCONF='app.urls_async')
+class AsyncReadViewTests(TransactionTestCase):
+    """Test the async views served by app.urls_async."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.auth = f'Token {Token.objects.create(user=self.user).key}'
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=5,
+            price=Decimal('5.50'),
+        )
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+
+    def sync_get(self, url):
+        """Return the body of url served by the sync views."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with override_settings(ROOT_URLCONF='app.urls'):
+            return client.get(url).content
+
+    async def test_list_matches_sync_view(self):
+        """Test the async recipe list returns the sync view's body."""
+        url = reverse('recipe:recipe-list')
+
+        res = await self.async_client.get(url, authorization=self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        expected = await sync_to_async(self.sync_get)(url)
+        self.assertEqual(res.content, expected)
+
+    async def test_retrieve_recipe(self):
+        """Test retrieving a recipe from the async detail view."""
+        url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+
+        res = await self.async_client.get(url, authorization=self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(res.content)['title'], 'Sample recipe')
+
+    async def test_list_tags(self):
+        """Test listing tags from the async view."""
+        res = await self.async_client.get(
+            reverse('recipe:tag-list'),
+            authorization=self.auth,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [tag['name'] for tag in json.loads(res.content)['results']]
+        self.assertEqual(names, ['Vegan'])
+
+    async def test_auth_required(self):
+        """Test the async views still require authentication."""
+        res = await self.async_client.get(reverse('recipe:recipe-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_create_recipe(self):
+        """Test writes on async routes run the sync view."""
+        res = await self.async_client.post(
+            reverse('recipe:recipe-list'),
+            {'title': 'New', 'time_minutes': 3, 'price': '1.00'},
+            content_type='application/json',
+            authorization=self.auth,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    async def test_queries_recorded(self):
+        """Test queries run in the pool are counted in the metrics."""
+        metrics.reset()
+
+        await self.async_client.get(
+            reverse('recipe:recipe-list'),
+            authorization=self.auth,
+        )
+
+        row = metrics.snapshot()['views']['recipe:recipe-list\tGET']
+        self.assertGreater(row[2], 0)
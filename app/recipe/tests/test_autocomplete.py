@@ -0,0 +1,133 @@
+"""
+Tests for tag and ingredient autocomplete.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Tag
+
+from recipe.autocomplete import has_trigram
+
+
+TAGS_URL = reverse('recipe:tag-autocomplete')
+INGREDIENTS_URL = reverse('recipe:ingredient-autocomplete')
+
+
+def names(res):
+    return [item['name'] for item in res.data]
+
+
+class AutocompleteApiTests(TestCase):
+    """Test the autocomplete endpoints."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for name in [
+            'Tomato',
+            'cherry tomatoes',
+            'Tofu',
+            'Potato',
+            'tomato paste',
+        ]:
+            Ingredient.objects.create(user=self.user, name=name)
+
+    def test_auth_required(self):
+        """Test auth is required for suggestions."""
+        res = APIClient().get(TAGS_URL, {'q': 'a'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_short_term_prefix(self):
+        """Test short terms match name prefixes, case-insensitively."""
+        res = self.client.get(INGREDIENTS_URL, {'q': 'to'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(names(res), ['Tofu', 'Tomato', 'tomato paste'])
+
+    def test_prefix_matches_first(self):
+        """Test names starting with the term rank above other matches."""
+        res = self.client.get(INGREDIENTS_URL, {'q': 'tomat'})
+
+        self.assertEqual(names(res)[:2], ['Tomato', 'tomato paste'])
+        self.assertIn('cherry tomatoes', names(res))
+        self.assertNotIn('Potato', names(res))
+
+    def test_limit(self):
+        """Test the number of suggestions is limited."""
+        res = self.client.get(INGREDIENTS_URL, {'q': 'to', 'limit': 2})
+
+        self.assertEqual(names(res), ['Tofu', 'Tomato'])
+
+    def test_invalid_limit(self):
+        """Test limits outside 1 to 50 are rejected."""
+        for limit in ['0', '51', 'ten']:
+            res = self.client.get(INGREDIENTS_URL, {'q': 'to', 'limit': limit})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_null_character_rejected(self):
+        """Test terms containing NUL are rejected."""
+        for url in (TAGS_URL, INGREDIENTS_URL):
+            res = self.client.get(url, {'q': 'ab\x00'})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('q', res.data)
+
+    def test_empty_term(self):
+        """Test an empty term suggests nothing."""
+        res = self.client.get(INGREDIENTS_URL, {'q': ' '})
+
+        self.assertEqual(res.data, [])
+
+    def test_scoped_to_user(self):
+        """Test only the user's own tags are suggested."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        Tag.objects.create(user=other, name='Dinner')
+        tag = Tag.objects.create(user=self.user, name='Dessert')
+
+        res = self.client.get(TAGS_URL, {'q': 'd'})
+
+        self.assertEqual(res.data, [{'id': tag.id, 'name': 'Dessert'}])
+
+    def test_fuzzy_match(self):
+        """Test misspelled terms match similar names."""
+        if not has_trigram(connection.alias):
+            self.skipTest('pg_trgm is not installed')
+
+        res = self.client.get(INGREDIENTS_URL, {'q': 'tomatoe'})
+
+        self.assertEqual(names(res)[0], 'Tomato')
+
+    def test_contains_uses_indexed_column(self):
+        """Test containment matches the bare name column with ILIKE."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(INGREDIENTS_URL, {'q': 'paste'})
+
+        self.assertEqual(names(res), ['tomato paste'])
+        where = queries.captured_queries[-1]['sql'].split(' WHERE ')[1]
+        self.assertIn('"core_ingredient"."name" ILIKE', where)
+        self.assertNotIn('UPPER(', where.split(' ORDER BY ')[0])
+
+    def test_contains_wildcards_are_literal(self):
+        """Test LIKE wildcards in the term match only themselves."""
+        Ingredient.objects.create(user=self.user, name='100% cocoa')
+
+        res = self.client.get(INGREDIENTS_URL, {'q': '0% c'})
+        self.assertEqual(names(res), ['100% cocoa'])
+
+        res = self.client.get(INGREDIENTS_URL, {'q': 'to_'})
+        self.assertEqual(res.data, [])
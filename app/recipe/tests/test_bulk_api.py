@@ -0,0 +1,170 @@
+"""
+Tests for the bulk recipe API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+)
+
+
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def recipe_payload(i, tags=()):
+    """Return the payload for a sample recipe."""
+    return {
+        'title': f'Recipe {i}',
+        'time_minutes': 10 + i,
+        'price': '5.50',
+        'description': 'Sample description',
+        'tags': [{'name': name} for name in tags],
+    }
+
+
+class BulkRecipeApiTests(TestCase):
+    """Test bulk create and update of recipes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create(self):
+        """Test creating recipes with shared and new tags."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        payload = [
+            recipe_payload(0, ['Dinner', 'Thai']),
+            recipe_payload(1, ['Thai']),
+            recipe_payload(2),
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 3)
+        recipes = Recipe.objects.filter(user=self.user).order_by('id')
+        self.assertEqual(
+            [r.title for r in recipes],
+            ['Recipe 0', 'Recipe 1', 'Recipe 2'],
+        )
+        self.assertEqual(
+            sorted(t.name for t in recipes[0].tags.all()),
+            ['Dinner', 'Thai'],
+        )
+        self.assertEqual(recipes[2].tags.count(), 0)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(res.data[1]['tags'], [
+            {'id': recipes[1].tags.get().id, 'name': 'Thai'},
+        ])
+
+    def test_bulk_create_query_count_constant(self):
+        """Test the number of statements does not grow with the batch."""
+        for size in (2, 50):
+            payload = [
+                recipe_payload(i, [f'Tag {size}', f'Tag {i}'])
+                for i in range(size)
+            ]
+            with self.assertNumQueries(10):
+                res = self.client.post(BULK_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_bulk_create_item_errors(self):
+        """Test invalid items are reported and nothing is saved."""
+        invalid = recipe_payload(1)
+        del invalid['title']
+        payload = [recipe_payload(0), invalid]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('title', res.data[1])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_bulk_requires_list(self):
+        """Test a non-list payload is rejected."""
+        res = self.client.post(BULK_URL, recipe_payload(0), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(RECIPE_BULK_MAX_ITEMS=2)
+    def test_bulk_size_limit(self):
+        """Test batches over the configured limit are rejected."""
+        payload = [recipe_payload(i) for i in range(3)]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_bulk_update(self):
+        """Test updating fields and tags of several recipes."""
+        recipes = [
+            Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=5,
+                price=Decimal('1.00'),
+            )
+            for i in range(2)
+        ]
+        recipes[0].tags.add(Tag.objects.create(user=self.user, name='Old'))
+        payload = [
+            {'id': recipes[0].id, 'tags': [{'name': 'New'}]},
+            {'id': recipes[1].id, 'title': 'Renamed', 'price': '2.00'},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for recipe in recipes:
+            recipe.refresh_from_db()
+        self.assertEqual([t.name for t in recipes[0].tags.all()], ['New'])
+        self.assertEqual(recipes[0].title, 'Recipe 0')
+        self.assertEqual(recipes[1].title, 'Renamed')
+        self.assertEqual(recipes[1].price, Decimal('2.00'))
+
+    def test_bulk_update_other_users_recipe(self):
+        """Test recipes of other users cannot be bulk updated."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        recipe = Recipe.objects.create(
+            user=other,
+            title='Theirs',
+            time_minutes=5,
+            price=Decimal('1.00'),
+        )
+
+        res = self.client.patch(
+            BULK_URL,
+            [{'id': recipe.id, 'title': 'Mine'}],
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0]['id'][0], 'Not found.')
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Theirs')
+
+    def test_bulk_create_invalidates_cache(self):
+        """Test cached lists include recipes created in bulk."""
+        self.client.get(reverse('recipe:recipe-list'))
+
+        self.client.post(BULK_URL, [recipe_payload(0)], format='json')
+        res = self.client.get(reverse('recipe:recipe-list'))
+
+        self.assertEqual(len(res.data['results']), 1)
@@ -0,0 +1,164 @@
+"""
+Tests for the recipe response cache.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    CacheVersion,
+    Recipe,
+    Tag,
+)
+
+from recipe import cache
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ResponseCacheTests(TestCase):
+    """Test cached recipe and tag reads."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        cache.stats.reset()
+
+    def test_list_served_from_cache(self):
+        """Test a repeated list only reads the cache version."""
+        create_recipe(user=self.user)
+        first = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(1):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(cache.stats.hits, 1)
+        self.assertEqual(cache.stats.misses, 1)
+        self.assertEqual(cache.stats.hit_ratio, 0.5)
+
+    def test_retrieve_served_from_cache(self):
+        """Test a repeated detail read only reads the cache version."""
+        recipe = create_recipe(user=self.user)
+        self.client.get(detail_url(recipe.id))
+
+        with self.assertNumQueries(1):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.data['id'], recipe.id)
+
+    def test_query_params_cached_separately(self):
+        """Test different query strings do not share an entry."""
+        create_recipe(user=self.user)
+        create_recipe(user=self.user)
+
+        self.client.get(RECIPES_URL)
+        res = self.client.get(RECIPES_URL, {'page_size': 1})
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_api_write_invalidates(self):
+        """Test writing through the API invalidates cached lists."""
+        self.client.get(RECIPES_URL)
+        payload = {
+            'title': 'New recipe',
+            'time_minutes': 5,
+            'price': Decimal('1.00'),
+        }
+        self.client.post(RECIPES_URL, payload)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(cache.stats.hits, 0)
+
+    def test_tag_update_invalidates_recipes(self):
+        """Test renaming a tag invalidates cached recipes."""
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        recipe.tags.add(tag)
+        self.client.get(detail_url(recipe.id))
+
+        self.client.patch(
+            reverse('recipe:tag-detail', args=[tag.id]),
+            {'name': 'Dinner'},
+        )
+        res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.data['tags'][0]['name'], 'Dinner')
+
+    def test_m2m_change_invalidates(self):
+        """Test changing recipe tags outside the API invalidates."""
+        recipe = create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'Vegan')
+
+    def test_tags_cache_limited_to_user(self):
+        """Test cached tag lists are not shared between users."""
+        Tag.objects.create(user=self.user, name='Mine')
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        Tag.objects.create(user=other, name='Theirs')
+        self.client.get(TAGS_URL)
+
+        self.client.force_authenticate(other)
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.data['results'][0]['name'], 'Theirs')
+
+    def test_recreated_version_does_not_revive_entries(self):
+        """Test a re-created version never matches older entries."""
+        old_version = cache.get_version(self.user.id)
+        CacheVersion.objects.filter(user=self.user).delete()
+
+        self.assertNotEqual(cache.get_version(self.user.id), old_version)
+
+    def test_version_shared_by_workers(self):
+        """Test a bump made elsewhere invalidates this worker's entries."""
+        recipe = create_recipe(user=self.user, title='Before')
+        self.client.get(RECIPES_URL)
+        # Another worker writing, as seen from this one.
+        Recipe.objects.filter(pk=recipe.pk).update(title='After')
+        CacheVersion.objects.filter(user=self.user).update(
+            version=F('version') + 1,
+        )
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'][0]['title'], 'After')
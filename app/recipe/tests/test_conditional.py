@@ -0,0 +1,209 @@
+"""
+Tests for conditional requests on recipe APIs.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+)
+
+from recipe import cache
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalRequestTests(TestCase):
+    """Test ETag and Last-Modified handling."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_has_validators(self):
+        """Test recipe lists carry a strong ETag and Last-Modified."""
+        create_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', res)
+
+    def test_list_not_modified(self):
+        """Test a cached If-None-Match 304 only reads the cache version."""
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_list_not_modified_cold_cache(self):
+        """Test a 304 needs only the version and aggregate on a miss."""
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+        cache.get_cache().clear()
+
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_per_media_type(self):
+        """Test each representation is cached with its own ETag."""
+        create_recipe(user=self.user)
+        msgpack_etag = self.client.get(
+            RECIPES_URL,
+            HTTP_ACCEPT='application/msgpack',
+        )['ETag']
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=msgpack_etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], msgpack_etag)
+        self.assertEqual(res['Content-Type'], 'application/json')
+
+        res = self.client.get(
+            RECIPES_URL,
+            HTTP_ACCEPT='application/msgpack',
+            HTTP_IF_NONE_MATCH=msgpack_etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_modified_after_tag_change(self):
+        """Test changing a recipe's tags changes the list ETag."""
+        recipe = create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        cache.get_cache().clear()
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_detail_modified_after_tag_rename(self):
+        """Test renaming a tag changes the ETag of its recipes."""
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        tag.name = 'Vegetarian'
+        tag.save()
+        cache.get_cache().clear()
+        res = self.client.get(
+            detail_url(recipe.id),
+            HTTP_IF_NONE_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], 'Vegetarian')
+
+    def test_detail_if_modified_since(self):
+        """Test If-Modified-Since on a recipe detail."""
+        recipe = create_recipe(user=self.user)
+        last_modified = self.client.get(detail_url(recipe.id))['Last-Modified']
+
+        res = self.client.get(
+            detail_url(recipe.id),
+            HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_not_found(self):
+        """Test conditional requests for a missing recipe return 404."""
+        res = self.client.get(detail_url(0), HTTP_IF_NONE_MATCH='"abc"')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_detail_invalid_id(self):
+        """Test conditional requests for a non-numeric id return 404."""
+        url = reverse('recipe:recipe-detail', args=['abc'])
+
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.patch(url, {'title': 'New'}, HTTP_IF_MATCH='"abc"')
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_if_match(self):
+        """Test a PATCH with the current ETag succeeds."""
+        recipe = create_recipe(user=self.user)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        res = self.client.patch(
+            detail_url(recipe.id),
+            {'title': 'New title'},
+            HTTP_IF_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'New title')
+
+    def test_update_if_match_stale(self):
+        """Test a PATCH with a stale ETag is rejected."""
+        recipe = create_recipe(user=self.user)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+        recipe.title = 'Changed elsewhere'
+        recipe.save()
+
+        res = self.client.patch(
+            detail_url(recipe.id),
+            {'title': 'New title'},
+            HTTP_IF_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Changed elsewhere')
+
+    def test_tag_list_modified_after_rename(self):
+        """Test renaming a tag changes the tag list ETag."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        self.client.patch(
+            reverse('recipe:tag-detail', args=[tag.id]),
+            {'name': 'Vegetarian'},
+        )
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
@@ -0,0 +1,123 @@
+"""
+Tests for the recipe export API.
+"""
+import csv
+import io
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.export import iter_recipes
+from core.models import (
+    Ingredient,
+    Recipe,
+    Tag,
+)
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class PublicExportApiTests(TestCase):
+    """Test unauthenticated export requests."""
+
+    def test_auth_required(self):
+        """Test auth is required to export recipes."""
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateExportApiTests(TestCase):
+    """Test authenticated export requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user, title='Tofu stir fry')
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        self.recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Tofu'),
+            Ingredient.objects.create(user=self.user, name='Rice'),
+        )
+        create_recipe(user=self.user, title='Plain rice')
+
+    def test_export_ndjson(self):
+        """Test exporting recipes as NDJSON."""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['title'], 'Tofu stir fry')
+        self.assertEqual(rows[0]['price'], '5.25')
+        self.assertEqual(rows[0]['tags'], ['Vegan'])
+        self.assertCountEqual(rows[0]['ingredients'], ['Tofu', 'Rice'])
+        self.assertEqual(rows[1]['tags'], [])
+
+    def test_export_csv(self):
+        """Test exporting recipes as CSV."""
+        res = self.client.get(EXPORT_URL, {'export_format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['tags'], 'Vegan')
+        self.assertCountEqual(rows[0]['ingredients'].split('|'),
+                              ['Tofu', 'Rice'])
+
+    def test_export_limited_to_user(self):
+        """Test other users' recipes are not exported."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        create_recipe(user=other, title='Theirs')
+
+        res = self.client.get(EXPORT_URL)
+
+        content = b''.join(res.streaming_content).decode()
+        self.assertNotIn('Theirs', content)
+
+    def test_export_invalid_format(self):
+        """Test unknown export formats are rejected."""
+        res = self.client.get(EXPORT_URL, {'export_format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_queries_per_chunk(self):
+        """Test relations are prefetched once per chunk."""
+        for i in range(8):
+            create_recipe(user=self.user, title=f'Recipe {i}')
+
+        # One cursor query plus a tag and an ingredient query per chunk.
+        with self.assertNumQueries(1 + 2 * 4):
+            rows = list(iter_recipes(self.user, chunk_size=3))
+
+        self.assertEqual(len(rows), 10)
@@ -0,0 +1,318 @@
+"""
+Tests for recipe image uploads and their resized variants.
+"""
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from decimal import Decimal
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipe import images
+from recipe.thumbnails import render_variants
+
+
+def image_upload_url(recipe_id):
+    """Create and return an image upload URL."""
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def image_file(size=(10, 10), fmt='JPEG'):
+    """Return a temporary file holding an image of size."""
+    image_file = tempfile.NamedTemporaryFile(suffix='.jpg')
+    Image.new('RGB', size).save(image_file, format=fmt)
+    image_file.seek(0)
+
+    return image_file
+
+
+def broken_executor():
+    """Return a pool whose worker died, and the future it broke."""
+    executor = ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context('spawn'),
+    )
+    future = executor.submit(os._exit, 1)
+    try:
+        future.result()
+    except BrokenProcessPool:
+        return executor, future
+
+    raise AssertionError('The pool did not break.')
+
+
+class MediaRootMixin:
+    """Store uploads in a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+
+
+class RenderVariantsTests(SimpleTestCase):
+    """Test rendering variants in a worker."""
+
+    def test_render_variants(self):
+        """Test variants fit their size, keep the ratio and never grow."""
+        with tempfile.TemporaryDirectory() as tmp, \
+                image_file((1000, 500)) as f:
+            targets = {
+                os.path.join(tmp, 'small.jpg'): (100, 100),
+                os.path.join(tmp, 'large.jpg'): (2000, 2000),
+            }
+
+            render_variants(f.name, targets)
+
+            with Image.open(os.path.join(tmp, 'small.jpg')) as small:
+                self.assertEqual(small.size, (100, 50))
+            with Image.open(os.path.join(tmp, 'large.jpg')) as large:
+                self.assertEqual(large.size, (1000, 500))
+
+
+class BrokenPoolTests(SimpleTestCase):
+    """Test pools broken by a dying worker are replaced."""
+
+    def test_crashed_render_discards_pool(self):
+        """Test a render failing with a broken pool discards that pool."""
+        executor, future = broken_executor()
+        images.reserve()
+
+        with patch.object(images, '_executor', executor), \
+                self.assertLogs('recipe.images', 'ERROR'):
+            images._variants_rendered(executor, 1, 1, 'a.jpg', {}, future)
+            self.assertIsNone(images._executor)
+
+
+@patch('recipe.images.get_executor')
+class ImageUploadTests(MediaRootMixin, TestCase):
+    """Test the image upload endpoint, with rendering stubbed out."""
+
+    def test_upload_image(self, patched_executor):
+        """Test uploading an image streams it to disk and queues variants."""
+        url = image_upload_url(self.recipe.id)
+        uploaded = []
+        original_complete = images.TemporaryFileUploadHandler.file_complete
+
+        def file_complete(handler, file_size):
+            uploaded.append(original_complete(handler, file_size))
+            return uploaded[-1]
+
+        with image_file() as f, patch.object(
+            images.TemporaryFileUploadHandler, 'file_complete', file_complete,
+        ), self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(url, {'image': f}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(uploaded[0], TemporaryUploadedFile)
+        self.recipe.refresh_from_db()
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+        self.assertTrue(res.data['image'].endswith(self.recipe.image.url))
+        self.assertEqual(res.data['image_variants'], {})
+        submit = patched_executor.return_value.submit
+        self.assertEqual(submit.call_args.args[1], self.recipe.image.path)
+        images.release()
+
+    def test_upload_image_bad_request(self, patched_executor):
+        """Test uploading an invalid image."""
+        url = image_upload_url(self.recipe.id)
+        payload = {'image': 'notanimage'}
+
+        res = self.client.post(url, payload, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        patched_executor.assert_not_called()
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=1024)
+    def test_upload_too_large(self, patched_executor):
+        """Test uploads over RECIPE_IMAGE_MAX_BYTES are rejected."""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(os.urandom(4096))
+            f.seek(0)
+            res = self.client.post(url, {'image': f}, format='multipart')
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=99)
+    def test_upload_too_many_pixels(self, patched_executor):
+        """Test images over RECIPE_IMAGE_MAX_PIXELS are rejected."""
+        url = image_upload_url(self.recipe.id)
+        with image_file() as f:
+            res = self.client.post(url, {'image': f}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+
+    @override_settings(RECIPE_IMAGE_MAX_PENDING=0)
+    def test_upload_queue_full(self, patched_executor):
+        """Test uploads are refused, saving nothing, when the queue is full."""
+        url = image_upload_url(self.recipe.id)
+        with image_file() as f:
+            res = self.client.post(url, {'image': f}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_render_queued_on_commit(self, patched_executor):
+        """Test rendering is only queued once the new image is committed."""
+        url = image_upload_url(self.recipe.id)
+
+        with image_file() as f, \
+                self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(url, {'image': f}, format='multipart')
+            patched_executor.return_value.submit.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+        patched_executor.return_value.submit.assert_called_once()
+        images.release()
+
+    def test_upload_submit_fails(self, patched_executor):
+        """Test the slot is released when rendering cannot be queued."""
+        patched_executor.return_value.submit.side_effect = RuntimeError
+        url = image_upload_url(self.recipe.id)
+
+        with image_file() as f, \
+                self.assertLogs('recipe.images', 'ERROR'), \
+                self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(url, {'image': f}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertTrue(self.recipe.image)
+        self.assertEqual(self.recipe.image_variants, {})
+        self.assertEqual(images._pending, 0)
+
+    def test_upload_other_users_recipe(self, patched_executor):
+        """Test uploading to another user's recipe returns 404."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        recipe = create_recipe(user=other)
+        with image_file() as f:
+            res = self.client.post(
+                image_upload_url(recipe.id),
+                {'image': f},
+                format='multipart',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ImageVariantsTests(MediaRootMixin, TransactionTestCase):
+    """Test variants are rendered in the process pool."""
+
+    def upload(self, size):
+        with image_file(size) as f:
+            res = self.client.post(
+                image_upload_url(self.recipe.id),
+                {'image': f},
+                format='multipart',
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+
+        return self.recipe.image.name
+
+    def wait_for_variants(self, name, timeout=30):
+        """Return the recipe once the variants of image name are saved."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            recipe = Recipe.objects.get(pk=self.recipe.pk)
+            if recipe.image.name == name and recipe.image_variants:
+                return recipe
+            time.sleep(0.05)
+        self.fail('Variants were not rendered.')
+
+    def test_variants_rendered(self):
+        """Test variant URLs are output once rendered."""
+        name = self.upload((1600, 1200))
+        recipe = self.wait_for_variants(name)
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        variants = res.data['image_variants']
+        self.assertEqual(set(variants), set(images.VARIANTS))
+        for variant, (width, height) in images.VARIANTS.items():
+            name = recipe.image_variants[variant]
+            self.assertTrue(variants[variant].endswith(name))
+            with Image.open(recipe.image.storage.path(name)) as image:
+                self.assertLessEqual(image.width, width)
+                self.assertLessEqual(image.height, height)
+
+    def test_replace_image(self):
+        """Test replacing an image deletes the old one and its variants."""
+        old = self.wait_for_variants(self.upload((300, 300)))
+        storage = old.image.storage
+        old_names = [old.image.name, *old.image_variants.values()]
+
+        new = self.wait_for_variants(self.upload((300, 300)))
+
+        self.assertNotEqual(new.image.name, old.image.name)
+        for name in old_names:
+            self.assertFalse(storage.exists(name))
+
+    def test_broken_pool_replaced(self):
+        """Test an upload after a worker died renders in a new pool."""
+        executor, _ = broken_executor()
+
+        with patch.object(images, '_executor', executor):
+            name = self.upload((300, 300))
+            self.addCleanup(images.get_executor().shutdown)
+            self.assertIsNot(images.get_executor(), executor)
+
+        self.wait_for_variants(name)
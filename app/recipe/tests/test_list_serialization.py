@@ -0,0 +1,129 @@
+"""
+Parity tests for the values() based recipe list serialization.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+
+from recipe.serializers import (
+    RecipeSerializer,
+    ingredients_prefetch,
+    recipe_list_data,
+    recipe_list_values,
+    tags_prefetch,
+)
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def render(data):
+    """Return data rendered as the API would."""
+    return JSONRenderer().render(data)
+
+
+def serializer_output(queryset):
+    """Return the RecipeSerializer output for queryset, rendered."""
+    queryset = queryset.prefetch_related(tags_prefetch())
+    return render(RecipeSerializer(queryset, many=True).data)
+
+
+class RecipeListSerializationTests(TestCase):
+    """Test the fast list path matches RecipeSerializer byte for byte."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ['Vegan', 'Dessert', 'Épicé "hot"', 'Z']
+        ]
+        samples = [
+            {'title': 'Plain', 'price': Decimal('5.50')},
+            {'title': 'Free', 'price': Decimal('0')},
+            {'title': 'Priciest', 'price': Decimal('999.99'), 'link': 'x'},
+            {'title': 'Negative', 'price': Decimal('-1.5')},
+            {'title': 'Ünïcødé ☕', 'price': Decimal('12'),
+             'link': 'https://example.com/a?b=c&d="e"'},
+            {'title': 'Tab\tand\nnewline', 'price': Decimal('3.10')},
+        ]
+        for i, params in enumerate(samples):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                time_minutes=i * 7,
+                **params,
+            )
+            recipe.tags.add(*tags[:i % (len(tags) + 1)])
+        self.queryset = Recipe.objects.filter(user=self.user).order_by('-id')
+
+    def test_rows_match_serializer(self):
+        """Test rows built from values() render identically."""
+        rows = list(recipe_list_values(self.queryset))
+
+        self.assertEqual(
+            render(recipe_list_data(rows)),
+            serializer_output(self.queryset),
+        )
+
+    def test_selected_fields_match_serializer(self):
+        """Test rows render like the serializer for selected fields."""
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        for recipe in self.queryset[:3]:
+            recipe.ingredients.add(salt)
+        queryset = self.queryset.prefetch_related(
+            tags_prefetch(),
+            ingredients_prefetch(),
+        )
+        for fields in (
+            ['title'],
+            ['id', 'price', 'ingredients'],
+            ['price', 'tags', 'ingredients'],
+        ):
+            rows = list(recipe_list_values(self.queryset, fields))
+
+            self.assertEqual(
+                render(recipe_list_data(rows, fields)),
+                render(RecipeSerializer(
+                    queryset,
+                    many=True,
+                    fields=fields,
+                ).data),
+            )
+
+    def test_empty_rows(self):
+        """Test no rows render as an empty list without a tags query."""
+        with self.assertNumQueries(0):
+            data = recipe_list_data([])
+
+        self.assertEqual(render(data), serializer_output(self.queryset.none()))
+
+    def test_list_api_matches_serializer(self):
+        """Test every page of the list API matches the serializer."""
+        results = []
+        url = RECIPES_URL + '?page_size=4'
+        while url:
+            res = self.client.get(url)
+            results += res.data['results']
+            url = res.data['next']
+
+        self.assertEqual(render(results), serializer_output(self.queryset))
+
+    def test_filtered_search_matches_serializer(self):
+        """Test annotated search rows match the serializer."""
+        res = self.client.get(RECIPES_URL, {'search': 'plain'})
+
+        self.assertEqual(
+            render(res.data['results']),
+            serializer_output(self.queryset.filter(title='Plain')),
+        )
@@ -0,0 +1,136 @@
+"""
+Tests for ordering and range filtering the recipe list.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeOrderingTests(TestCase):
+    """Test ?ordering= and the price and time filters."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.quick = create_recipe(
+            self.user, title='Toast', time_minutes=5, price=Decimal('1.50'),
+        )
+        self.slow = create_recipe(
+            self.user, title='Stew', time_minutes=120, price=Decimal('9.00'),
+        )
+        self.mid = create_recipe(
+            self.user, title='Curry', time_minutes=30, price=Decimal('4.00'),
+        )
+
+    def ids(self, params):
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return [r['id'] for r in res.data['results']]
+
+    def test_orderings(self):
+        """Test each supported ordering."""
+        quick, slow, mid = self.quick.id, self.slow.id, self.mid.id
+        for ordering, expected in (
+            ('-id', [mid, slow, quick]),
+            ('price', [quick, mid, slow]),
+            ('-price', [slow, mid, quick]),
+            ('time_minutes', [quick, mid, slow]),
+            ('-time_minutes', [slow, mid, quick]),
+        ):
+            with self.subTest(ordering=ordering):
+                self.assertEqual(self.ids({'ordering': ordering}), expected)
+
+    def test_unsupported_ordering(self):
+        """Test orderings without an index are rejected."""
+        for ordering in ('title', 'id', '-search_rank', 'user__email'):
+            res = self.client.get(RECIPES_URL, {'ordering': ordering})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('ordering', res.data)
+
+    def test_range_filters(self):
+        """Test inclusive price and time bounds."""
+        self.assertEqual(
+            self.ids({'min_price': '4.00', 'ordering': 'price'}),
+            [self.mid.id, self.slow.id],
+        )
+        self.assertEqual(
+            self.ids({'max_price': '4', 'ordering': 'price'}),
+            [self.quick.id, self.mid.id],
+        )
+        self.assertEqual(
+            self.ids({'max_time': '30', 'min_time': '6'}),
+            [self.mid.id],
+        )
+
+    def test_invalid_range_filters(self):
+        """Test non-numeric bounds are rejected."""
+        for param, value in (
+            ('min_price', 'cheap'),
+            ('max_price', 'NaN'),
+            ('max_price', 'Infinity'),
+            ('max_time', '1.5'),
+        ):
+            res = self.client.get(RECIPES_URL, {param: value})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(param, res.data)
+
+    def test_ordering_with_search(self):
+        """Test an explicit ordering replaces relevance order."""
+        create_recipe(self.user, title='Curry Toast', price=Decimal('0.50'))
+
+        ids = self.ids({'search': 'toast', 'ordering': '-price'})
+
+        self.assertEqual(ids[0], self.quick.id)
+
+    def test_paginate_ordering_with_ties(self):
+        """Test paging by price visits tied recipes once, in order."""
+        for i in range(5):
+            create_recipe(self.user, title=f'Tie {i}', price=Decimal('4.00'))
+        expected = list(
+            Recipe.objects.filter(user=self.user).order_by(
+                '-price', '-id',
+            ).values_list('id', flat=True)
+        )
+
+        ids = []
+        params = {'ordering': '-price', 'page_size': 2, 'fields': 'id,title'}
+        res = self.client.get(RECIPES_URL, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(r['id'] for r in res.data['results'])
+            self.assertEqual(
+                list(res.data['results'][0]), ['id', 'title'],
+            )
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(ids, expected)
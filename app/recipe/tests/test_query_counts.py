@@ -0,0 +1,186 @@
+"""
+Tests pinning the number of SQL queries issued by the recipe APIs.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+)
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def recipe_detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def tag_detail_url(tag_id):
+    """Create and return a tag detail URL."""
+    return reverse('recipe:tag-detail', args=[tag_id])
+
+
+def create_recipes(user, count, tags_per_recipe=3):
+    """Create and return recipes, each with its own tags."""
+    recipes = []
+    for i in range(count):
+        recipe = Recipe.objects.create(
+            user=user,
+            title=f'Recipe {i}',
+            time_minutes=10,
+            price=Decimal('5.00'),
+        )
+        for j in range(tags_per_recipe):
+            recipe.tags.add(
+                Tag.objects.create(user=user, name=f'Tag {recipe.id}-{j}'),
+            )
+        recipes.append(recipe)
+
+    return recipes
+
+
+class QueryCountTests(TestCase):
+    """Test each recipe/tag endpoint issues a fixed number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def assertListQueries(self, url, num, sizes=(1, 10)):
+        """Assert listing url takes num queries for every data size."""
+        created = 0
+        for size in sizes:
+            create_recipes(self.user, size - created)
+            created = size
+            with self.assertNumQueries(num):
+                res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertTrue(res.data)
+
+    def test_list_recipes(self):
+        """Test listing recipes prefetches tags in one query."""
+        self.assertListQueries(RECIPES_URL, 4)
+
+    def test_retrieve_recipe(self):
+        """Test retrieving a recipe prefetches tags in one query."""
+        recipe = create_recipes(self.user, 1, tags_per_recipe=10)[0]
+
+        with self.assertNumQueries(4):
+            res = self.client.get(recipe_detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 10)
+
+    def test_create_recipe_with_tags(self):
+        """Test creating a recipe costs the same for any number of tags."""
+        for num_tags in (2, 20):
+            Tag.objects.create(user=self.user, name=f'Existing {num_tags}')
+            tags = [{'name': f'Existing {num_tags}'}] + [
+                {'name': f'New {num_tags}-{i}'} for i in range(num_tags - 1)
+            ]
+            payload = {
+                'title': 'Thai Prawn Curry',
+                'time_minutes': 30,
+                'price': Decimal('2.50'),
+                'tags': tags,
+            }
+
+            with self.assertNumQueries(10):
+                res = self.client.post(RECIPES_URL, payload, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(res.data['tags']), num_tags)
+
+    def test_create_recipe_with_existing_tags(self):
+        """Test no tag insert is issued when all tags exist."""
+        Tag.objects.create(user=self.user, name='Thai')
+        payload = {
+            'title': 'Thai Prawn Curry',
+            'time_minutes': 30,
+            'price': Decimal('2.50'),
+            'tags': [{'name': 'Thai'}],
+        }
+
+        with self.assertNumQueries(8):
+            res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_partial_update_recipe_tags(self):
+        """Test replacing tags costs the same for any number of tags."""
+        recipe = create_recipes(self.user, 1)[0]
+        for num_tags in (2, 20):
+            Tag.objects.create(user=self.user, name=f'Lunch {num_tags}')
+            tags = [{'name': f'Lunch {num_tags}'}] + [
+                {'name': f'Dinner {num_tags}-{i}'} for i in range(num_tags - 1)
+            ]
+
+            with self.assertNumQueries(14):
+                res = self.client.patch(
+                    recipe_detail_url(recipe.id),
+                    {'tags': tags},
+                    format='json',
+                )
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(res.data['tags']), num_tags)
+
+    def test_full_update_recipe(self):
+        """Test a full update without tags."""
+        recipe = create_recipes(self.user, 1)[0]
+        payload = {
+            'title': 'New recipe title',
+            'time_minutes': 10,
+            'price': Decimal('2.50'),
+        }
+
+        with self.assertNumQueries(4):
+            res = self.client.put(recipe_detail_url(recipe.id), payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_delete_recipe(self):
+        """Test deleting a recipe."""
+        recipe = create_recipes(self.user, 1)[0]
+
+        with self.assertNumQueries(6):
+            res = self.client.delete(recipe_detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_list_tags(self):
+        """Test listing tags takes a fixed number of queries."""
+        self.assertListQueries(TAGS_URL, 3)
+
+    def test_update_tag(self):
+        """Test updating a tag."""
+        tag = Tag.objects.create(user=self.user, name='After Dinner')
+
+        # Fetch, duplicate name check, update, touch tagged recipes.
+        with self.assertNumQueries(5):
+            res = self.client.patch(tag_detail_url(tag.id), {'name': 'Late'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_delete_tag(self):
+        """Test deleting a tag."""
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+
+        with self.assertNumQueries(5):
+            res = self.client.delete(tag_detail_url(tag.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
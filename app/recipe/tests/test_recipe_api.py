@@ -14,6 +14,7 @@ from rest_framework.test import APIClient
 from core.models import (
     Recipe,
     Tag,
+    Ingredient,
 )
 
 from recipe.serializers import (
@@ -96,7 +97,7 @@ class PrivateRecipeApiTests(TestCase):
         # validate it successfully retrives recipes
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         # validate data match with what was created using create_recipe()
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         """Test list of recipes is limited to authenticated user."""
@@ -121,7 +122,28 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         # check if data retrieved and filtered for self.user matches res.data(the results of get request of url RECIPES_URL)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_recipe_list_cursor_pagination(self):
+        """Test paging through recipes with cursors."""
+        recipes = [create_recipe(user=self.user) for _ in range(5)]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(res.data['previous'])
+        ids = [r['id'] for r in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids += [r['id'] for r in res.data['results']]
+
+        self.assertEqual(ids, [r.id for r in reversed(recipes)])
+
+    def test_recipe_list_invalid_cursor(self):
+        """Test an invalid cursor returns an error."""
+        res = self.client.get(RECIPES_URL, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_get_recipe_detail(self):
         """Test get recipe detail."""
@@ -321,6 +343,24 @@ class PrivateRecipeApiTests(TestCase):
 #     self.assertEqual(recipe.tags.count(), 2)
 # AssertionError: 0 != 2
 
+    def test_create_recipe_with_duplicate_tag_names(self):
+        """Test repeated tag names in a payload resolve to one tag."""
+        payload = {
+            'title': 'Pad Thai',
+            'time_minutes': 20,
+            'price': Decimal('3.50'),
+            'tags': [{'name': 'Thai'}, {'name': 'Thai'}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.tags.count(), 1)
+        self.assertEqual(
+            Tag.objects.filter(user=self.user, name='Thai').count(),
+            1,
+        )
+
     # Create Tag API, Step 14: Write tests for updating recipe tags
     def test_create_tag_on_update(self):
         """Test create tag when updating a recipe."""
@@ -376,3 +416,95 @@ class PrivateRecipeApiTests(TestCase):
 
 # Next, change create() method in recipe/serializers.py to support update feature
 
+
+class RecipeFilterApiTests(TestCase):
+    """Test filtering the recipe list by tags and ingredients."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.quick = Tag.objects.create(user=self.user, name='Quick')
+        self.tofu = Ingredient.objects.create(user=self.user, name='Tofu')
+        self.rice = Ingredient.objects.create(user=self.user, name='Rice')
+
+        self.r1 = create_recipe(user=self.user, title='Tofu stir fry')
+        self.r1.tags.add(self.vegan, self.quick)
+        self.r1.ingredients.add(self.tofu, self.rice)
+        self.r2 = create_recipe(user=self.user, title='Vegan curry')
+        self.r2.tags.add(self.vegan)
+        self.r2.ingredients.add(self.rice)
+        self.r3 = create_recipe(user=self.user, title='Steak')
+
+    def filter_ids(self, **params):
+        """Return the ids of recipes listed with params."""
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [r['id'] for r in res.data['results']]
+
+    def test_filter_by_tags_any(self):
+        """Test filtering recipes having any of the tags."""
+        ids = self.filter_ids(tags=f'{self.vegan.id},{self.quick.id}')
+
+        self.assertEqual(ids, [self.r2.id, self.r1.id])
+
+    def test_filter_by_tags_all(self):
+        """Test filtering recipes having all of the tags."""
+        ids = self.filter_ids(
+            tags=f'{self.vegan.id},{self.quick.id}',
+            tags_match='all',
+        )
+
+        self.assertEqual(ids, [self.r1.id])
+
+    def test_filter_by_ingredients(self):
+        """Test filtering recipes by ingredients."""
+        self.assertEqual(
+            self.filter_ids(ingredients=f'{self.tofu.id}'),
+            [self.r1.id],
+        )
+        self.assertEqual(
+            self.filter_ids(
+                ingredients=f'{self.tofu.id},{self.rice.id}',
+                ingredients_match='all',
+            ),
+            [self.r1.id],
+        )
+
+    def test_filter_by_tags_and_ingredients(self):
+        """Test tag and ingredient filters are combined."""
+        ids = self.filter_ids(
+            tags=f'{self.vegan.id}',
+            ingredients=f'{self.rice.id}',
+        )
+
+        self.assertEqual(ids, [self.r2.id, self.r1.id])
+
+    def test_filter_invalid_ids(self):
+        """Test malformed ids are rejected."""
+        res = self.client.get(RECIPES_URL, {'tags': '1,abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_invalid_match(self):
+        """Test unknown match modes are rejected."""
+        res = self.client.get(
+            RECIPES_URL,
+            {'tags': f'{self.vegan.id}', 'tags_match': 'some'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_query_count(self):
+        """Test filtering adds no queries and no DISTINCT."""
+        with self.assertNumQueries(4) as ctx:
+            self.client.get(
+                RECIPES_URL,
+                {'tags': f'{self.vegan.id},{self.quick.id}',
+                 'tags_match': 'all'},
+            )
+
+        self.assertNotIn('DISTINCT', ctx.captured_queries[2]['sql'])
+        self.assertIn('EXISTS', ctx.captured_queries[2]['sql'])
@@ -0,0 +1,141 @@
+"""
+Tests for recipe full-text search.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+        'description': '',
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def search(client, term, **params):
+    """Search recipes and return the ids in the first page."""
+    res = client.get(RECIPES_URL, {'search': term, **params})
+    assert res.status_code == status.HTTP_200_OK, res.data
+    return [r['id'] for r in res.data['results']]
+
+
+class RecipeSearchTests(TestCase):
+    """Test searching recipes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_search_title_and_description(self):
+        """Test search matches stemmed words in title or description."""
+        curry = create_recipe(user=self.user, title='Thai Curries')
+        soup = create_recipe(
+            user=self.user,
+            title='Soup',
+            description='A mild curry broth.',
+        )
+        create_recipe(user=self.user, title='Pancakes')
+
+        ids = search(self.client, 'curry')
+
+        self.assertCountEqual(ids, [curry.id, soup.id])
+
+    def test_search_ranks_title_first(self):
+        """Test title matches rank above description matches."""
+        in_description = create_recipe(
+            user=self.user,
+            title='Soup',
+            description='Serve with noodles.',
+        )
+        in_title = create_recipe(user=self.user, title='Noodles')
+
+        self.assertEqual(
+            search(self.client, 'noodles'),
+            [in_title.id, in_description.id],
+        )
+
+    def test_search_limited_to_user(self):
+        """Test search only returns the user's recipes."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        create_recipe(user=other, title='Lasagne')
+        mine = create_recipe(user=self.user, title='Lasagne')
+
+        self.assertEqual(search(self.client, 'lasagne'), [mine.id])
+
+    def test_search_follows_updates(self):
+        """Test the search index is maintained on update."""
+        recipe = create_recipe(user=self.user, title='Pancakes')
+
+        recipe.title = 'Waffles'
+        recipe.save()
+
+        self.assertEqual(search(self.client, 'pancakes'), [])
+        self.assertEqual(search(self.client, 'waffles'), [recipe.id])
+
+    def test_search_bulk_created(self):
+        """Test recipes inserted in bulk are searchable."""
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=self.user,
+                title='Gazpacho',
+                time_minutes=5,
+                price=Decimal('1.00'),
+            ),
+        ])
+
+        self.assertEqual(len(search(self.client, 'gazpacho')), 1)
+
+    def test_search_websearch_syntax(self):
+        """Test quoted phrases and exclusions are supported."""
+        roast = create_recipe(user=self.user, title='Roast chicken')
+        create_recipe(user=self.user, title='Chicken soup')
+
+        self.assertEqual(search(self.client, 'chicken -soup'), [roast.id])
+
+    def test_search_null_character_rejected(self):
+        """Test search terms containing NUL are rejected."""
+        res = self.client.get(RECIPES_URL, {'search': 'a\x00b'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('search', res.data)
+
+    def test_search_pagination(self):
+        """Test paging through search results by relevance."""
+        recipes = [
+            create_recipe(user=self.user, title='Bread', description=desc)
+            for desc in ['', 'bread', 'bread bread', '', 'bread']
+        ]
+
+        res = self.client.get(RECIPES_URL, {'search': 'bread', 'page_size': 2})
+        ids = [r['id'] for r in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [r['id'] for r in res.data['results']]
+
+        self.assertCountEqual(ids, [r.id for r in recipes])
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(ids[0], recipes[2].id)
@@ -0,0 +1,142 @@
+"""
+Tests for ?fields= and ?expand= on the recipe APIs.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class SparseFieldsTests(TestCase):
+    """Test selecting recipe fields and relations."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Pad Thai',
+            description='Stir fried noodles.',
+            time_minutes=20,
+            price=Decimal('5.50'),
+        )
+        self.tag = Tag.objects.create(user=self.user, name='Thai')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user,
+            name='Noodles',
+        )
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(self.ingredient)
+
+    def get(self, url, params):
+        """Return the response and the SQL of the queries it made."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res, ' '.join(query['sql'] for query in queries)
+
+    def test_list_fields(self):
+        """Test listing only some fields skips the other columns and tags."""
+        res, sql = self.get(RECIPES_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.data['results'], [
+            {'id': self.recipe.id, 'title': 'Pad Thai'},
+        ])
+        self.assertNotIn('"link"', sql)
+        self.assertNotIn('core_recipe_tags', sql)
+
+    def test_list_expand(self):
+        """Test expanding ingredients adds them to the default fields."""
+        res, sql = self.get(RECIPES_URL, {'expand': 'ingredients'})
+
+        recipe = res.data['results'][0]
+        self.assertEqual(recipe['tags'], [{'id': self.tag.id, 'name': 'Thai'}])
+        self.assertEqual(
+            recipe['ingredients'],
+            [{'id': self.ingredient.id, 'name': 'Noodles'}],
+        )
+
+    def test_list_fields_and_expand(self):
+        """Test expanded relations are added to the selected fields."""
+        res, sql = self.get(RECIPES_URL, {'fields': 'id', 'expand': 'tags'})
+
+        self.assertEqual(res.data['results'], [
+            {'id': self.recipe.id, 'tags': [{'id': self.tag.id,
+                                             'name': 'Thai'}]},
+        ])
+        self.assertNotIn('core_recipe_ingredients', sql)
+
+    def test_retrieve_fields(self):
+        """Test retrieving only some fields defers the description."""
+        res, sql = self.get(
+            detail_url(self.recipe.id),
+            {'fields': 'title,price'},
+        )
+
+        self.assertEqual(res.data, {'title': 'Pad Thai', 'price': '5.50'})
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('core_recipe_tags', sql)
+
+    def test_retrieve_expand(self):
+        """Test retrieving a recipe with its ingredients."""
+        res, sql = self.get(
+            detail_url(self.recipe.id),
+            {'expand': 'ingredients'},
+        )
+
+        self.assertEqual(res.data['description'], 'Stir fried noodles.')
+        self.assertEqual(
+            res.data['ingredients'],
+            [{'id': self.ingredient.id, 'name': 'Noodles'}],
+        )
+
+    def test_default_fields_unchanged(self):
+        """Test ingredients are only output when requested."""
+        res, sql = self.get(detail_url(self.recipe.id), {})
+
+        self.assertNotIn('ingredients', res.data)
+        self.assertNotIn('core_recipe_ingredients', sql)
+
+    def test_unknown_fields_rejected(self):
+        """Test unknown fields and relations are rejected."""
+        for params in (
+            {'fields': 'id,secret'},
+            {'fields': 'description'},
+            {'expand': 'title'},
+        ):
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_empty_fields_rejected(self):
+        """Test a selection naming no fields is rejected on every action."""
+        for url in (RECIPES_URL, detail_url(self.recipe.id)):
+            for params in ({'fields': ','}, {'fields': ' ', 'expand': 'tags'}):
+                res = self.client.get(url, params)
+
+                self.assertEqual(
+                    res.status_code,
+                    status.HTTP_400_BAD_REQUEST,
+                )
+                self.assertIn('fields', res.data)
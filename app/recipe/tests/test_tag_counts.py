@@ -0,0 +1,115 @@
+"""
+Tests for the incrementally maintained tag recipe counts.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def create_recipe(user, title='Sample recipe'):
+    """Create and return a recipe."""
+    return Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=5,
+        price=Decimal('1.00'),
+    )
+
+
+class TagCountTests(TestCase):
+    """Test Tag.recipe_count follows recipe changes."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.tag1 = Tag.objects.create(user=self.user, name='Breakfast')
+        self.tag2 = Tag.objects.create(user=self.user, name='Lunch')
+
+    def assertCounts(self, count1, count2):
+        self.tag1.refresh_from_db()
+        self.tag2.refresh_from_db()
+        self.assertEqual(
+            (self.tag1.recipe_count, self.tag2.recipe_count),
+            (count1, count2),
+        )
+
+    def test_add_and_remove(self):
+        """Test adding and removing tags from a recipe."""
+        recipe = create_recipe(self.user)
+        recipe.tags.add(self.tag1, self.tag2)
+        recipe.tags.add(self.tag1)
+        self.assertCounts(1, 1)
+
+        recipe.tags.remove(self.tag2)
+        recipe.tags.remove(self.tag2)
+        self.assertCounts(1, 0)
+
+    def test_set_and_clear(self):
+        """Test replacing and clearing a recipe's tags."""
+        recipe = create_recipe(self.user)
+        recipe.tags.set([self.tag1])
+        recipe.tags.set([self.tag2])
+        self.assertCounts(0, 1)
+
+        recipe.tags.clear()
+        self.assertCounts(0, 0)
+
+    def test_reverse_relation(self):
+        """Test adding and removing recipes from a tag."""
+        recipes = [create_recipe(self.user, title) for title in 'ABC']
+        self.tag1.recipe_set.add(*recipes)
+        self.assertCounts(3, 0)
+
+        self.tag1.recipe_set.remove(recipes[0])
+        self.assertCounts(2, 0)
+
+        self.tag1.recipe_set.clear()
+        self.assertCounts(0, 0)
+
+    def test_delete_recipe(self):
+        """Test deleting recipes decrements their tags."""
+        recipe1 = create_recipe(self.user, 'A')
+        recipe2 = create_recipe(self.user, 'B')
+        recipe1.tags.add(self.tag1, self.tag2)
+        recipe2.tags.add(self.tag1)
+
+        recipe1.delete()
+        self.assertCounts(1, 0)
+
+        Recipe.objects.all().delete()
+        self.assertCounts(0, 0)
+
+    def test_bulk_create_and_update(self):
+        """Test bulk writes recount the tags they touch."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        payload = [
+            {
+                'title': f'Recipe {i}',
+                'time_minutes': 5,
+                'price': '1.00',
+                'tags': [{'name': 'Breakfast'}],
+            }
+            for i in range(3)
+        ]
+        res = client.post(BULK_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertCounts(3, 0)
+
+        res = client.patch(BULK_URL, [
+            {'id': res.data[0]['id'], 'tags': [{'name': 'Lunch'}]},
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCounts(2, 1)
@@ -9,6 +9,8 @@
 """
 Tests for the tags API.
 """
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import TestCase
@@ -16,7 +18,7 @@ from django.test import TestCase
 from rest_framework import status # status code check
 from rest_framework.test import APIClient
 
-from core.models import Tag
+from core.models import Recipe, Tag
 
 from recipe.serializers import TagSerializer # create it in Create Tag API, Step 5
 
@@ -75,7 +77,7 @@ class PrivateTagsApiTests(TestCase):
         # check get request succeeded
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         # data matches
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_limited_to_user(self):
         """Test list of tags is limited to authenticated user."""
@@ -92,11 +94,75 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL)
         # successfully pass in get request
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
         # Since the lastest created tag is from self.user
         # tag, which refers to the self.user tag, should matches response from self.client.get()
-        self.assertEqual(res.data[0]['name'], tag.name)
-        self.assertEqual(res.data[0]['id'], tag.id)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+        self.assertEqual(res.data['results'][0]['id'], tag.id)
+
+    def test_tags_cursor_pagination(self):
+        """Test paging through tags with cursors."""
+        for name in ['Apple', 'Banana', 'Cherry', 'Date', 'Elderberry']:
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+        names = [t['name'] for t in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            names += [t['name'] for t in res.data['results']]
+
+        self.assertEqual(
+            names,
+            ['Elderberry', 'Date', 'Cherry', 'Banana', 'Apple'],
+        )
+
+    def test_tags_with_counts(self):
+        """Test tags can be listed with the number of recipes using them."""
+        tag1 = Tag.objects.create(user=self.user, name='Breakfast')
+        tag2 = Tag.objects.create(user=self.user, name='Lunch')
+        for title in ['Eggs', 'Toast']:
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=title,
+                time_minutes=5,
+                price=Decimal('1.00'),
+            )
+            recipe.tags.add(tag1)
+
+        res = self.client.get(TAGS_URL, {'with_counts': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [
+            {'id': tag2.id, 'name': 'Lunch', 'recipe_count': 0},
+            {'id': tag1.id, 'name': 'Breakfast', 'recipe_count': 2},
+        ])
+
+    def test_tags_assigned_only(self):
+        """Test filtering tags to those assigned to recipes."""
+        tag1 = Tag.objects.create(user=self.user, name='Breakfast')
+        Tag.objects.create(user=self.user, name='Lunch')
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Eggs',
+            time_minutes=5,
+            price=Decimal('1.00'),
+        )
+        recipe.tags.add(tag1)
+
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            TagSerializer([tag1], many=True).data,
+        )
+
+    def test_tags_assigned_only_invalid(self):
+        """Test a non boolean assigned_only is rejected."""
+        res = self.client.get(TAGS_URL, {'assigned_only': 'yes'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
     # Create Tag API, Step 8: Add tests for updating tags
     def test_update_tag(self):
@@ -111,6 +177,22 @@ class PrivateTagsApiTests(TestCase):
         tag.refresh_from_db() # after patch request(request for update), refresh database to show updates
         self.assertEqual(tag.name, payload['name'])
 
+    def test_rename_tag_to_existing_name(self):
+        """Test renaming a tag to a name the user already has fails."""
+        Tag.objects.create(user=self.user, name='Dessert')
+        tag = Tag.objects.create(user=self.user, name='After Dinner')
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'Dessert'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', res.data)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'After Dinner')
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'After Dinner'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     # Run test in the terminal
     # Response from the test
     # django.urls.exceptions.NoReverseMatch: Reverse for 'tag-detail' not found. 'tag-detail' is not a valid view function or pattern name.
@@ -0,0 +1,27 @@
+"""
+Resized variants of recipe images, rendered in worker processes.
+
+Kept free of Django so spawned workers only import Pillow.
+"""
+from PIL import Image, ImageOps
+
+
+def render_variants(source, targets, quality=85):
+    """Save a JPEG of source fitting within each size of targets.
+
+    targets maps output paths to (width, height) bounds. The aspect ratio
+    is kept and images are never enlarged.
+    """
+    with Image.open(source) as image:
+        # JPEGs are decoded at the smallest scale covering every size.
+        image.draft('RGB', (
+            max(width for width, _ in targets.values()),
+            max(height for _, height in targets.values()),
+        ))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        for path, size in targets.items():
+            variant = image.copy()
+            variant.thumbnail(size)
+            variant.save(path, 'JPEG', quality=quality, optimize=True)
@@ -16,6 +16,7 @@ router.register('recipes', views.RecipeViewSet)
 # Create Tag API, Step 7: Register tags
 # Next run test in the terminal
 router.register('tags', views.TagViewSet)
+router.register('ingredients', views.IngredientViewSet)
 
 app_name = 'recipe'
 
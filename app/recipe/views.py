@@ -2,41 +2,299 @@
 Views for the recipe APIs
 """
 # from rest_framework import viewsets
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+)
+from django.db.models import (
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    prefetch_related_objects,
+)
+from django.db.models.functions import Cast
+from django.http import StreamingHttpResponse
 
 from rest_framework import (
     viewsets,
     mixins,
+    status,
 )
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 # from core.models import Recipe
 # Add Tag
 from core.models import (
+    Ingredient,
     Recipe,
     Tag,
 )
+from core.routers import ReplicaReadMixin
+from core.export import (
+    CONTENT_TYPES,
+    export_lines,
+)
+
+from recipe import images, serializers
+from recipe.autocomplete import AutocompleteMixin
+from recipe.cache import (
+    CachedResponseMixin,
+    aggregate_validators,
+)
+from recipe.pagination import (
+    IngredientCursorPagination,
+    RecipeCursorPagination,
+    TagCursorPagination,
+)
+from user.authentication import CachedTokenAuthentication
+
 
-from recipe import serializers
+# ?ordering= values. Each ends in id, so recipes are in a total order, and
+# is served by an index on (user, <field>, id), read backwards for
+# descending orders.
+RECIPE_ORDERINGS = {
+    '-id': ('-id',),
+    'price': ('price', 'id'),
+    '-price': ('-price', '-id'),
+    'time_minutes': ('time_minutes', 'id'),
+    '-time_minutes': ('-time_minutes', '-id'),
+}
 
+# Range filters, as ?<param>= to (lookup, parse).
+RECIPE_RANGE_FILTERS = {
+    'min_price': ('price__gte', Decimal),
+    'max_price': ('price__lte', Decimal),
+    'min_time': ('time_minutes__gte', int),
+    'max_time': ('time_minutes__lte', int),
+}
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+class RecipeViewSet(ReplicaReadMixin,
+                    CachedResponseMixin,
+                    viewsets.ModelViewSet):
     """View for manage recipe APIs."""
 
     #serializer_class = serializers.RecipeSerializer
     serializer_class = serializers.RecipeDetailSerializer
-    queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    queryset = Recipe.objects.defer('search_vector')
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
+
+    # Actions whose responses serialize nested relations, mapped to the
+    # relations to prefetch when output (one batched query per relation).
+    # Updates are left out because DRF discards the prefetch cache after
+    # saving, and list loads relations itself in recipe_list_data.
+    prefetch_actions = {
+        'retrieve': ['tags', 'ingredients'],
+    }
+    # Actions whose output ?fields= and ?expand= select.
+    sparse_actions = {'list', 'retrieve'}
 
     def get_queryset(self):
         """Retrieve recipes for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        queryset = self.queryset.filter(
+            user=self.request.user,
+        ).order_by('-id')
+        fields = self.selected_fields()
+        output = fields or serializers.default_fields(
+            self.get_serializer_class(),
+        )
+        for relation in self.prefetch_actions.get(self.action, []):
+            if relation in output:
+                queryset = queryset.prefetch_related(
+                    serializers.RELATION_PREFETCHES[relation](),
+                )
+        if fields is not None:
+            queryset = queryset.only('id', *(
+                name for name in fields
+                if name not in serializers.RELATION_PREFETCHES
+            ))
+
+        if self.action == 'list':
+            queryset = self._filter_related(queryset, Recipe.tags, 'tags')
+            queryset = self._filter_related(
+                queryset,
+                Recipe.ingredients,
+                'ingredients',
+            )
+            queryset = self._filter_ranges(queryset)
+            search = self.request.query_params.get('search')
+            if search:
+                queryset = self._search(queryset, search)
+            queryset = self._order(queryset, search)
+
+        return queryset
+
+    def selected_fields(self):
+        """Return the fields selected by ?fields= and ?expand=, or None."""
+        if self.action not in self.sparse_actions:
+            return None
+        if not hasattr(self, '_selected_fields'):
+            self._selected_fields = serializers.select_fields(
+                self.get_serializer_class(),
+                self.request.query_params.get('fields'),
+                self.request.query_params.get('expand'),
+            )
+
+        return self._selected_fields
+
+    def get_serializer(self, *args, **kwargs):
+        """Return a serializer outputting only the selected fields."""
+        if self.action in self.sparse_actions:
+            kwargs.setdefault('fields', self.selected_fields())
+
+        return super().get_serializer(*args, **kwargs)
+
+    def _params_to_ints(self, param, qs):
+        """Convert a comma separated list of strings to integers."""
+        try:
+            return [int(str_id) for str_id in qs.split(',')]
+        except ValueError:
+            raise ValidationError(
+                {param: ['Expected a comma separated list of ids.']}
+            )
+
+    def _filter_related(self, queryset, related, param):
+        """Filter recipes by ?<param>=1,2 and ?<param>_match=any|all.
+
+        Uses EXISTS semi-joins on the through table, so recipes are never
+        duplicated and no DISTINCT is needed.
+        """
+        value = self.request.query_params.get(param)
+        if not value:
+            return queryset
+        ids = self._params_to_ints(param, value)
+        match = self.request.query_params.get(f'{param}_match', 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError(
+                {f'{param}_match': ['Expected "any" or "all".']}
+            )
+
+        through = related.through.objects.filter(recipe_id=OuterRef('pk'))
+        target = related.field.m2m_reverse_name()
+        if match == 'any':
+            return queryset.filter(
+                Exists(through.filter(**{f'{target}__in': ids})),
+            )
+        for pk in set(ids):
+            queryset = queryset.filter(
+                Exists(through.filter(**{target: pk})),
+            )
+
+        return queryset
+
+    def _filter_ranges(self, queryset):
+        """Filter recipes by the inclusive RECIPE_RANGE_FILTERS bounds."""
+        for param, (lookup, parse) in RECIPE_RANGE_FILTERS.items():
+            value = self.request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                bound = parse(value)
+            except (ValueError, InvalidOperation):
+                bound = None
+            if bound is None or (
+                isinstance(bound, Decimal) and not bound.is_finite()
+            ):
+                raise ValidationError({param: ['Expected a number.']})
+            queryset = queryset.filter(**{lookup: bound})
+
+        return queryset
+
+    def _order(self, queryset, search):
+        """Order recipes by ?ordering=, else by relevance or newest first.
+
+        Pagination follows this ordering. Orderings without an index are
+        rejected rather than sorted.
+        """
+        value = self.request.query_params.get('ordering')
+        if value:
+            if value not in RECIPE_ORDERINGS:
+                raise ValidationError({'ordering': [
+                    f'Expected one of: {", ".join(RECIPE_ORDERINGS)}.',
+                ]})
+            return queryset.order_by(*RECIPE_ORDERINGS[value])
+        if search:
+            return queryset.order_by('-search_rank', '-id')
+
+        return queryset
+
+    def _search(self, queryset, search):
+        """Filter recipes matching search, ranked by relevance."""
+        if '\x00' in search:
+            raise ValidationError(
+                {'search': ['Null characters are not allowed.']}
+            )
+        query = SearchQuery(search, config='english', search_type='websearch')
+        # Scaled to an integer so cursor positions compare exactly.
+        rank = Cast(
+            SearchRank(F('search_vector'), query) * 1000000,
+            IntegerField(),
+        )
+
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=rank,
+        )
+
+    def get_validators(self, request):
+        """Return validators for the requested recipe or recipe list."""
+        queryset = self.queryset.filter(user=request.user)
+        if self.detail:
+            try:
+                queryset = queryset.filter(pk=self.kwargs['pk'])
+            except (TypeError, ValueError):
+                # Not an id; get_object() answers 404.
+                return None
+
+        return aggregate_validators(
+            request,
+            queryset,
+            allow_empty=not self.detail,
+        )
+
+    def list(self, request, *args, **kwargs):
+        """List recipes, from the cache when fresh."""
+        return self.cached_response(self._list, request, *args, **kwargs)
+
+    def _list(self, request, *args, **kwargs):
+        """List recipes serialized from values() rows."""
+        queryset = self.filter_queryset(self.get_queryset())
+        fields = self.selected_fields()
+        page = self.paginate_queryset(
+            serializers.recipe_list_values(queryset, fields),
+        )
+
+        return self.get_paginated_response(
+            serializers.recipe_list_data(page, fields),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a recipe, from the cache when fresh."""
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def update(self, request, *args, **kwargs):
+        """Update a recipe, honouring If-Match preconditions."""
+        return self.precondition_response(
+            super().update, request, *args, **kwargs
+        )
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
         if self.action == 'list':
             return serializers.RecipeSerializer
+        elif self.action == 'upload_image':
+            return serializers.RecipeImageSerializer
 
         # else return RecipeDetailSerializer
         return self.serializer_class
@@ -45,12 +303,108 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Create a new recipe."""
         serializer.save(user=self.request.user)
 
+    @action(methods=['POST'], detail=True, url_path='upload-image')
+    def upload_image(self, request, pk=None):
+        """Upload an image to recipe, as multipart/form-data.
+
+        The image streams to disk and its resized variants are rendered in
+        the background, appearing in image_variants once saved.
+        """
+        # Set before the body is parsed.
+        request.upload_handlers = images.upload_handlers(request)
+        recipe = self.get_object()
+        serializer = self.get_serializer(recipe, data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        images.reserve()
+        try:
+            with transaction.atomic():
+                recipe = serializer.save()
+                images.render_on_commit(recipe)
+        except BaseException:
+            images.release()
+            raise
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """Stream all of the user's recipes as NDJSON or CSV."""
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in CONTENT_TYPES:
+            raise ValidationError(
+                {'export_format': ['Expected "ndjson" or "csv".']}
+            )
+        response = StreamingHttpResponse(
+            export_lines(request.user, export_format),
+            content_type=CONTENT_TYPES[export_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{export_format}"'
+        )
+
+        return response
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        """Create (POST) or update (PATCH) a list of recipes at once.
+
+        The whole batch is saved in one transaction or rejected with a list
+        of errors matching the submitted items.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError(['Expected a list of recipes.'])
+        max_items = settings.RECIPE_BULK_MAX_ITEMS
+        if len(items) > max_items:
+            raise ValidationError(
+                [f'Ensure this list has at most {max_items} recipes.']
+            )
+
+        if request.method == 'POST':
+            serializer = self.get_serializer(data=items, many=True)
+            save_kwargs = {'user': request.user}
+            response_status = status.HTTP_201_CREATED
+        else:
+            ids = [
+                item.get('id') if isinstance(item, dict) else None
+                for item in items
+            ]
+            instances = self.get_queryset().in_bulk(
+                [pk for pk in ids if isinstance(pk, int)],
+            )
+            errors = [
+                {} if pk in instances else {'id': ['Not found.']}
+                for pk in ids
+            ]
+            if any(errors):
+                raise ValidationError(errors)
+            serializer = self.get_serializer(
+                [instances[pk] for pk in ids],
+                data=items,
+                many=True,
+                partial=True,
+            )
+            save_kwargs = {}
+            response_status = status.HTTP_200_OK
+
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            recipes = serializer.save(**save_kwargs)
+        prefetch_related_objects(recipes, 'tags')
+        data = self.get_serializer(recipes, many=True).data
+
+        return Response(data, status=response_status)
+
 
 # Create Tag API, Step 7: Create views for tag
 # Create Tag API, Step 9: Add mixins.UpdateModelMixin
 # Run test, and pass!
 # Must define Mixin before viewsets, check docs
-class TagViewSet(mixins.DestroyModelMixin,
+class TagViewSet(ReplicaReadMixin,
+                 CachedResponseMixin,
+                 AutocompleteMixin,
+                 mixins.DestroyModelMixin,
                  mixins.UpdateModelMixin,
                  mixins.ListModelMixin,
                  viewsets.GenericViewSet):
@@ -58,13 +412,67 @@ class TagViewSet(mixins.DestroyModelMixin,
     #CRUD, create, read, update and delete
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = TagCursorPagination
+
+    def get_queryset(self):
+        """Filter queryset to authenticated user."""
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action == 'list' and self._flag('assigned_only'):
+            # Served by the partial tag_assigned_name_idx index.
+            queryset = queryset.filter(recipe_count__gt=0)
+
+        return queryset.order_by('-name')
+
+    def get_serializer_class(self):
+        """Return the serializer class for request."""
+        if self._flag('with_counts'):
+            return serializers.TagUsageSerializer
+
+        return self.serializer_class
+
+    def _flag(self, param):
+        """Return the boolean value of ?<param>=0|1."""
+        try:
+            return bool(int(self.request.query_params.get(param, 0)))
+        except ValueError:
+            raise ValidationError({param: ['Expected 0 or 1.']})
+
+    def get_validators(self, request):
+        """Return validators for the tag list."""
+        return aggregate_validators(
+            request,
+            self.queryset.filter(user=request.user),
+        )
+
+    def list(self, request, *args, **kwargs):
+        """List tags, from the cache when fresh."""
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class IngredientViewSet(ReplicaReadMixin,
+                        CachedResponseMixin,
+                        AutocompleteMixin,
+                        mixins.DestroyModelMixin,
+                        mixins.UpdateModelMixin,
+                        mixins.ListModelMixin,
+                        viewsets.GenericViewSet):
+    """Manage ingredients in the database."""
+    serializer_class = serializers.IngredientSerializer
+    queryset = Ingredient.objects.all()
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    pagination_class = IngredientCursorPagination
 
     def get_queryset(self):
         """Filter queryset to authenticated user."""
         return self.queryset.filter(user=self.request.user).order_by('-name')
 
+    def list(self, request, *args, **kwargs):
+        """List ingredients, from the cache when fresh."""
+        return self.cached_response(super().list, request, *args, **kwargs)
+
 # Next, open recipe/urls.py
 
 
@@ -0,0 +1,83 @@
+"""
+Authentication classes for the APIs.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+
+from rest_framework.authentication import TokenAuthentication
+
+from core.models import AuthVersion
+from core.stats import CacheStats
+
+
+stats = CacheStats('auth')
+
+
+def get_cache():
+    """Return the cache backend configured for authenticated tokens."""
+    return caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+
+
+def _token_key(key):
+    return f'auth:token:{key}'
+
+
+def _versions():
+    # Always the primary, which every revocation bumps.
+    return AuthVersion.objects.using(DEFAULT_DB_ALIAS)
+
+
+def create_auth_version(user_id):
+    """Create the auth version row of a new user."""
+    _versions().bulk_create(
+        [AuthVersion(user_id=user_id, version=time.time_ns())],
+        ignore_conflicts=True,
+    )
+
+
+def get_auth_version(**filters):
+    """Return the auth version of the user matching filters, or None."""
+    versions = _versions().filter(**filters)
+    version = versions.values_list('version', flat=True)[:1]
+
+    return version[0] if version else None
+
+
+def revoke(user_id):
+    """Invalidate the cached token lookups of a user in every worker."""
+    _versions().filter(user_id=user_id).update(version=F('version') + 1)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the token to user lookup.
+
+    Entries live in the AUTH_TOKEN_CACHE_ALIAS cache, which bounds their
+    number and lifetime, and are tagged with the user's AuthVersion. Each
+    request compares that tag with the database, so saving the user or
+    deleting their token revokes the entry in every worker at once.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_cache()
+        cached = cache.get(_token_key(key))
+        if cached is not None:
+            user, token, version = cached
+            if version == get_auth_version(user_id=user.pk):
+                stats.record(True)
+                return user, token
+        stats.record(False)
+
+        # Read first, so a change made meanwhile bumps past the tag.
+        version = get_auth_version(user__auth_token__key=key)
+        user, token = super().authenticate_credentials(key)
+        if version is None:
+            # Users created before auth versions, or in bulk.
+            create_auth_version(user.pk)
+        else:
+            cache.set(_token_key(key), (user, token, version))
+
+        return user, token
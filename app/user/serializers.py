@@ -46,6 +46,8 @@ class AuthTokenSerializer(serializers.Serializer):
         """Validate and authenticate the user."""
         email = attrs.get('email')
         password = attrs.get('password')
+        # On success the password is rehashed if its hasher or costs are
+        # no longer the preferred ones in PASSWORD_HASHERS.
         user = authenticate(
             request=self.context.get('request'),
             username=email,
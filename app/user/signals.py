@@ -0,0 +1,31 @@
+"""
+Signal handlers for the user app.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+)
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import (
+    create_auth_version,
+    revoke,
+)
+
+
+@receiver(post_delete, sender=Token)
+def revoke_on_token_delete(sender, instance, **kwargs):
+    """Revoke cached lookups when a token is deleted or regenerated."""
+    revoke(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def revoke_on_user_save(sender, instance, created, **kwargs):
+    """Revoke a user's cached lookups when the user changes."""
+    if created:
+        create_auth_version(instance.pk)
+    else:
+        revoke(instance.pk)
@@ -0,0 +1,122 @@
+"""
+Tests for cached token authentication.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import AuthVersion
+from user import authentication
+
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test the cached token authentication class."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        authentication.stats.reset()
+
+    def test_repeated_requests_skip_token_query(self):
+        """Test later requests only check the user's auth version."""
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['email'], self.user.email)
+        sql = [query['sql'] for query in queries.captured_queries]
+        self.assertIn('core_authversion', sql[0])
+        self.assertFalse([q for q in sql if 'authtoken_token' in q])
+        self.assertEqual(authentication.stats.hits, 1)
+        self.assertEqual(authentication.stats.misses, 1)
+
+    def test_invalid_token_rejected(self):
+        """Test an unknown token is rejected and not cached."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected(self):
+        """Test deleting a token invalidates the cached entry."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_inactive_user_rejected(self):
+        """Test deactivating a user invalidates the cached entry."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_update_reflected(self):
+        """Test changes to the user are seen by later requests."""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'Updated Name'})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'Updated Name')
+
+    def test_revoked_by_other_worker(self):
+        """Test a revocation made elsewhere rejects the cached entry."""
+        self.client.get(ME_URL)
+
+        # As another worker's save would, without touching this cache.
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False,
+        )
+        authentication.revoke(self.user.pk)
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_update_keeps_fields_changed_elsewhere(self):
+        """Test updating the user does not write a cached copy back."""
+        self.client.get(ME_URL)
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            password='changed-elsewhere',
+        )
+
+        res = self.client.patch(ME_URL, {'name': 'B'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'B')
+        self.assertEqual(self.user.password, 'changed-elsewhere')
+
+    def test_user_without_auth_version(self):
+        """Test users created in bulk authenticate and are then cached."""
+        AuthVersion.objects.filter(user=self.user).delete()
+
+        for _ in range(2):
+            res = self.client.get(ME_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.client.get(ME_URL)
+
+        self.assertEqual(authentication.stats.hits, 1)
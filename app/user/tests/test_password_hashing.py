@@ -0,0 +1,77 @@
+"""
+Tests for password hashing and rehashing on login.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+CREATE_USER_URL = reverse('user:create')
+TOKEN_URL = reverse('user:token')
+
+PAYLOAD = {'email': 'test@example.com', 'password': 'testpass123'}
+
+PBKDF2_FIRST = [
+    'core.hashers.PBKDF2PasswordHasher',
+    'core.hashers.Argon2PasswordHasher',
+]
+
+
+class PasswordHashingTests(TestCase):
+    """Test the configured hasher is used and older hashes upgraded."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def login(self):
+        res = self.client.post(TOKEN_URL, PAYLOAD)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return get_user_model().objects.get(email=PAYLOAD['email'])
+
+    def test_signup_uses_argon2(self):
+        """Test new passwords are hashed with Argon2 by default."""
+        res = self.client.post(
+            CREATE_USER_URL,
+            {**PAYLOAD, 'name': 'Test Name'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        user = get_user_model().objects.get(email=PAYLOAD['email'])
+        self.assertTrue(user.password.startswith('argon2$argon2id$'))
+
+    def test_login_rehashes_legacy_hash(self):
+        """Test a PBKDF2 hash is replaced with Argon2 on login."""
+        with override_settings(PASSWORD_HASHERS=PBKDF2_FIRST):
+            get_user_model().objects.create_user(**PAYLOAD)
+
+        user = self.login()
+
+        self.assertTrue(user.password.startswith('argon2$'))
+        self.assertTrue(user.check_password(PAYLOAD['password']))
+
+    @override_settings(PASSWORD_ARGON2_TIME_COST=1)
+    def test_login_rehashes_changed_parameters(self):
+        """Test a hash made with other costs is rehashed on login."""
+        with override_settings(PASSWORD_ARGON2_TIME_COST=2):
+            get_user_model().objects.create_user(**PAYLOAD)
+
+        user = self.login()
+
+        self.assertIn('t=1', user.password)
+
+    def test_failed_login_keeps_hash(self):
+        """Test a wrong password does not rehash."""
+        with override_settings(PASSWORD_HASHERS=PBKDF2_FIRST):
+            user = get_user_model().objects.create_user(**PAYLOAD)
+
+        res = self.client.post(
+            TOKEN_URL,
+            {'email': PAYLOAD['email'], 'password': 'wrong'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))